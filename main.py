@@ -1,9 +1,62 @@
 import argparse
-from scripts import config_manager, backup_manager, inventory_manager, firmware_manager
+import contextlib
+import importlib
+import importlib.util
+import sys
+from scripts.constants import SUPPORTED_ENGINES, SUPPORTED_TASKS
 from utils.logger_utils import setup_logger
 
 logger = setup_logger("netpilot")
 
+def parse_tasks(value):
+    """Parse a single task or a comma separated task list (e.g. backup,inventory)."""
+    tasks = [task.strip() for task in value.split(",") if task.strip()]
+    unknown = [task for task in tasks if task not in SUPPORTED_TASKS]
+    if not tasks or unknown:
+        raise argparse.ArgumentTypeError(
+            f"invalid task: {value} (choose from {', '.join(SUPPORTED_TASKS)})"
+        )
+    return tasks
+
+def show_leases():
+    """Print the current lease holders of this host."""
+    from scripts.leases import get_lease_manager
+
+    manager = get_lease_manager()
+    if manager is None:
+        print("Leases are disabled (leases.enabled in config.yaml).")
+        return
+    holders = manager.holders()
+    if not holders:
+        print("No leases held.")
+    for holder in holders:
+        print(
+            f"{holder['lease']:<30} {holder['program']} pid {holder['pid']} "
+            f"task {holder['task']} since {holder['since']}"
+        )
+
+def run_worker(address):
+    """Serve shards of distributed runs on HOST:PORT until interrupted."""
+    from scripts.distributed import AUTHKEY_ENV, get_authkey, parse_address, serve_worker
+
+    authkey = get_authkey()
+    if authkey is None:
+        raise ValueError(f"Set {AUTHKEY_ENV} to the key shared with the coordinator")
+    serve_worker(parse_address(address), authkey)
+
+def run_on_daemon(tasks, device_names=None, engine=None):
+    """Submit a job to the NetPilot daemon and print its results as they arrive."""
+    from scripts.checkpoint import result_device, result_status
+    from scripts.daemon import DaemonClient
+
+    client = DaemonClient()
+    job = client.submit(tasks, device_names, engine)
+    print(f"Job {job['id']} submitted (cancel with: python main.py --cancel {job['id']})")
+    for result in client.results(job["id"]):
+        print(f"{result_device(result):<30} {result_status(result)}")
+    job = client.status(job["id"])
+    print(f"Job {job['id']} {job['state']}: {job['completed']} device(s) {job['statuses']}")
+
 def main():
     """
     Main entry point for the network automation script.
@@ -14,36 +67,200 @@ def main():
     )
     parser.add_argument(
         "--task",
-        required=True,
-        choices=["config", "backup", "inventory", "firmware"],
         metavar="TASK",
-        type=str,
-        default="config",
+        type=parse_tasks,
+        default=None,
         nargs="?",
-        dest="task",
-        help="Automation task to run (example: config)"
+        dest="tasks",
+        help="Automation task(s) to run (example: config or backup,inventory)"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=SUPPORTED_ENGINES,
+        default=None,
+        dest="engine",
+        help="Execution engine (default: thread_pools.engine in config.yaml)"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        dest="resume",
+        help="Resume an interrupted run, skipping the devices it already finished"
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        dest="retry_failed",
+        help="With --resume, also rerun the devices that failed"
+    )
+
+    parser.add_argument(
+        "--leases",
+        action="store_true",
+        dest="leases",
+        help="Show which processes hold device leases and session slots on this host, then exit"
+    )
+
+    parser.add_argument(
+        "--worker",
+        metavar="HOST:PORT",
+        default=None,
+        dest="worker",
+        help="Run as a distributed worker listening on HOST:PORT (key: NETPILOT_WORKER_KEY)"
+    )
+
+    parser.add_argument(
+        "--devices",
+        metavar="NAMES",
+        type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+        default=None,
+        dest="devices",
+        help="Only run on these devices.yaml names (example: sw1,sw2)"
+    )
+    parser.add_argument(
+        "--events",
+        metavar="FILE",
+        default=None,
+        dest="events",
+        help="Write progress events (device started/finished, phases, retries) to FILE as JSON lines"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=None,
+        dest="trace",
+        help="Write a timeline of the run (devices and phases per worker thread) to FILE in Chrome trace-event JSON"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        default=None,
+        dest="profile",
+        help="Profile the coordinator to FILE: cProfile stats, or a pyinstrument report for FILE.html"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        dest="serve",
+        help="Run the NetPilot daemon (daemon section of config.yaml)"
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        dest="daemon",
+        help="Run the task on the NetPilot daemon instead of in this process"
+    )
+    parser.add_argument(
+        "--cancel",
+        metavar="JOB_ID",
+        default=None,
+        dest="cancel",
+        help="Cancel a job of the NetPilot daemon, then exit"
     )
 
     args = parser.parse_args()
+    if args.leases:
+        show_leases()
+        return
+    if args.serve:
+        from scripts.daemon import serve
+        serve()
+        return
+    if args.cancel:
+        from scripts.daemon import DaemonClient, DaemonError
+        try:
+            job = DaemonClient().cancel(args.cancel)
+        except DaemonError as exc:
+            parser.error(str(exc))
+        print(f"Job {job['id']} {job['state']}")
+        return
+    if args.worker:
+        try:
+            run_worker(args.worker)
+        except ValueError as exc:
+            parser.error(str(exc))
+        except KeyboardInterrupt:
+            logger.info("Worker stopped.")
+        return
+    if args.retry_failed and not args.resume:
+        parser.error("--retry-failed requires --resume")
+    if args.resume and not args.tasks:
+        # Resume the tasks the run was started with
+        from scripts.checkpoint import load_run
+        try:
+            args.tasks = load_run(args.resume)["tasks"]
+        except ValueError as exc:
+            parser.error(str(exc))
+    if not args.tasks:
+        parser.error("--task is required unless resuming with --resume")
+    if args.profile and args.profile.endswith(".html") and importlib.util.find_spec("pyinstrument") is None:
+        parser.error("pyinstrument is not installed; use a .prof file for cProfile stats")
+    if args.daemon:
+        if args.resume:
+            parser.error("--resume cannot be used with --daemon")
+        from scripts.daemon import DaemonError
+        try:
+            run_on_daemon(args.tasks, args.devices, args.engine)
+        except DaemonError as exc:
+            parser.error(str(exc))
+        return
 
+    # Task modules are imported only when selected
     task_map = {
-        "config": config_manager,
-        "backup": backup_manager,
-        "inventory": inventory_manager,
-        "firmware": firmware_manager,
+        "config": "scripts.config_manager",
+        "backup": "scripts.backup_manager",
+        "inventory": "scripts.inventory_manager",
+        "firmware": "scripts.firmware_manager",
     }
 
-    task_module = task_map.get(args.task)
-    if not task_module:
-        logger.error(f"Unsupported task: {args.task}")
+    if not args.tasks:
+        logger.error(f"Unsupported task: {args.tasks}")
         return
 
-    logger.info(f"Starting {args.task} task.")
+    task_name = ",".join(args.tasks)
+    logger.info(f"Starting {task_name} task.")
+    event_log = None
+    if args.events:
+        # Progress events, one JSON line each, for tools following the run
+        from scripts.events import subscribe
+        from scripts.result_writer import JsonlWriter
+        event_log = JsonlWriter(args.events)
+        subscribe(event_log.write)
+    tracer = None
+    if args.trace:
+        from scripts.tracing import TraceRecorder
+        tracer = TraceRecorder().start()
+    profile = contextlib.nullcontext()
+    if args.profile:
+        from scripts.tracing import profiled
+        profile = profiled(args.profile)
     try:
-        task_module.main()
-        logger.info(f"{args.task.capitalize()} task finished.")
+        with profile:
+            if len(args.tasks) > 1:
+                # One login per device for every selected task
+                importlib.import_module("scripts.multi_task_manager").main(
+                    args.tasks, engine=args.engine, run_id=args.resume, retry_failed=args.retry_failed,
+                    device_names=args.devices,
+                )
+            else:
+                importlib.import_module(task_map[args.tasks[0]]).main(
+                    engine=args.engine, run_id=args.resume, retry_failed=args.retry_failed,
+                    device_names=args.devices,
+                )
+        logger.info(f"{task_name.capitalize()} task finished.")
     except Exception as exc:
-        logger.exception(f"{args.task.capitalize()} task failed: {exc}")
+        logger.exception(f"{task_name.capitalize()} task failed: {exc}")
+    finally:
+        # Only tasks that opened SSH sessions have loaded the pool
+        if "scripts.session_pool" in sys.modules:
+            sys.modules["scripts.session_pool"].close_session_pool()
+        if event_log is not None:
+            event_log.close()
+        if tracer is not None:
+            tracer.stop()
+            tracer.write(args.trace)
+            logger.info(f"Trace written to {args.trace} (open it in https://ui.perfetto.dev)")
 
 if __name__ == "__main__":
     main()
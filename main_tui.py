@@ -1,34 +1,49 @@
 import questionary
 import sys
-from scripts import config_manager, backup_manager, inventory_manager, firmware_manager
+from scripts.checkpoint import result_device, result_status
+from scripts.constants import PROGRESS_REFRESH_SECONDS
+from scripts.daemon import follow_job, open_job_queue
+
+ACTIONS = {
+    "Configuration Deployment": ("config", "Running configuration deployment..."),
+    "Backup Devices": ("backup", "Running backup..."),
+    "Inventory Collection": ("inventory", "Running inventory collection..."),
+    "Firmware Upgrade": ("firmware", "Running firmware upgrade..."),
+}
+
+def run_task(jobs, task):
+    """Submit a task and print each device result until the job ends; Ctrl-C cancels it."""
+    job = jobs.submit([task])
+    printed = 0
+    while not job.done:
+        try:
+            for job, results in follow_job(jobs, job, PROGRESS_REFRESH_SECONDS, start=printed):
+                for result in results:
+                    print(f"{result_device(result)}: {result_status(result)}")
+                    printed += 1
+        except KeyboardInterrupt:
+            print("Cancelling: running devices stop at their next step...")
+            job = jobs.cancel(job.id)
+    if job.state == "failed":
+        print(f"Task failed: {job.error}")
+    else:
+        print(f"Task {job.state}.")
 
 def main_menu():
+    jobs = open_job_queue(max_jobs=1)
     while True:
         action = questionary.select(
             "Choose a task to perform:",
-            choices=[
-                "Configuration Deployment",
-                "Backup Devices",
-                "Inventory Collection",
-                "Firmware Upgrade",
-                "Exit"
-            ]
+            choices=list(ACTIONS) + ["Exit"]
         ).ask()
 
-        if action == "Configuration Deployment":
-            print("Running configuration deployment...")
-            config_manager.main()
-        elif action == "Backup Devices":
-            print("Running backup...")
-            backup_manager.main()
-        elif action == "Inventory Collection":
-            print("Running inventory collection...")
-            inventory_manager.main()
-        elif action == "Firmware Upgrade":
-            print("Firmware upgrade not implemented yet.")
-            # firmware_manager.main()
+        if action in ACTIONS:
+            task, message = ACTIONS[action]
+            print(message)
+            run_task(jobs, task)
         elif action == "Exit":
             print("Exiting...")
+            jobs.shutdown()
             sys.exit(0)
         else:
             print("Unknown action!")
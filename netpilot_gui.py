@@ -9,7 +9,6 @@ import io
 import os
 import pandas as pd
 
-from scripts import config_manager, backup_manager, inventory_manager, firmware_manager
 from scripts.constants import (
     DEVICES_FILE_PATH, 
     BACKUP_FOLDER_PATH, 
@@ -27,13 +26,26 @@ from scripts.constants import (
     INVENTORY_RESULT_FILE_PATH,
     FIRMWARE_RESULT_FILE_PATH,
     STATUS_FILE_PATH,
+    PROGRESS_REFRESH_SECONDS,
 )
-from utils.logger_utils import setup_logger, parse_log
-from utils.network_utils import validate_ip, is_reachable, write_device_status_yaml
-from scripts.config_parser import load_yaml
+from utils.logger_utils import parse_log
+from utils.network_utils import (
+    validate_ip,
+    is_reachable,
+    probe_reachability,
+    build_device_status,
+    write_device_status_yaml,
+)
+from scripts.config_parser import load_yaml, register_error_reporter
+from scripts.result_writer import live_partial_paths, load_results
+from scripts.checkpoint import result_device
+from scripts.daemon import open_job_queue
 
 st.set_page_config(page_title="Netpilot Automation Suite", layout="centered")
 
+# Show config file errors in the page
+register_error_reporter(st.error)
+
 # Sidebar page selector
 page = st.sidebar.selectbox(
     "Select Page",
@@ -104,16 +116,52 @@ def show_error_log():
     else:
         st.warning("Error log file not found.")
 
-def show_task_progress(devices):
-    st.info("Task started...")
+@st.cache_resource
+def get_job_queue():
+    """
+    Job queue of the GUI: the NetPilot daemon's when one runs at start,
+    else a background queue in this process. Cached as a resource, it
+    outlives reruns and page changes, so a running task keeps going and its
+    progress can be shown again later.
+    """
+    return open_job_queue(max_jobs=1)
+
 
-    progress_bar = st.progress(0)
-    status_placeholder = st.empty()
+def show_job_progress(job, devices):
+    """Show completed, in-flight and failed counts, ETA and per-device status of a job."""
+    summary = job.summary()
+    completed = summary["completed"]
+    total = max(len(devices), completed)
+    failed = sum(count for status, count in summary["statuses"].items() if status != "SUCCESS")
+    in_flight = summary["in_flight"]
 
-    for i, device in enumerate(devices):
-        status_placeholder.write(f"Progress: {device.get('name')}")
-        time.sleep(1)
-        progress_bar.progress((i + 1) / len(devices))
+    eta = "-"
+    if job.done:
+        eta = "done"
+    elif completed and total > completed:
+        eta = f"{summary['elapsed'] / completed * (total - completed):.0f}s"
+
+    st.progress(completed / total if total else 1.0, text=f"{completed}/{total} device(s), {summary['state']}")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Completed", completed)
+    col2.metric("In flight", len(in_flight))
+    col3.metric("Failed", failed)
+    col4.metric("ETA", eta)
+
+    statuses = {result_device(result): result.get("status", "") for result in job.results}
+    rows = []
+    for device in devices:
+        name = device.get("name")
+        if name in statuses:
+            status = statuses[name]
+            status = ("🟢 " if status == "SUCCESS" else "🔴 ") + status
+        elif name in in_flight:
+            status = f"🔵 RUNNING ({in_flight[name] or 'starting'})"
+        else:
+            status = "⚪ PENDING"
+        rows.append({"Device": name, "IP": device.get("host"), "Status": status})
+    with st.expander("Device status", expanded=not job.done):
+        st.dataframe(rows, use_container_width=True, hide_index=True)
 
 
 def show_task_results_table(task_result_path, task_type="config"):
@@ -123,12 +171,18 @@ def show_task_results_table(task_result_path, task_type="config"):
     :param task_type: For labeling.
     """
     try:
-        with open(task_result_path, "r") as f:
-            results = yaml.safe_load(f)
+        # Partial results while a run is still writing them
+        results = load_results(task_result_path)
+    except FileNotFoundError:
+        results = []
     except Exception as e:
         st.warning(f"Could not read {task_type} results: {e}")
         return
+    show_results_table(results, task_type)
 
+
+def show_results_table(results, task_type="config"):
+    """Show a list of result dicts in a colored table."""
     if not results:
         st.info(f"No results found for {task_type} task.")
         return
@@ -208,47 +262,28 @@ def show_device_status_content():
     st.write("### Device Status")
     try:
         status_content = load_yaml(STATUS_FILE_PATH)
-        if not status_content.strip():
-            st.info("No device status information found.")
-            return
     except Exception as e:
         st.warning(f"Could not read status file: {e}")
         return
 
-    device_status = []
-    error_messages = []
-    for line in status_content.strip().splitlines():
-        # Log format: "2025-06-21 11:56:26,825 ERROR [backup_manager]: Device not reachable for device cisco-sw-001: 10.10.10.11"
-        try:
-            # Split time and rest
-            result = parse_log(line)
-            # Device and error part
-            hostname = result.get("name")
-            ip_address = result.get("ip")
-            vendor = result.get("vendor")
-            status = result.get("status")
-            last_seen = result.get("last_seen")
-
-            device_status.append({
-                "name": hostname.strip(),
-                "hostname": hostname.strip(),
-                "Vendor": vendor.strip(),
-                "Device": ip_address,
-                "Status": status.strip(),
-                "Last Seen": last_seen.strip()
-            })
-        except Exception:
-            # if line is not in expected format, skip it
-            continue
-
-    # Pandas DataFrame for better display
-    if not error_messages:
-        st.info("No valid error messages found.")
+    if not status_content:
+        st.info("No device status information found.")
         return
 
-    df = pd.DataFrame(error_messages)
-    # for better readability, reverse the order
-    df = df.iloc[::-1]
+    device_status = []
+    for item in status_content:
+        status = item.get("status", "UNKNOWN")
+        color = {"UP": "🟢", "DOWN": "🔴"}.get(status, "⚪")
+        device_status.append({
+            "Name": item.get("name"),
+            "IP": item.get("ip"),
+            "Vendor": item.get("vendor"),
+            "Status": f"{color} {status}",
+            "Latency (ms)": item.get("latency_ms"),
+            "Last Seen": item.get("last_seen"),
+        })
+
+    df = pd.DataFrame(device_status)
 
     # Streamlit dataframe with custom styling
     st.dataframe(
@@ -267,6 +302,22 @@ def log(message, level="info"):
     )
     log_panel.markdown("\n".join(st.session_state["log_lines"]), unsafe_allow_html=True)
 
+# Main page buttons -> (task, label, message when every device succeeded)
+TASK_BUTTONS = {
+    CONFIG_BUTTON: ("config", "Config", "Config completed successfully for all devices!"),
+    BACKUP_BUTTON: ("backup", "Backup", "Backup completed successfully for all devices!"),
+    INVENTORY_BUTTON: ("inventory", "Inventory", "Inventory collection completed successfully for all devices!"),
+    FIRMWARE_BUTTON: ("firmware", "Firmware Upgrade", "Firmware upgrade completed successfully for all devices!"),
+}
+
+# Result file of each task, shown when the GUI has no job of its own
+TASK_RESULT_FILES = {
+    "config": CONFIG_RESULT_FILE_PATH,
+    "backup": BACKUP_RESULT_FILE_PATH,
+    "inventory": INVENTORY_RESULT_FILE_PATH,
+    "firmware": FIRMWARE_RESULT_FILE_PATH,
+}
+
 # --- Main PAGE ---
 if page == "Main":
     st.title("Netpilot Automation Suite")
@@ -281,153 +332,76 @@ if page == "Main":
 
     if "log_lines" not in st.session_state:
         st.session_state["log_lines"] = []
+    log_panel.markdown("\n".join(st.session_state["log_lines"]), unsafe_allow_html=True)
 
     # --- BACKUP, INVENTORY, FIRMWARE UPGRADE TASKS ---
     st.markdown("### Automation Tasks")
 
+    # Tasks run in the background: this page only submits and polls them
+    job_queue = get_job_queue()
+    job = job_queue.get(st.session_state.get("job_id"))
+    running = job is not None and not job.done
+
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        if st.button(CONFIG_BUTTON):
+        if st.button(CONFIG_BUTTON, disabled=running):
             selected_button = CONFIG_BUTTON
 
     with col2:
-        if st.button(BACKUP_BUTTON):
+        if st.button(BACKUP_BUTTON, disabled=running):
             selected_button = BACKUP_BUTTON
 
     with col3:
-        if st.button(INVENTORY_BUTTON):
+        if st.button(INVENTORY_BUTTON, disabled=running):
             selected_button = INVENTORY_BUTTON
 
     with col4:
-        if st.button(FIRMWARE_BUTTON):
+        if st.button(FIRMWARE_BUTTON, disabled=running):
             selected_button = FIRMWARE_BUTTON
 
-    if selected_button == CONFIG_BUTTON:
-        st.session_state["log_lines"] = []
-        show_task_progress(devices_list)
-        try:
-            logger = setup_logger("config_manager")
-            logger.info("Config task started")
-
-            config_manager.main()
-            show_task_results_table(CONFIG_RESULT_FILE_PATH, task_type="config")
-
-            logger.info("Config task completed")
-            # After running, check if any device had a failure and inform user accordingly
-            if os.path.exists(CONFIG_RESULT_FILE_PATH):
-                with open(CONFIG_RESULT_FILE_PATH, 'r') as f:
-                    results = yaml.safe_load(f) or []
-
-                failed_devices = [r for r in results if r.get("status") == "FAILED"]
-                successful_devices = [r for r in results if r.get("status") == "SUCCESS"]
-                if failed_devices:
-                    log("Some devices failed! Please check the error log in the 'Show Error Log' section button/tab for details.", "error")
-                else:
-                    st.success("Config completed successfully for all devices!")
-                    log("Config completed successfully for all devices!", "success")
-            else:
-                st.success("Config completed, but no result file found.")
-        except Exception as e:
-            st.error(f"Config Error: {e}")
-            with st.expander("Show Error Log", expanded=True):
-                #show_error_log()
-                show_error_msg_table()
-
-    elif selected_button == BACKUP_BUTTON:
+    if selected_button is not None:
+        task, _, _ = TASK_BUTTONS[selected_button]
         st.session_state["log_lines"] = []
-        show_task_progress(devices_list)
-        try:
-            logger = setup_logger("backup_manager")
-            logger.info("Backup task started")
-
-            backup_manager.main()
-            show_task_results_table(BACKUP_RESULT_FILE_PATH, task_type="backup")
-            
-            logger.info("Backup task completed")
-            # After running, check if any device had a failure and inform user accordingly
-            if os.path.exists(BACKUP_RESULT_FILE_PATH):
-                with open(BACKUP_RESULT_FILE_PATH, 'r') as f:
-                    results = yaml.safe_load(f) or []
-
-                failed_devices = [r for r in results if r.get("status") == "FAILED"]
-                successful_devices = [r for r in results if r.get("status") == "SUCCESS"]
-                if failed_devices:
-                    log("Some devices failed! Please check the error log in the 'Show Error Log' section button/tab for details.", "error")
-                else:
-                    st.success("Backup completed successfully for all devices!")
-                    log("Backup completed successfully for all devices!", "success")
-            else:
-                st.success("Backup completed, but no result file found.")
-        except Exception as e:
-            st.error(f"Backup Error: {e}")
+        job = job_queue.submit([task])
+        st.session_state["job_id"] = job.id
+        st.session_state["job_reported"] = False
+
+    if job is not None:
+        task, label, success_message = next(v for v in TASK_BUTTONS.values() if v[0] == job.tasks[0])
+        st.markdown(f"### {label} Task")
+        show_job_progress(job, devices_list)
+        if not job.done:
+            if st.button("Cancel Task"):
+                job_queue.cancel(job.id)
+        elif job.state == "failed":
+            st.error(f"{label} Error: {job.error}")
             with st.expander("Show Error Log", expanded=True):
-                #show_error_log()
                 show_error_msg_table()
-
-    # --- INVENTORY COLLECTION TASK ---
-    elif selected_button == INVENTORY_BUTTON:
-        st.session_state["log_lines"] = []
-        show_task_progress(devices_list)
-        try:
-            logger = setup_logger("inventory_manager")
-            logger.info("Inventory task started")
-
-            inventory_manager.main()
-            show_task_results_table(INVENTORY_RESULT_FILE_PATH, task_type="inventory")
-
-            logger.info("Inventory task completed")
-            # After running, check if any device had a failure and inform user accordingly
-            if os.path.exists(INVENTORY_RESULT_FILE_PATH):
-                with open(INVENTORY_RESULT_FILE_PATH, 'r') as f:
-                    results = yaml.safe_load(f) or []
-
-                failed_devices = [r for r in results if r.get("status") == "FAILED"]
-                successful_devices = [r for r in results if r.get("status") == "SUCCESS"]
-                if failed_devices:
-                    log("Some devices failed! Please check the error log in the 'Show Error Log' section button/tab for details.", "error")
-                else:
-                    st.success("Inventory collection completed successfully for all devices!")
-                    log("Inventory collection completed successfully for all devices!", "success")
-            else:
-                st.success("Inventory collection completed, but no result file found.")
-        except Exception as e:
-            st.error(f"Inventory Error: {e}")
-            with st.expander("Show Error Log", expanded=True):
-                #show_error_log()
-                show_error_msg_table()
-
-    # --- FIRMWARE UPGRADE TASK ---
-    elif selected_button == FIRMWARE_BUTTON:
-        st.session_state["log_lines"] = []
-        show_task_progress(devices_list)
-        try:
-            logger = setup_logger("firmware_manager")
-            logger.info("Firmware task started")
-
-            show_task_results_table(FIRMWARE_RESULT_FILE_PATH, task_type="firmware")
-            firmware_manager.main()
-
-            logger.info("Firmware task completed")
-            # After running, check if any device had a failure and inform user accordingly
-            if os.path.exists(FIRMWARE_RESULT_FILE_PATH):
-                with open(FIRMWARE_RESULT_FILE_PATH, 'r') as f:
-                    results = yaml.safe_load(f) or []
-
-                failed_devices = [r for r in results if r.get("status") == "FAILED"]
-                successful_devices = [r for r in results if r.get("status") == "SUCCESS"]
+        else:
+            show_results_table(job.results, task_type=task)
+            failed_devices = [r for r in job.results if r.get("status") != "SUCCESS"]
+            if job.state == "cancelled":
+                st.warning(f"{label} task cancelled.")
+            elif not failed_devices:
+                st.success(success_message)
+            if not st.session_state.get("job_reported"):
+                # Report the outcome in the log panel once, not on every rerun
+                st.session_state["job_reported"] = True
                 if failed_devices:
                     log("Some devices failed! Please check the error log in the 'Show Error Log' section button/tab for details.", "error")
-                else:
-                    st.success("Firmware upgrade completed successfully for all devices!")
-                    log("Firmware upgrade completed successfully for all devices!", "success")
-            else:
-                st.success("Firmware upgrade completed, but no result file found.")
-        except Exception as e:
-            st.error(f"Firmware Upgrade Error: {e}")
-            with st.expander("Show Error Log", expanded=True):
-                #show_error_log()
-                show_error_msg_table()
+                elif job.state == "finished":
+                    log(success_message, "success")
+    else:
+        # No GUI job: show the last run of a task, or the one another
+        # process (CLI, scheduler) is running now
+        labels = {task: label for task, label, _ in TASK_BUTTONS.values()}
+        result_task = st.selectbox("Show results of", list(TASK_RESULT_FILES), format_func=labels.get)
+        result_path = TASK_RESULT_FILES[result_task]
+        file_run_live = bool(live_partial_paths(result_path))
+        if file_run_live:
+            st.info(f"{labels[result_task]} task running in another process, showing its results so far.")
+        show_task_results_table(result_path, task_type=result_task)
 
     st.markdown("---")
     # --- LOG PANEL ---
@@ -531,11 +505,21 @@ if page == "Main":
             except Exception as e:
                 st.error(f"Failed to save file: {e}")
 
-  
+
+    # Poll the running task: rerun the page until it ends
+    if (job is not None and not job.done) or (job is None and file_run_live):
+        time.sleep(PROGRESS_REFRESH_SECONDS)
+        st.rerun()
+
 # --- Show Backup Files PAGE ---
 elif page == "Device List":
     st.markdown("### Device List")
     st.subheader("Device List")
+    if st.button("Refresh Status"):
+        devices_list = load_yaml(DEVICES_FILE_PATH).get("devices", [])
+        # A refresh must probe again, not show the cached results
+        probe_reachability([d.get("host") for d in devices_list if validate_ip(d.get("host"))], use_cache=False)
+        write_device_status_yaml(build_device_status(devices_list))
     show_device_status_content()
 
 elif page == "Tasks":
@@ -2,20 +2,31 @@
 # -*- coding: utf-8 -*-
 # This file is part of the Network Automation Suite.
 
+import importlib
+
 VERSION = "1.0.2"
 
 def print_banner():
     print(f"Network Automation Suite v{VERSION}")
 
 
-from .config_manager import *
-from .backup_manager import *
-from .inventory_manager import *
-from .firmware_manager import *
+# Task modules are imported on first access, so a CLI run only pays for
+# the task it runs and never for the GUI stack.
+_TASK_MODULES = (
+    "config_manager",
+    "backup_manager",
+    "inventory_manager",
+    "firmware_manager",
+)
+
+def __getattr__(name):
+    if name in _TASK_MODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Sample imports for the modules that might be used in the scripts package.
 # from scripts import config_manager
 # from scripts import backup_manager
 # from scripts import inventory_manager
-# from scripts import firmware_manager
\ No newline at end of file
+# from scripts import firmware_manager
@@ -0,0 +1,129 @@
+# scripts/async_transport.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import asyncio
+import socket
+from contextlib import asynccontextmanager
+
+from netmiko import NetmikoAuthenticationException, NetmikoTimeoutException
+
+from scripts.constants import CREDENTIALS_FILE_PATH
+from scripts.concurrency import observe_connect_async
+from scripts.netmiko_utils import backup_commands, format_inventory, inventory_commands, write_backup_files
+from scripts.phases import phase, phase_timeout
+from utils.credentials_utils import load_credentials
+
+# Optional: only the asyncio engine needs it
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+# Task (and worker) function -> its coroutine form, for the asyncio engine
+_async_forms = {}
+
+
+def async_form(func):
+    """Register the decorated coroutine function as the asyncio engine form of func."""
+    def register(coroutine_func):
+        _async_forms[func] = coroutine_func
+        return coroutine_func
+    return register
+
+
+def get_async_form(func):
+    """Return the coroutine form of a task or worker function; ValueError when it has none."""
+    try:
+        return _async_forms[func]
+    except (KeyError, TypeError):
+        name = getattr(func, "__name__", repr(func))
+        raise ValueError(f"{name} cannot run on the asyncio engine, use the thread engine") from None
+
+
+def require_asyncssh():
+    """Raise ValueError when asyncssh, the transport of the asyncio engine, is not installed."""
+    if asyncssh is None:
+        raise ValueError("The asyncio engine needs asyncssh (pip install asyncssh)")
+
+
+async def _open_tcp(host, port=22):
+    """open_tcp() for coroutines: a connected non-blocking socket for asyncssh."""
+    loop = asyncio.get_running_loop()
+    try:
+        family, type_, proto, _, address = (await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM))[0]
+        sock = socket.socket(family, type_, proto)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, address), phase_timeout("connect"))
+        except BaseException:
+            sock.close()
+            raise
+    except (OSError, asyncio.TimeoutError) as e:
+        raise NetmikoTimeoutException(f"TCP connection to {host}:{port} failed: {e}") from e
+    return sock
+
+
+@asynccontextmanager
+async def async_device_session(device, device_type):
+    """
+    Yield an asyncssh connection to the device for the asyncio engine.
+
+    As open_session(), the TCP connect and the SSH handshake and login are
+    timed as the connect and auth phases. Logins go through the login rate
+    limit and report to the adaptive limiter like Netmiko logins; failures
+    are raised as the Netmiko exceptions the retry policy and results
+    already use. Commands run on SSH exec channels: the account must land
+    in privileged mode, there is no enable step. Connections are not pooled.
+    """
+    require_asyncssh()
+    username, password, _ = load_credentials(CREDENTIALS_FILE_PATH, device.get("name", device["host"]))
+    async with observe_connect_async():
+        with phase("connect"):
+            sock = await _open_tcp(device["host"])
+        try:
+            with phase("auth"):
+                try:
+                    conn = await asyncio.wait_for(
+                        asyncssh.connect(
+                            device["host"], sock=sock, username=username, password=password,
+                            known_hosts=None, login_timeout=phase_timeout("auth"),
+                        ),
+                        phase_timeout("auth"),
+                    )
+                except asyncssh.PermissionDenied as e:
+                    raise NetmikoAuthenticationException(f"Authentication to {device['host']} failed: {e}") from e
+                except (OSError, asyncssh.Error) as e:
+                    raise NetmikoTimeoutException(f"SSH connection to {device['host']} failed: {e}") from e
+        except BaseException:
+            sock.close()
+            raise
+    try:
+        yield conn
+    finally:
+        conn.close()
+        await conn.wait_closed()
+
+
+async def run_show_commands_async(conn, commands):
+    """run_show_commands() over an asyncssh connection: one exec channel per command."""
+    outputs = []
+    for cmd in commands:
+        with phase("command"):
+            result = await asyncio.wait_for(conn.run(cmd), phase_timeout("command"))
+        outputs.append((cmd, result.stdout or ""))
+    return outputs
+
+
+async def get_device_inventory_async(device, device_type):
+    """get_device_inventory() over asyncssh."""
+    commands = inventory_commands(device_type)
+    async with async_device_session(device, device_type) as conn:
+        return format_inventory(await run_show_commands_async(conn, commands))
+
+
+async def backup_device_config_async(device, device_type):
+    """backup_device_config() over asyncssh."""
+    commands = backup_commands(device_type)
+    async with async_device_session(device, device_type) as conn:
+        return write_backup_files(device, await run_show_commands_async(conn, commands))
@@ -3,9 +3,6 @@
 # This file is part of the Network Automation Suite.
 
 import os
-import yaml
-from filelock import FileLock
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from scripts.constants import (
     DEVICES_FILE_PATH,
@@ -16,17 +13,22 @@ from scripts.constants import (
 )
 
 from scripts.netmiko_utils import backup_device_config
+from scripts.async_transport import async_form, backup_device_config_async
 from scripts.worker import device_worker
+from scripts.engine import run_device_tasks
+from scripts.result_writer import ResultSink
+from scripts.checkpoint import RunCheckpoint
+from scripts.phases import mark_failed
 from scripts.config_parser import load_yaml
-from utils.network_utils import validate_devices, validate_ip, is_reachable
+from utils.network_utils import validate_devices, validate_ip, is_reachable, select_devices
 from utils.logger_utils import setup_logger
 
 # --- Logger Setup ---
 logger = setup_logger("backup_manager")
 
 
-def backup_task(device, device_type):
-    """Backup running and startup config from a single device."""
+def _prepare(device):
+    """Start the result of a device; returns (result, ready), not ready when the device cannot be reached."""
 
     logger.info(f"Starting backup for {device.get('name')}")
     result = {
@@ -41,29 +43,80 @@ def backup_task(device, device_type):
         msg = f"Invalid IP address: {ip}"
         result["output"] = msg
         logger.error(msg)
-        return result
+        return result, False
     
     if not is_reachable(ip):
         result["output"] = f"Device not reachable: {ip}"
         msg = f"Device not reachable for device {result['device']} | {ip}"
         logger.error(msg)
+        return result, False
+    return result, True
+
+
+def _succeeded(result, files, output):
+    result["status"] = "SUCCESS"
+    result["files"] = files
+    result["output"] = output
+    logger.info(f"Backup SUCCESS: {result['device']} ({result['host']}) Files: {files}")
+
+
+def _failed(result, exc):
+    mark_failed(result, exc)
+    msg = f"Backup {result['status']}: {result['device']} ({result['host']}): {exc}"
+    logger.error(msg)
+
+
+def backup_task(device, device_type):
+    """Backup running and startup config from a single device."""
+
+    result, ready = _prepare(device)
+    if not ready:
         return result
 
     try:
-        files, output = backup_device_config(device, device_type)
-        result["status"] = "SUCCESS"
-        result["files"] = files
-        result["output"] = output
-        logger.info(f"Backup SUCCESS: {result['device']} ({ip}) Files: {files}")
+        _succeeded(result, *backup_device_config(device, device_type))
     except Exception as e:
-        result["output"] = str(e)
-        msg = f"Backup FAILED: {result['device']} ({ip}): {e}"
-        logger.error(msg)
+        _failed(result, e)
+
+    return result
+
+
+@async_form(backup_task)
+async def backup_task_async(device, device_type):
+    """backup_task on the asyncio engine, over asyncssh."""
+
+    result, ready = _prepare(device)
+    if not ready:
+        return result
+
+    try:
+        _succeeded(result, *await backup_device_config_async(device, device_type))
+    except Exception as e:
+        _failed(result, e)
 
     return result
 
 
-def main():
+def build_jobs(devices):
+    """Return (task_func, device, args) jobs for the backup task."""
+
+    jobs = []
+    for device in devices:
+        group = device.get("group")
+        device_type = GROUP_TO_DEVICE_TYPE.get(group)
+        if not device_type:
+            logger.error(f"Unknown group '{group}' for device {device['name']}")
+            continue
+        jobs.append((backup_task, device, (device_type,)))
+    return jobs
+
+
+def open_result_sink():
+    """Return a sink streaming backup results to BACKUP_RESULT_FILE_PATH."""
+    return ResultSink(BACKUP_RESULT_FILE_PATH)
+
+
+def main(engine=None, run_id=None, retry_failed=False, device_names=None, on_result=None):
     """Main function to handle backup tasks."""
 
     config = load_yaml(CONFIG_FILE_PATH)
@@ -72,6 +125,7 @@ def main():
 
     devices_yaml = load_yaml(DEVICES_FILE_PATH)
     devices = devices_yaml.get("devices", [])
+    devices = select_devices(devices, device_names, logger)
 
     devices = validate_devices(devices, logger)
     if not devices:
@@ -80,31 +134,24 @@ def main():
 
     os.makedirs(BACKUP_FOLDER_PATH, exist_ok=True)
 
-    results = []
-    with ThreadPoolExecutor(max_workers=num_threads) as executor:
-        futures = []
-        for device in devices:
-            group = device.get("group")
-            device_type = GROUP_TO_DEVICE_TYPE.get(group)
-            if not device_type:
-                logger.error(f"Unknown group '{group}' for device {device['name']}")
-                continue
-            futures.append(executor.submit(backup_task, device, device_type))
-        
-        for future in as_completed(futures):
-            results.append(future.result())
-
-    # Write results as YAML
-    output_file = BACKUP_RESULT_FILE_PATH
-    lock_file = f"{output_file}.lock"
-    lock = FileLock(lock_file)
-    with lock:
-        with open(output_file, "w") as f:
-            yaml.dump(results, f, default_flow_style=False, allow_unicode=True)
-        logger.info(f"Backup results written to {output_file}")
-
-    if os.path.exists(lock_file):
-        os.remove(lock_file)
+    # A run_id resumes that run: devices it already finished are skipped
+    checkpoint = RunCheckpoint(["backup"], run_id)
+    devices, kept = checkpoint.pending(devices, retry_failed)
+
+    sink = open_result_sink()
+    for result in kept:
+        sink.write(result)
+    try:
+        run_device_tasks(
+            build_jobs(devices), num_threads, engine=engine, worker=device_worker, task="backup",
+            on_result=checkpoint.recorder(sink.write, on_result),
+        )
+        checkpoint.complete()
+    finally:
+        # Also on Ctrl-C or a crash: keep every result that completed
+        sink.finalize()
+        checkpoint.close()
+        logger.info(f"Backup results written to {BACKUP_RESULT_FILE_PATH}")
         
 
 if __name__ == "__main__":
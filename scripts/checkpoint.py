@@ -0,0 +1,227 @@
+# scripts/checkpoint.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+import yaml
+
+from scripts.constants import CONFIG_FILE_PATH, RUNS_FOLDER_PATH
+from scripts.config_parser import load_yaml
+from scripts.metrics import start_run_metrics
+from scripts.result_writer import JsonlWriter, iter_partial_results
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("checkpoint")
+
+JOURNAL_FILE = "journal.jsonl"
+RUN_FILE = "run.yaml"
+METRICS_FILE = "metrics.prom"
+
+# Phases of TIMEOUT results for devices stopped before their task started
+NOT_STARTED_PHASES = ("queued", "lease")
+
+
+def new_run_id():
+    """Return a sortable, unique run ID such as 20250101-120000-1a2b3c."""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def run_folder(run_id):
+    return os.path.join(RUNS_FOLDER_PATH, run_id)
+
+
+def load_run(run_id):
+    """Return the metadata of a run (run_id, tasks, status, started, updated)."""
+    path = os.path.join(run_folder(run_id), RUN_FILE)
+    if not os.path.exists(path):
+        raise ValueError(f"Unknown run ID: {run_id}")
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def result_device(result):
+    """Device name of a task result, or of a {task: result} pipeline result."""
+    if "device" in result:
+        return result["device"]
+    return next(iter(result.values()))["device"]
+
+
+def never_started(result):
+    """True for the TIMEOUT result of a device the run stopped before its task started."""
+    return result.get("status") == "TIMEOUT" and result.get("phase") in NOT_STARTED_PHASES
+
+
+def result_status(result):
+    """SUCCESS only if the result (or every task of a pipeline result) succeeded."""
+    if "status" in result:
+        return result["status"]
+    statuses = {r.get("status") for r in result.values()}
+    return "SUCCESS" if statuses == {"SUCCESS"} else "FAILED"
+
+
+def prune_runs(keep, current=None):
+    """
+    Delete the folders of all but the keep most recent runs (run IDs sort
+    by start time). Runs still in progress and the current run are never
+    deleted. keep=0 keeps every run. Returns the deleted run IDs.
+    """
+    if not keep or not os.path.isdir(RUNS_FOLDER_PATH):
+        return []
+    deleted = []
+    for run_id in sorted(os.listdir(RUNS_FOLDER_PATH), reverse=True)[keep:]:
+        if run_id == current:
+            continue
+        try:
+            status = load_run(run_id).get("status")
+        except (ValueError, yaml.YAMLError):
+            status = None
+        if status == "running":
+            continue
+        shutil.rmtree(run_folder(run_id), ignore_errors=True)
+        deleted.append(run_id)
+    if deleted:
+        logger.info(f"Deleted {len(deleted)} old run journal(s), keeping the last {keep}")
+    return deleted
+
+
+class RunCheckpoint:
+    """
+    Per-run checkpoint journal in output/runs/<run_id>/, next to the
+    run's metrics.prom (Prometheus text format) when metrics are enabled.
+
+    Every finished device is appended to journal.jsonl with its status and
+    result, so an interrupted run can be resumed with the same run ID:
+    devices already in the journal are skipped (or only the failed ones are
+    rescheduled) and their earlier results are merged into the final file.
+    Devices the run stopped before they started (deadline or cancel) are
+    not journaled, so a resume runs them. On close, the folders of runs
+    older than the last checkpoint.keep_runs are deleted.
+    """
+
+    def __init__(self, tasks, run_id=None):
+        self.tasks = list(tasks)
+        self.resumed = run_id is not None
+        self.run_id = run_id or new_run_id()
+        self.folder = run_folder(self.run_id)
+        self.journal_path = os.path.join(self.folder, JOURNAL_FILE)
+        self.finished = {}
+        # device -> tasks to run again of a pipeline record with failed tasks
+        self.retry_tasks = {}
+        # device -> {task: result} kept from that record, merged into the retry's record
+        self._kept_tasks = {}
+        self.unstarted = 0
+        self._completed = False
+
+        if self.resumed:
+            meta = load_run(self.run_id)
+            if meta.get("tasks") != self.tasks:
+                raise ValueError(
+                    f"Run {self.run_id} was started for {','.join(meta.get('tasks', []))}, "
+                    f"not {','.join(self.tasks)}"
+                )
+            self._started = meta.get("started")
+            if os.path.exists(self.journal_path):
+                # Later records of a device (e.g. a retry) replace earlier ones
+                for record in iter_partial_results(self.journal_path):
+                    self.finished[record["device"]] = record
+        else:
+            self._started = datetime.now().isoformat(timespec="seconds")
+
+        os.makedirs(self.folder, exist_ok=True)
+        self._write_meta("running")
+        self._journal = JsonlWriter(self.journal_path, "a")
+        # Phase timings and result counters of this run, see scripts/metrics.py
+        self.metrics = start_run_metrics("+".join(self.tasks))
+        logger.info(f"Run ID {self.run_id} (resume with: python main.py --resume {self.run_id})")
+
+    def _write_meta(self, status):
+        meta = {
+            "run_id": self.run_id,
+            "tasks": self.tasks,
+            "status": status,
+            "started": self._started,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+        path = os.path.join(self.folder, RUN_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            yaml.safe_dump(meta, f, default_flow_style=False)
+        os.replace(f"{path}.tmp", path)
+
+    def pending(self, devices, retry_failed=False):
+        """
+        Split devices into (devices to run, earlier results to keep).
+        Devices without a journal record always run; with retry_failed,
+        devices whose recorded status is not SUCCESS run again too. For a
+        pipeline ({task: result}) record only the tasks that did not
+        succeed run again (see retry_tasks); the others are kept.
+        """
+        to_run, kept = [], []
+        for device in devices:
+            record = self.finished.get(device.get("name"))
+            if record is None:
+                to_run.append(device)
+            elif not retry_failed or record["status"] == "SUCCESS":
+                kept.append(record["result"])
+            elif "status" in record["result"]:
+                to_run.append(device)
+            else:
+                results = record["result"]
+                succeeded = {task: r for task, r in results.items() if r.get("status") == "SUCCESS"}
+                self.retry_tasks[device.get("name")] = [task for task in self.tasks if task not in succeeded]
+                if succeeded:
+                    self._kept_tasks[device.get("name")] = succeeded
+                    kept.append(succeeded)
+                to_run.append(device)
+        if self.resumed:
+            logger.info(f"Resuming run {self.run_id}: {len(kept)} device(s) done, {len(to_run)} to run")
+        return to_run, kept
+
+    def record(self, result):
+        """Append a finished device to the journal; devices that never started are left out."""
+        if never_started(result):
+            self.unstarted += 1
+            return
+        device = result_device(result)
+        kept = self._kept_tasks.get(device)
+        if kept is not None and "status" not in result:
+            # A retry of the failed tasks: journal the whole device again
+            merged = {**kept, **result}
+            result = {task: merged[task] for task in self.tasks if task in merged}
+        self._journal.write({
+            "device": device,
+            "status": result_status(result),
+            "result": result,
+        })
+
+    def recorder(self, *callbacks):
+        """Return an on_result callback journaling every result, then passing it to each callback given."""
+        callbacks = [callback for callback in callbacks if callback is not None]
+
+        def record_and_forward(result):
+            self.record(result)
+            for callback in callbacks:
+                callback(result)
+        return record_and_forward
+
+    def complete(self):
+        """Mark the run as finished; call once every device has run."""
+        self._completed = True
+
+    def close(self):
+        """Close the journal and record whether the run finished or was interrupted."""
+        self._journal.close()
+        if self.unstarted:
+            logger.warning(
+                f"{self.unstarted} device(s) not started, run them with: python main.py --resume {self.run_id}"
+            )
+        self._write_meta("finished" if self._completed and not self.unstarted else "interrupted")
+        config = load_yaml(CONFIG_FILE_PATH) or {}
+        prune_runs(config.get("checkpoint", {}).get("keep_runs", 50), current=self.run_id)
+        if self.metrics is not None:
+            self.metrics.stop()
+            self.metrics.write(os.path.join(self.folder, METRICS_FILE))
+            self.metrics = None
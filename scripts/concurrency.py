@@ -0,0 +1,271 @@
+# scripts/concurrency.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from filelock import FileLock
+from netmiko import NetmikoAuthenticationException, NetmikoTimeoutException
+
+from scripts.constants import CONFIG_FILE_PATH, LOGIN_RATE_FILE_PATH
+from scripts.config_parser import load_yaml
+from scripts.phases import TaskTimeout
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("concurrency")
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on the number of devices in flight.
+
+    Every SSH login reports its connect latency or failure. After `limit`
+    consecutive fast logins the limit grows by one (additive increase); a
+    slow login, an authentication failure or a timeout cuts it by
+    decrease_factor (multiplicative decrease), at most once per cooldown
+    seconds so one burst of failures counts as a single congestion signal.
+    """
+
+    def __init__(self, initial, min_limit=1, max_limit=50, target_latency=5.0,
+                 decrease_factor=0.5, cooldown=10.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = min(max(initial, self.min_limit), self.max_limit)
+        self._successes = 0
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        return self._limit
+
+    def on_connect(self, latency):
+        """Record a successful login that took latency seconds."""
+        if latency > self.target_latency:
+            self._decrease(f"connect latency {latency:.1f}s above {self.target_latency:.1f}s")
+            return
+        with self._lock:
+            self._successes += 1
+            if self._successes < self._limit or self._limit >= self.max_limit:
+                return
+            self._successes = 0
+            old, self._limit = self._limit, self._limit + 1
+        logger.info(f"Concurrency raised {old} -> {self._limit} (connect latency {latency:.1f}s)")
+
+    def on_error(self, reason):
+        """Record a failed login (authentication failure or timeout)."""
+        self._decrease(reason)
+
+    def _decrease(self, reason):
+        with self._lock:
+            self._successes = 0
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown or self._limit <= self.min_limit:
+                return
+            self._last_decrease = now
+            old = self._limit
+            self._limit = max(self.min_limit, int(self._limit * self.decrease_factor))
+        logger.warning(f"Concurrency lowered {old} -> {self._limit} ({reason})")
+
+
+class TokenBucket:
+    """
+    Token bucket allowing rate operations per second on average and bursts
+    of up to burst at once. acquire() blocks until a token is available,
+    acquire_async() waits for it without blocking the event loop.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take one token if there is one; returns 0, else the seconds until the next token."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Take one token, waiting as long as needed; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self):
+        """acquire() for coroutines."""
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket shared by every NetPilot process on the host (GUI, TUIs,
+    CLI, daemon, local workers): the tokens live in a JSON file guarded by
+    a file lock, next to the device leases, and refill by wall-clock time.
+    """
+
+    def __init__(self, rate, burst=None, path=LOGIN_RATE_FILE_PATH):
+        super().__init__(rate, burst)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file_lock = FileLock(f"{path}.lock")
+
+    def _read(self, now):
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            return float(state["tokens"]), float(state["updated"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return float(self.burst), now
+
+    def _take(self):
+        with self._lock, self._file_lock:
+            now = time.time()
+            tokens, updated = self._read(now)
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            delay = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                delay = (1 - tokens) / self.rate
+            with open(f"{self.path}.tmp", "w") as f:
+                json.dump({"tokens": tokens, "updated": now}, f)
+            os.replace(f"{self.path}.tmp", self.path)
+            return delay
+
+
+def get_limiter(num_threads):
+    """
+    Return an AdaptiveLimiter starting at num_threads, configured from the
+    adaptive_concurrency section of config.yaml, or None when it is disabled.
+    Without max_threads the limit never grows above num_threads.
+    """
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("adaptive_concurrency", {})
+    if not params.get("enabled", False):
+        return None
+    return AdaptiveLimiter(
+        num_threads,
+        min_limit=params.get("min_threads", 1),
+        max_limit=params.get("max_threads", num_threads),
+        target_latency=params.get("target_connect_latency", 5.0),
+        decrease_factor=params.get("decrease_factor", 0.5),
+        cooldown=params.get("cooldown", 10.0),
+    )
+
+
+# Limiter of the run in progress; logins report to it
+_active = None
+
+# Host-wide rate of new SSH logins, shared by every run and process
+_login_bucket = None
+_login_bucket_lock = threading.Lock()
+
+
+def get_login_bucket():
+    """
+    Return the host-wide login SharedTokenBucket configured by
+    scheduling.login_rate (new logins per second, all devices and NetPilot
+    processes on this host) and scheduling.login_burst, or None when
+    login_rate is 0 or unset.
+    """
+    global _login_bucket
+    with _login_bucket_lock:
+        if _login_bucket is None:
+            config = load_yaml(CONFIG_FILE_PATH) or {}
+            params = config.get("scheduling", {})
+            rate = params.get("login_rate", 0)
+            if not rate:
+                return None
+            _login_bucket = SharedTokenBucket(rate, params.get("login_burst"))
+        return _login_bucket
+
+
+@contextmanager
+def active_limiter(limiter):
+    """Route connect reports from observe_connect() to limiter inside the block."""
+    global _active
+    previous, _active = _active, limiter
+    try:
+        yield limiter
+    finally:
+        _active = previous
+
+
+@contextmanager
+def _report_login():
+    """
+    Time the login of the block and report its latency or failure to the
+    active limiter: authentication failures, and timeouts raised by Netmiko
+    or by the phases of the block (not a cancelled run).
+    """
+    limiter = _active
+    start = time.monotonic()
+    try:
+        yield
+    except NetmikoAuthenticationException:
+        if limiter is not None:
+            limiter.on_error("authentication failure")
+        raise
+    except NetmikoTimeoutException:
+        if limiter is not None:
+            limiter.on_error("connect timeout")
+        raise
+    except TaskTimeout as e:
+        if limiter is not None and e.__cause__ is not None:
+            limiter.on_error(f"{e.phase} timeout")
+        raise
+    if limiter is not None:
+        limiter.on_connect(time.monotonic() - start)
+
+
+@contextmanager
+def observe_connect():
+    """
+    Wrap an SSH login: wait for the global login rate limit, then time the
+    login and report its latency or failure to the active limiter.
+    """
+    bucket = get_login_bucket()
+    if bucket is not None:
+        waited = bucket.acquire()
+        if waited:
+            logger.debug(f"Login delayed {waited:.2f}s by the login rate limit")
+    with _report_login():
+        yield
+
+
+@asynccontextmanager
+async def observe_connect_async():
+    """observe_connect() for coroutine logins (asyncio engine); failures must be Netmiko exceptions."""
+    bucket = get_login_bucket()
+    if bucket is not None:
+        waited = await bucket.acquire_async()
+        if waited:
+            logger.debug(f"Login delayed {waited:.2f}s by the login rate limit")
+    with _report_login():
+        yield
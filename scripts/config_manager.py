@@ -2,11 +2,6 @@
 # -*- coding: utf-8 -*-
 # This file is part of the Network Automation Suite.
 
-import yaml
-import os
-from filelock import FileLock
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
 from scripts.constants import (
     CONFIG_FILE_PATH,
     DEVICES_FILE_PATH,
@@ -16,8 +11,12 @@ from scripts.constants import (
 )
 from scripts.netmiko_utils import push_config_to_device
 from scripts.worker import device_worker
-from scripts.config_parser import load_yaml
-from utils.network_utils import validate_devices, validate_ip, is_reachable
+from scripts.engine import run_device_tasks
+from scripts.result_writer import ResultSink
+from scripts.checkpoint import RunCheckpoint
+from scripts.phases import mark_failed
+from scripts.config_parser import load_yaml, load_command_file
+from utils.network_utils import validate_devices, validate_ip, is_reachable, select_devices
 from utils.logger_utils import setup_logger
 
 # --- Logger Setup ---
@@ -34,9 +33,7 @@ def get_config_commands(device_type):
 
 def load_commands(file_path):
     """Load config commands from a file."""
-    with open(file_path, "r") as f:
-        commands = [line.strip() for line in f if line.strip() and not line.startswith("!")]
-    return commands
+    return list(load_command_file(file_path))
 
 
 def run_config_task(device, commands, device_type):
@@ -68,13 +65,40 @@ def run_config_task(device, commands, device_type):
         logger.info(f"Config push SUCCESS: {result['device']} ({ip})")
         logger.info(f"Device output:\n{output}")
     except Exception as e:
-        result["output"] = str(e)
-        logger.error(f"Config push FAILED: {result['device']} ({ip}): {e}")
+        mark_failed(result, e)
+        logger.error(f"Config push {result['status']}: {result['device']} ({ip}): {e}")
 
     return result
 
 
-def main():
+def build_jobs(devices):
+    """Return (task_func, device, args) jobs for the config task."""
+
+    jobs = []
+    for device in devices:
+        group = device.get("group")
+        device_type = GROUP_TO_DEVICE_TYPE.get(group)
+        if not device_type:
+            logger.error(f"Unknown group '{group}' for device {device['name']}")
+            continue
+
+        try:
+            commands_file = get_config_commands(device_type)
+            commands = load_commands(commands_file)
+        except Exception as e:
+            logger.error(f"Command file loading failed for {device['name']}: {e}")
+            continue
+
+        jobs.append((run_config_task, device, (commands, device_type)))
+    return jobs
+
+
+def open_result_sink():
+    """Return a sink streaming config deployment results to CONFIG_RESULT_FILE_PATH."""
+    return ResultSink(CONFIG_RESULT_FILE_PATH)
+
+
+def main(engine=None, run_id=None, retry_failed=False, device_names=None, on_result=None):
     """Main function to load config, devices, and run tasks in parallel."""
     
     config = load_yaml(CONFIG_FILE_PATH)
@@ -83,6 +107,7 @@ def main():
     
     devices_yaml = load_yaml(DEVICES_FILE_PATH)
     devices = devices_yaml.get("devices", [])
+    devices = select_devices(devices, device_names, logger)
 
     devices = validate_devices(devices, logger)
 
@@ -90,39 +115,24 @@ def main():
         logger.error("No valid devices found. Exiting.")
         return
 
-    results = []
-    with ThreadPoolExecutor(max_workers=num_threads) as executor:
-        futures = []
-        for device in devices:
-            group = device.get("group")
-            device_type = GROUP_TO_DEVICE_TYPE.get(group)
-            if not device_type:
-                logger.error(f"Unknown group '{group}' for device {device['name']}")
-                continue
-
-            try:
-                commands_file = get_config_commands(device_type)
-                commands = load_commands(commands_file)
-            except Exception as e:
-                logger.error(f"Command file loading failed for {device['name']}: {e}")
-                continue
-            
-            future = executor.submit(device_worker, run_config_task, device, commands, device_type)
-            futures.append(future)
-        
-        for future in as_completed(futures):
-            results.append(future.result())
-
-    output_file = CONFIG_RESULT_FILE_PATH
-    lock_file = f"{output_file}.lock"
-    lock = FileLock(lock_file)
-    with lock:
-        with open(output_file, "w") as f:
-            yaml.dump(results, f, default_flow_style=False, allow_unicode=True)
-        logger.info(f"Config deployment results written to {output_file}")
-
-    if os.path.exists(lock_file):
-        os.remove(lock_file)
+    # A run_id resumes that run: devices it already finished are skipped
+    checkpoint = RunCheckpoint(["config"], run_id)
+    devices, kept = checkpoint.pending(devices, retry_failed)
+
+    sink = open_result_sink()
+    for result in kept:
+        sink.write(result)
+    try:
+        run_device_tasks(
+            build_jobs(devices), num_threads, engine=engine, worker=device_worker, task="config",
+            on_result=checkpoint.recorder(sink.write, on_result),
+        )
+        checkpoint.complete()
+    finally:
+        # Also on Ctrl-C or a crash: keep every result that completed
+        sink.finalize()
+        checkpoint.close()
+        logger.info(f"Config deployment results written to {CONFIG_RESULT_FILE_PATH}")
 
 # Ensure the script can be run as a standalone module
 if __name__ == "__main__":
@@ -1,30 +1,128 @@
 # scripts/config_parser.py
 
+import os
+import threading
 import yaml
-import streamlit as st
 from utils.exceptions import ConfigFileError
 from utils.logger_utils import setup_logger
 
+# Use the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 logger = setup_logger("config_parser")
 
+# Callables notified of config file errors, e.g. st.error registered by the GUI
+_error_reporters = []
+
+# file_path -> ((mtime_ns, size), parsed object)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def register_error_reporter(reporter):
+    """
+    Register a callable(message) that shows config file errors to the user.
+    Front-ends register their own (the Streamlit GUI registers st.error),
+    so this module never imports a UI toolkit.
+    """
+    if reporter not in _error_reporters:
+        _error_reporters.append(reporter)
+
+
+def _report_error(message):
+    """Log a config file error and forward it to the registered reporters."""
+    logger.error(message)
+    for reporter in list(_error_reporters):
+        try:
+            reporter(message)
+        except Exception as e:
+            logger.debug(f"Error reporter {reporter!r} failed: {e}")
+
+
+class FrozenDict(dict):
+    """Read-only dict returned by the cached loaders."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached config objects are read-only, use thaw() for a mutable copy")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(obj):
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(obj, dict):
+        return FrozenDict((key, freeze(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(item) for item in obj)
+    return obj
+
+
+def thaw(obj):
+    """Return a plain, mutable copy (dicts and lists) of a frozen object."""
+    if isinstance(obj, dict):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(item) for item in obj]
+    return obj
+
+
+def _cached(file_path, parse):
+    """
+    Return parse(file) for file_path, re-parsing only when the file's
+    mtime or size has changed since the last call.
+    """
+    stat = os.stat(file_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        entry = _cache.get(file_path)
+    if entry and entry[0] == stamp:
+        return entry[1]
+
+    with open(file_path, "r") as f:
+        parsed = freeze(parse(f))
+    with _cache_lock:
+        _cache[file_path] = (stamp, parsed)
+    return parsed
+
+
 def load_yaml(file_path):
     """
     Load and validate a YAML file.
+    Results are cached per path and returned read-only (see thaw()).
     Raises ConfigFileError on parse or file errors.
     """
     try:
-        with open(file_path, "r") as f:
-            return yaml.safe_load(f)
+        return _cached(file_path, lambda f: yaml.load(f, Loader=SafeLoader))
     except FileNotFoundError:
-        logger.error(f"YAML file not found: {file_path}")
-        st.error(f"YAML file not found: {file_path}")
+        _report_error(f"YAML file not found: {file_path}")
         raise ConfigFileError(f"YAML file not found: {file_path}")
     except yaml.YAMLError as e:
-        logger.error(f"YAML syntax error in {file_path}: {e}")
-        st.error(f"YAML syntax error in {file_path}: {e}")
+        _report_error(f"YAML syntax error in {file_path}: {e}")
         raise ConfigFileError(f"YAML syntax error in {file_path}: {e}")
     except Exception as e:
-        logger.error(f"Could not open YAML file {file_path}: {e}")
-        st.error(f"Could not open YAML file {file_path}: {e}")
+        _report_error(f"Could not open YAML file {file_path}: {e}")
         raise ConfigFileError(f"Could not open YAML file {file_path}: {e}")
 
+
+def _parse_commands(f):
+    commands = []
+    for line in f:
+        cmd = line.strip()
+        if cmd and not cmd.startswith("!"):
+            commands.append(cmd)
+    return commands
+
+
+def load_command_file(file_path):
+    """
+    Load commands from a .cfg file, ignoring empty lines and '!' comments.
+    Cached like load_yaml(); returns a tuple.
+    """
+    return _cached(file_path, _parse_commands)
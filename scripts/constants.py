@@ -84,6 +84,39 @@ FIRMWARE_RESULT_FILE_PATH = os.path.join(FIRMWARE_FOLDER, "firmware_results.yaml
 # Status file path
 STATUS_FILE_PATH = os.path.join(OUTPUT_FOLDER, "status", "status.yaml")
 
+# On-disk reachability cache (last probe result, latency and time per host)
+REACHABILITY_CACHE_PATH = os.path.join(OUTPUT_FOLDER, "status", "reachability.db")
+
+# Per-device, per-task run durations used for longest-first scheduling
+DURATION_HISTORY_PATH = os.path.join(OUTPUT_FOLDER, "status", "durations.db")
+
+# Consecutive failed runs per device and task for the circuit breaker
+CIRCUIT_BREAKER_PATH = os.path.join(OUTPUT_FOLDER, "status", "circuit_breaker.db")
+
+# Seconds a bulk reachability probe result is trusted by is_reachable()
+PROBE_RESULT_MAX_AGE = 60
+
+# Default per-phase timeouts in seconds (overridden by timeouts in config.yaml)
+DEFAULT_PHASE_TIMEOUTS = {
+    "connect": 10,       # TCP connect
+    "auth": 30,          # SSH handshake (banner, key exchange) and authentication
+    "enable": 10,        # enable mode
+    "command": 10,       # each command read
+    "save_config": 100,  # write memory / copy run start (Netmiko's own default: slow on some devices)
+}
+
+# Per-run checkpoint journals (output/runs/<run_id>/)
+RUNS_FOLDER_PATH = os.path.join(OUTPUT_FOLDER, "runs")
+
+# Host-wide device leases and session slots shared by all NetPilot processes
+LEASES_FOLDER_PATH = os.path.join(OUTPUT_FOLDER, "leases")
+
+# Login rate limit state shared by every NetPilot process on the host
+LOGIN_RATE_FILE_PATH = os.path.join(LEASES_FOLDER_PATH, "login-rate.json")
+
+# Token of the daemon API, readable only by the user running the daemon
+DAEMON_TOKEN_FILE_PATH = os.path.join(OUTPUT_FOLDER, "daemon", "token")
+
 # Log folder path
 LOG_FOLDER = "logs/"
 
@@ -108,6 +141,13 @@ SUPPORTED_DEVICE_TYPES = [
     "arista_eos",
 ]
 
+# Commands that only read device state and may be pipelined in one write
+READ_ONLY_COMMANDS = [
+    "show",
+    "dir",
+    "more",
+]
+
 # Supported tasks
 SUPPORTED_TASKS = [
     "config",
@@ -116,6 +156,22 @@ SUPPORTED_TASKS = [
     "firmware",
 ]
 
+# Order in which combined tasks run on a device (e.g. --task backup,config)
+PIPELINE_TASK_ORDER = [
+    "backup",
+    "inventory",
+    "config",
+    "firmware",
+]
+
+# Supported execution engines
+SUPPORTED_ENGINES = [
+    "thread",
+    "asyncio",
+    "pipeline",
+    "distributed",
+]
+
 
 CONFIG_BUTTON = "Run Config Task"
 BACKUP_BUTTON = "Run Backup Task"
@@ -124,5 +180,8 @@ FIRMWARE_BUTTON = "Run Firmware Task"
 CLEAR_LOGS_BUTTON = "Clear Log"
 SHOW_ERRORS_BUTTON = "Show Error Logs"
 
+# Seconds between two progress refreshes of a running GUI task
+PROGRESS_REFRESH_SECONDS = 1
+
 # Default device IP. Change this to the IP of your device. This is used for testing purposes.
 DEFAULT_DEVICE_IP = "172.20.20.101"
@@ -0,0 +1,512 @@
+# scripts/daemon.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import error, request
+from urllib.parse import parse_qs, urlsplit
+
+from scripts.constants import CONFIG_FILE_PATH, DAEMON_TOKEN_FILE_PATH, SUPPORTED_ENGINES, SUPPORTED_TASKS
+from scripts.config_parser import load_yaml
+from scripts.checkpoint import result_status
+from scripts.phases import CancelScope, cancel_scope
+from scripts.metrics import DEFAULT_BUCKETS, MetricsCollector
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("daemon")
+
+# Job states; the last three are final
+JOB_STATES = ("queued", "running", "finished", "failed", "cancelled")
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class Job:
+    """One submitted run of one or more tasks, and the results it produced so far."""
+
+    def __init__(self, tasks, device_names=None, engine=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.tasks = list(tasks)
+        self.device_names = list(device_names) if device_names is not None else None
+        self.engine = engine
+        self.state = "queued"
+        self.error = None
+        self.submitted = _now()
+        self.started = None
+        self.finished = None
+        self._start_time = None
+        self._end_time = None
+        self.results = []
+        self.scope = CancelScope()
+        self._changed = threading.Condition()
+
+    @property
+    def done(self):
+        return self.state in JOB_STATES[2:]
+
+    def add_result(self, result):
+        with self._changed:
+            self.results.append(result)
+            self._changed.notify_all()
+
+    def set_state(self, state, error=None):
+        with self._changed:
+            self.state = state
+            self.error = error
+            if state == "running":
+                self.started = _now()
+                self._start_time = time.monotonic()
+            elif self.done:
+                self.finished = _now()
+                self._end_time = time.monotonic()
+            self._changed.notify_all()
+
+    def wait_results(self, start, timeout=None):
+        """Return the results after index start, waiting for new ones while the job runs."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.results) > start or self.done, timeout)
+            return self.results[start:]
+
+    def elapsed(self):
+        """Seconds the job has been running (or ran), 0 while queued."""
+        if self._start_time is None:
+            return 0.0
+        return (self._end_time or time.monotonic()) - self._start_time
+
+    def summary(self):
+        statuses = Counter(result_status(result) for result in self.results)
+        return {
+            "id": self.id,
+            "tasks": self.tasks,
+            "devices": self.device_names,
+            "engine": self.engine,
+            "state": self.state,
+            "error": self.error,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "elapsed": round(self.elapsed(), 1),
+            "completed": len(self.results),
+            "statuses": dict(statuses),
+            # Devices running now, with their current phase
+            "in_flight": self.scope.in_flight() if self.state == "running" else {},
+        }
+
+
+class JobQueue:
+    """
+    Runs submitted jobs on max_jobs threads of this process, so every job
+    reuses the parsed YAML, credentials and warm session pool of the ones
+    before it. Host-wide leases still keep two jobs off the same device.
+    Only the keep_jobs most recent finished jobs are kept, results included.
+    """
+
+    def __init__(self, max_jobs=1, keep_jobs=20):
+        self.jobs = {}
+        self.keep_jobs = keep_jobs
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+
+    def get(self, job_id):
+        """Return a job by ID, or None if unknown or already dropped."""
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond keep_jobs."""
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.done]
+            for job_id in finished[:max(len(finished) - self.keep_jobs, 0)]:
+                del self.jobs[job_id]
+
+    def submit(self, tasks, device_names=None, engine=None):
+        unknown = [task for task in tasks if task not in SUPPORTED_TASKS]
+        if not tasks or unknown:
+            raise ValueError(f"Invalid task(s): {', '.join(unknown) or 'none'}")
+        if engine is not None and engine not in SUPPORTED_ENGINES:
+            raise ValueError(f"Unsupported engine: {engine}")
+        job = Job(tasks, device_names, engine)
+        with self._lock:
+            self.jobs[job.id] = job
+        self._evict()
+        self._executor.submit(self._run, job)
+        logger.info(f"Job {job.id} queued: {','.join(tasks)}")
+        return job
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        job.scope.cancel()
+        if job.state == "queued":
+            job.set_state("cancelled")
+        logger.info(f"Job {job_id} cancelled")
+        return job
+
+    def _run(self, job):
+        # Task managers are imported by the first job that needs them
+        from scripts.multi_task_manager import get_task_module, main as run_tasks
+
+        if job.done:
+            return
+        job.set_state("running")
+        kwargs = {"engine": job.engine, "device_names": job.device_names, "on_result": job.add_result}
+        try:
+            with cancel_scope(job.scope):
+                if len(job.tasks) > 1:
+                    run_tasks(job.tasks, **kwargs)
+                else:
+                    get_task_module(job.tasks[0]).main(**kwargs)
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed: {e}")
+            job.set_state("failed", f"{type(e).__name__}: {e}")
+        else:
+            job.set_state("cancelled" if job.scope.cancelled.is_set() else "finished")
+            logger.info(f"Job {job.id} {job.state}: {len(job.results)} result(s)")
+        self._evict()
+
+    def shutdown(self):
+        for job in self.list():
+            if not job.done:
+                job.scope.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the daemon:
+
+    GET  /jobs                    list jobs
+    POST /jobs                    submit {"tasks": [...], "devices": [...], "engine": ...}
+    GET  /jobs/<id>               job status
+    GET  /jobs/<id>/results       stream results as JSON lines until the job ends
+    GET  /jobs/<id>/results?since=N  results after the first N, as one JSON list
+    POST /jobs/<id>/cancel        cancel a job
+    GET  /metrics                 Prometheus metrics of every job since the daemon started
+
+    Every request needs "Authorization: Bearer <token>", the token the
+    daemon wrote to its token file.
+    """
+
+    server_version = "NetPilot"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        if hmac.compare_digest(token.encode(), self.server.token.encode()):
+            return True
+        self._send_json(401, {"error": "Missing or invalid API token"})
+        return False
+
+    def _job(self, job_id):
+        job = self.server.jobs.get(job_id)
+        if job is None:
+            self._send_json(404, {"error": f"Unknown job: {job_id}"})
+        return job
+
+    def _stream_results(self, job):
+        # HTTP/1.0: the body ends when the connection closes
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        sent = 0
+        while True:
+            results = job.wait_results(sent, timeout=30)
+            for result in results:
+                self.wfile.write(json.dumps(result, default=str).encode() + b"\n")
+            if not results:
+                # Keepalive line: the client skips it, its read timeout restarts
+                self.wfile.write(b"\n")
+            self.wfile.flush()
+            sent += len(results)
+            if job.done and sent == len(job.results):
+                return
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts == ["metrics"]:
+            data = self.server.metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif parts == ["jobs"]:
+            self._send_json(200, [job.summary() for job in self.server.jobs.list()])
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self._job(parts[1])
+            if job is not None:
+                self._send_json(200, job.summary())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "results":
+            job = self._job(parts[1])
+            since = parse_qs(url.query).get("since")
+            if job is not None and since:
+                self._send_json(200, job.results[int(since[0]):])
+            elif job is not None:
+                self._stream_results(job)
+        else:
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        parts = self.path.strip("/").split("/")
+        if parts == ["jobs"]:
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                job = self.server.jobs.submit(body.get("tasks") or [], body.get("devices"), body.get("engine"))
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(201, job.summary())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            job = self._job(parts[1])
+            if job is not None:
+                self._send_json(200, self.server.jobs.cancel(job.id).summary())
+        else:
+            self._send_json(404, {"error": f"Not found: {self.path}"})
+
+
+def get_daemon_address():
+    """Return the (host, port) of the daemon from the daemon section of config.yaml."""
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("daemon", {})
+    return params.get("host", "127.0.0.1"), params.get("port", 8765)
+
+
+def get_token_file():
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    return config.get("daemon", {}).get("token_file") or DAEMON_TOKEN_FILE_PATH
+
+
+def write_token(path):
+    """Write a new random API token to path, readable only by this user, and return it."""
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    # Created 0600 from the start, never readable by other users
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+
+def create_server(address=None, max_jobs=None, token_file=None):
+    """
+    Create the daemon HTTP server; its job queue is server.jobs. A new API
+    token is written to token_file (daemon.token_file in config.yaml).
+    """
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("daemon", {})
+    server = ThreadingHTTPServer(address or get_daemon_address(), DaemonHandler)
+    server.daemon_threads = True
+    server.token = write_token(token_file or get_token_file())
+    server.jobs = JobQueue(max_jobs or params.get("max_jobs", 1), params.get("keep_jobs", 20))
+    server.metrics = MetricsCollector(buckets=config.get("metrics", {}).get("buckets") or DEFAULT_BUCKETS).start()
+    return server
+
+
+def serve(address=None):
+    """Run the daemon until interrupted."""
+    server = create_server(address)
+    host, port = server.server_address[:2]
+    logger.info(f"NetPilot daemon listening on http://{host}:{port} (API token in {get_token_file()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping NetPilot daemon")
+    finally:
+        server.server_close()
+        server.jobs.shutdown()
+        server.metrics.stop()
+        if "scripts.session_pool" in sys.modules:
+            sys.modules["scripts.session_pool"].close_session_pool()
+
+
+class DaemonError(Exception):
+    """The daemon rejected a request or could not be reached."""
+
+
+class DaemonClient:
+    """Thin client of the daemon API, used by main.py and the front-ends."""
+
+    def __init__(self, address=None, timeout=10, token=None):
+        host, port = address or get_daemon_address()
+        self.url = f"http://{host}:{port}"
+        self.timeout = timeout
+        self.token = token
+
+    def _headers(self):
+        if self.token is None:
+            try:
+                with open(get_token_file(), "r") as f:
+                    self.token = f.read().strip()
+            except OSError as e:
+                raise DaemonError(f"Cannot read the NetPilot daemon token: {e}") from e
+        return {"Content-Type": "application/json", "Authorization": f"Bearer {self.token}"}
+
+    def _request(self, method, path, body=None, timeout=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = request.Request(f"{self.url}{path}", data=data, method=method, headers=self._headers())
+        try:
+            return request.urlopen(req, timeout=timeout or self.timeout)
+        except error.HTTPError as e:
+            raise DaemonError(json.loads(e.read() or b"{}").get("error", str(e))) from e
+        except OSError as e:
+            raise DaemonError(f"NetPilot daemon not reachable at {self.url}: {e}") from e
+
+    def _json(self, method, path, body=None):
+        with self._request(method, path, body) as response:
+            return json.loads(response.read())
+
+    def submit(self, tasks, device_names=None, engine=None):
+        return self._json("POST", "/jobs", {"tasks": list(tasks), "devices": device_names, "engine": engine})
+
+    def jobs(self):
+        return self._json("GET", "/jobs")
+
+    def status(self, job_id):
+        return self._json("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        return self._json("POST", f"/jobs/{job_id}/cancel")
+
+    def results_since(self, job_id, start):
+        """Return the results of a job after the first start ones, without waiting."""
+        return self._json("GET", f"/jobs/{job_id}/results?since={start}")
+
+    def results(self, job_id):
+        """Yield the result dicts of a job as they complete, until it ends."""
+        # The server sends a keepalive line every 30s while no result comes in
+        with self._request("GET", f"/jobs/{job_id}/results", timeout=max(self.timeout, 60)) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class RemoteJob:
+    """
+    A daemon job seen through DaemonClient, with the attributes of Job the
+    front-ends read: id, tasks, state, error, done, results and summary().
+    """
+
+    def __init__(self, client, summary):
+        self.client = client
+        self.results = []
+        self._update(summary)
+
+    def _update(self, summary):
+        self._summary = summary
+        self.id = summary["id"]
+        self.tasks = summary["tasks"]
+        self.state = summary["state"]
+        self.error = summary["error"]
+
+    @property
+    def done(self):
+        return self.state in JOB_STATES[2:]
+
+    def summary(self):
+        return self._summary
+
+    def refresh(self):
+        """Fetch the job state, then the results that came in since the last refresh."""
+        if self.done and len(self.results) >= self._summary["completed"]:
+            return
+        try:
+            summary = self.client.status(self.id)
+            self.results.extend(self.client.results_since(self.id, len(self.results)))
+        except DaemonError as e:
+            logger.error(f"Lost job {self.id}: {e}")
+            summary = {
+                **self._summary, "state": "failed", "error": str(e), "completed": len(self.results), "in_flight": {},
+            }
+        self._update(summary)
+
+
+class DaemonJobs:
+    """The daemon's jobs behind the JobQueue methods the front-ends use (submit, get, cancel)."""
+
+    def __init__(self, client):
+        self.client = client
+        self._jobs = {}
+
+    def submit(self, tasks, device_names=None, engine=None):
+        job = RemoteJob(self.client, self.client.submit(tasks, device_names, engine))
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.refresh()
+        return job
+
+    def cancel(self, job_id):
+        self.client.cancel(job_id)
+        return self.get(job_id)
+
+    def shutdown(self):
+        """Nothing runs in this process; jobs keep running on the daemon."""
+
+
+def open_job_queue(max_jobs=1):
+    """
+    Job queue of a front-end (GUI, TUIs): the running daemon's, so the
+    front-end is a thin client sharing the daemon's warm sessions, or an
+    in-process JobQueue when no daemon answers.
+    """
+    client = DaemonClient(timeout=5)
+    try:
+        client.jobs()
+    except DaemonError as e:
+        logger.info(f"No NetPilot daemon, running tasks in this process ({e})")
+        return JobQueue(max_jobs)
+    logger.info(f"Running tasks on the NetPilot daemon at {client.url}")
+    return DaemonJobs(client)
+
+
+def follow_job(jobs, job, interval=1.0, start=0):
+    """
+    Yield (job, results since the previous yield), starting at result
+    start, every interval seconds until the job ends.
+    """
+    seen = start
+    while True:
+        job = jobs.get(job.id)
+        yield job, job.results[seen:]
+        seen = len(job.results)
+        if job.done:
+            return
+        time.sleep(interval)
@@ -0,0 +1,238 @@
+# scripts/distributed.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+from scripts.phases import CancelScope, cancel_scope
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("distributed")
+
+# Ways to split the devices of a run between workers
+SHARD_KEYS = ("site", "group", "hash")
+
+# Shared secret of coordinator and workers (multiprocessing.connection authkey)
+AUTHKEY_ENV = "NETPILOT_WORKER_KEY"
+
+
+def parse_address(value):
+    """Parse HOST:PORT into a (host, port) tuple."""
+    host, sep, port = str(value).rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Invalid worker address: {value} (expected HOST:PORT)")
+    return host or "127.0.0.1", int(port)
+
+
+def format_address(address):
+    return f"{address[0]}:{address[1]}"
+
+
+def get_authkey():
+    """Return the worker key from NETPILOT_WORKER_KEY as bytes, or None."""
+    key = os.environ.get(AUTHKEY_ENV)
+    return key.encode() if key else None
+
+
+def shard_jobs(jobs, count, by="site", pinned=None):
+    """
+    Split (task_func, device, args) jobs into count shards.
+
+    by=site or by=group keeps every device of a site/group on the same
+    shard, largest site/group first onto the smallest shard; by=hash spreads
+    devices by a stable hash of their name. pinned maps a site/group to a
+    shard index, e.g. to keep a site on the worker closest to it.
+    """
+    if by not in SHARD_KEYS:
+        raise ValueError(f"Unsupported shard key: {by} (choose from {', '.join(SHARD_KEYS)})")
+    shards = [[] for _ in range(count)]
+    if by == "hash":
+        for job in jobs:
+            shards[zlib.crc32(str(job[1].get("name")).encode()) % count].append(job)
+        return shards
+
+    keyed = defaultdict(list)
+    for job in jobs:
+        keyed[job[1].get(by)].append(job)
+    for key, index in (pinned or {}).items():
+        shards[index].extend(keyed.pop(key, []))
+    for key_jobs in sorted(keyed.values(), key=len, reverse=True):
+        min(shards, key=len).extend(key_jobs)
+    return shards
+
+
+def lost_result(device, message):
+    """Result dict for a device whose worker failed or disconnected."""
+    return {
+        "device": device.get("name", "UNKNOWN"),
+        "host": device.get("host", "UNKNOWN"),
+        "status": "FAILED",
+        "error": "WorkerUnavailable",
+        "output": message,
+    }
+
+
+def _run_shard(conn):
+    """
+    Run the shard request read from conn, streaming each result back. A
+    ("cancel", reason) message from the coordinator, or the coordinator
+    going away, stops the shard's run at its next phase: running devices
+    end through the worker's own run deadline and cancel_grace.
+    """
+    # engine imports this module for its coordinator
+    from scripts.engine import get_engine, run_device_tasks
+
+    lock = threading.Lock()
+    scope = CancelScope()
+    failure = []
+
+    def send_result(result):
+        try:
+            with lock:
+                conn.send(("result", result))
+        except OSError as e:
+            if not scope.cancelled.is_set():
+                logger.warning(f"Coordinator disconnected, stopping the shard: {e}")
+                scope.cancel("Coordinator disconnected")
+
+    def run_shard():
+        try:
+            with cancel_scope(scope):
+                run_device_tasks(
+                    request["jobs"], request["num_threads"], engine=engine, worker=request.get("worker"),
+                    task=request["task"], on_result=send_result,
+                )
+        except Exception as e:
+            logger.exception(f"Shard failed: {e}")
+            failure.append(f"{type(e).__name__}: {e}")
+
+    try:
+        request = conn.recv()
+        engine = get_engine(request.get("engine"))
+    except (EOFError, OSError) as e:
+        logger.warning(f"Coordinator disconnected before sending a shard: {e}")
+        return
+    except Exception as e:
+        logger.exception(f"Shard failed: {e}")
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    if engine == "distributed":
+        # A worker runs its shard itself, never forwards it
+        engine = "thread"
+    logger.info(f"Running {request['task']} on a shard of {len(request['jobs'])} device(s)")
+    runner = threading.Thread(target=run_shard, name="shard")
+    runner.start()
+    try:
+        while runner.is_alive():
+            if not conn.poll(0.2):
+                continue
+            kind, reason = conn.recv()
+            if kind == "cancel" and not scope.cancelled.is_set():
+                logger.warning(f"Coordinator cancelled the shard: {reason}")
+                scope.cancel(reason)
+    except (EOFError, OSError) as e:
+        if not scope.cancelled.is_set():
+            logger.warning(f"Coordinator disconnected, stopping the shard: {e}")
+            scope.cancel("Coordinator disconnected")
+        runner.join()
+        return
+    try:
+        conn.send(("error", failure[0]) if failure else ("done", None))
+    except OSError as e:
+        logger.warning(f"Coordinator disconnected before the shard finished: {e}")
+
+
+def serve_worker(address, authkey, ready=None, once=False):
+    """
+    Run a worker on address: accept shards from coordinators, one at a time,
+    run them with the local engine and config (credentials, commands,
+    leases) and stream every result dict back. ready, a Connection, is sent
+    the bound address once the worker listens. With once, return after the
+    first shard.
+    """
+    with Listener(address, authkey=authkey) as listener:
+        logger.info(f"Worker listening on {format_address(listener.address)}")
+        if ready is not None:
+            ready.send(listener.address)
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError) as e:
+                logger.warning(f"Rejected coordinator connection: {e}")
+                continue
+            with conn:
+                _run_shard(conn)
+            if once:
+                return
+
+
+def start_local_workers(count, authkey, timeout=30):
+    """
+    Start count worker processes on 127.0.0.1 (ephemeral ports), each
+    running one shard. Returns (processes, addresses); see stop_local_workers.
+    """
+    # Never fork: the coordinator runs threads (session pool reaper, daemon
+    # API, engine workers) whose held locks a forked child would inherit
+    context = multiprocessing.get_context("spawn")
+    processes, addresses = [], []
+    try:
+        for _ in range(count):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=serve_worker, args=(("127.0.0.1", 0), authkey, sender, True), daemon=True
+            )
+            process.start()
+            processes.append(process)
+            if not receiver.poll(timeout):
+                raise RuntimeError("Local worker did not start")
+            addresses.append(receiver.recv())
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    logger.info(f"Started {count} local worker(s): {', '.join(map(format_address, addresses))}")
+    return processes, addresses
+
+
+def stop_local_workers(processes, timeout):
+    """
+    Wait up to timeout seconds for local workers to exit once their shard
+    is done, then terminate those still alive.
+    """
+    end = time.monotonic() + timeout
+    for process in processes:
+        process.join(max(0.0, end - time.monotonic()))
+        if process.is_alive():
+            logger.warning(f"Local worker {process.pid} still running after {timeout}s, terminating it")
+            process.terminate()
+
+
+def send_shard(address, authkey, request, messages, run=None):
+    """
+    Send a shard request to the worker at address and put its replies on
+    messages as (address, kind, payload) until it is done or fails. Once
+    run (the coordinator's RunDeadline) is cancelled, the worker is sent
+    ("cancel", reason) so it stops its devices itself.
+    """
+    try:
+        with Client(address, authkey=authkey) as conn:
+            conn.send(request)
+            cancel_sent = False
+            while True:
+                if run is not None and run.cancelled.is_set() and not cancel_sent:
+                    conn.send(("cancel", run.reason))
+                    cancel_sent = True
+                if not conn.poll(0.2):
+                    continue
+                kind, payload = conn.recv()
+                messages.put((address, kind, payload))
+                if kind != "result":
+                    return
+    except Exception as e:
+        messages.put((address, "error", f"{type(e).__name__}: {e}"))
@@ -0,0 +1,654 @@
+# scripts/engine.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import asyncio
+import functools
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from contextlib import AsyncExitStack, ExitStack
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from scripts import events
+from scripts.constants import CONFIG_FILE_PATH, GROUP_TO_DEVICE_TYPE, SUPPORTED_ENGINES
+from scripts.config_parser import load_yaml
+from scripts.concurrency import active_limiter, get_limiter
+from scripts.scheduler import JobScheduler
+from scripts.phases import RunDeadline, TaskTimeout, bind, mark_failed, replay_failure, timeout_result
+from scripts.leases import device_lease, device_lease_async
+from scripts.async_transport import get_async_form, require_asyncssh
+from scripts.netmiko_utils import prewarm_session
+from scripts.pipeline import StageError, StagedPipeline
+from scripts.checkpoint import result_device, result_status
+from scripts.distributed import (
+    AUTHKEY_ENV,
+    format_address,
+    get_authkey,
+    lost_result,
+    parse_address,
+    send_shard,
+    shard_jobs,
+    start_local_workers,
+    stop_local_workers,
+)
+from scripts.session_pool import get_session_pool
+from utils.network_utils import (
+    validate_ip,
+    probe_reachability,
+    run_coroutine,
+    build_device_status,
+    write_device_status_yaml,
+)
+from utils.duration_history import DurationHistory, estimate_durations, predict_makespan
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("engine")
+
+
+def get_engine(engine=None):
+    """
+    Resolve the execution engine name.
+    Falls back to thread_pools.engine in config.yaml, then to "thread".
+    """
+    if engine is None:
+        config = load_yaml(CONFIG_FILE_PATH) or {}
+        engine = config.get("thread_pools", {}).get("engine", "thread")
+    if engine not in SUPPORTED_ENGINES:
+        raise ValueError(f"Unsupported engine: {engine}")
+    return engine
+
+
+def _invoke(job, worker):
+    task_func, device, args = job
+    if worker is not None:
+        return worker(task_func, device, *args)
+    return task_func(device, *args)
+
+
+def _device_started(run, device):
+    if run is not None and events.has_subscribers():
+        run.started[device.get("name")] = time.monotonic()
+        events.emit("device_started", task=run.task, device=device.get("name"))
+
+
+def _call(job, worker, run=None):
+    """
+    Run a single (task_func, device, args) job, optionally through a worker wrapper.
+    Jobs scheduled on a run hold the host-wide lease of their device (see
+    scripts/leases.py) so other NetPilot processes never work on it at the
+    same time.
+    """
+    task_func, device, _ = job
+    with bind(run, device.get("name")), ExitStack() as stack:
+        if run is None:
+            return _invoke(job, worker)
+        try:
+            stack.enter_context(device_lease(device, task_func.__name__))
+        except TaskTimeout as e:
+            # Cancelled while waiting for the lease: the device was never touched
+            logger.warning(f"{device.get('name')} not started: {e}")
+            return timeout_result(device, "lease", f"{run.reason} before the device lease was taken")
+        _device_started(run, device)
+        return _invoke(job, worker)
+
+
+def _in_flight_limit(limiter, default):
+    """Return a callable giving the devices allowed in flight: the adaptive limit, else a fixed one."""
+    return lambda: limiter.limit if limiter is not None else default
+
+
+def _check_deadline(run, pending, on_result):
+    """
+    Called when waiting for results timed out. At the run deadline every
+    task is cancelled cooperatively; once the grace period is over the
+    stragglers still running are reported as TIMEOUT in their current phase
+    and abandoned. Returns True when the run must stop waiting.
+    """
+    if run is None or not run.expired():
+        return False
+    if not run.cancelled.is_set():
+        logger.warning(f"Run deadline reached, cancelling {len(pending)} running device(s)")
+        run.cancel()
+        return False
+    if not run.grace_over():
+        return False
+    for job in pending.values():
+        device = job[1]
+        phase_name = run.phases.get(device.get("name")) or "unknown"
+        logger.error(f"Abandoning {device.get('name')}, still in {phase_name} after the run deadline")
+        on_result(timeout_result(device, phase_name, f"{run.reason}, task abandoned"))
+    pending.clear()
+    return True
+
+
+def _drain_unstarted(scheduler, on_result, run=None):
+    """Report the devices never started before the run deadline as TIMEOUT."""
+    jobs = scheduler.drain()
+    reason = run.reason if run is not None else "Run deadline reached"
+    if jobs:
+        logger.warning(f"{reason}, {len(jobs)} device(s) not started")
+    for job in jobs:
+        on_result(timeout_result(job[1], "queued", f"{reason} before the task started"))
+
+
+class _DeviceExecutor:
+    """
+    Executor of the thread engine. Like the pipeline stages it runs device
+    jobs on daemon threads, started as jobs come in: a task abandoned at the
+    run deadline never keeps the process from exiting (ThreadPoolExecutor
+    threads are joined at interpreter exit).
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._queue = queue.SimpleQueue()
+        self._threads = []
+        self._idle = 0
+        self._lock = threading.Lock()
+
+    def _work(self):
+        while True:
+            with self._lock:
+                self._idle += 1
+            item = self._queue.get()
+            with self._lock:
+                self._idle -= 1
+            if item is None:
+                return
+            future, func, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, func, *args):
+        future = Future()
+        with self._lock:
+            if self._idle <= self._queue.qsize() and len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._work, name=f"device-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        self._queue.put((future, func, args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+def _run_threaded(jobs, num_threads, worker, on_result, limiter=None, durations=None, run=None):
+    max_workers = limiter.max_limit if limiter is not None else num_threads
+    executor = _DeviceExecutor(max_workers)
+    scheduler = JobScheduler.from_config(jobs, _in_flight_limit(limiter, num_threads), durations)
+    pending = {}
+    abandoned = False
+    try:
+        while True:
+            # Only submit what the limits allow now, so a lowered limit takes effect
+            job = scheduler.next_job() if run is None or not run.cancelled.is_set() else None
+            while job is not None:
+                pending[executor.submit(_call, job, worker, run)] = job
+                job = scheduler.next_job()
+            if not pending:
+                break
+            timeout = run.wait_timeout() if run is not None else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                scheduler.done(pending.pop(future))
+                on_result(future.result())
+            if not done and _check_deadline(run, pending, on_result):
+                abandoned = True
+                break
+        _drain_unstarted(scheduler, on_result, run)
+    except BaseException:
+        # Ctrl-C or a failing sink: drop queued devices instead of running them all
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    # Never block on abandoned (hung) sessions
+    executor.shutdown(wait=not abandoned, cancel_futures=abandoned)
+
+
+def _check_async_jobs(jobs, worker):
+    """Raise ValueError before anything runs when the asyncio engine cannot run the jobs."""
+    require_asyncssh()
+    if worker is not None:
+        get_async_form(worker)
+    for task_func in {job[0] for job in jobs}:
+        get_async_form(task_func)
+
+
+async def _call_async(job, worker, run):
+    """_call() for the asyncio engine: the coroutine form of the task, under the device lease."""
+    task_func, device, args = job
+    with bind(run, device.get("name")):
+        async with AsyncExitStack() as stack:
+            try:
+                await stack.enter_async_context(device_lease_async(device, task_func.__name__))
+            except TaskTimeout as e:
+                logger.warning(f"{device.get('name')} not started: {e}")
+                return timeout_result(device, "lease", f"{run.reason} before the device lease was taken")
+            _device_started(run, device)
+            if worker is not None:
+                return await get_async_form(worker)(task_func, device, *args)
+            return await get_async_form(task_func)(device, *args)
+
+
+async def _run_asyncio(jobs, concurrency, worker, on_result, limiter=None, durations=None, run=None):
+    scheduler = JobScheduler.from_config(jobs, _in_flight_limit(limiter, concurrency), durations)
+    pending = {}
+    try:
+        while True:
+            job = scheduler.next_job() if not run.cancelled.is_set() else None
+            while job is not None:
+                pending[asyncio.create_task(_call_async(job, worker, run), name=job[1].get("name"))] = job
+                job = scheduler.next_job()
+            if not pending:
+                break
+            done, _ = await asyncio.wait(pending, timeout=run.wait_timeout(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                scheduler.done(pending.pop(task))
+                on_result(task.result())
+            if not done:
+                stragglers = list(pending)
+                if _check_deadline(run, pending, on_result):
+                    # Unlike threads, coroutines can be stopped: their sessions are closed
+                    for task in stragglers:
+                        task.cancel()
+                    break
+        _drain_unstarted(scheduler, on_result, run)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _async_concurrency():
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    return config.get("thread_pools", {}).get("async_concurrency", 500)
+
+
+def _run_asyncio_engine(jobs, worker, on_result, limiter=None, durations=None, run=None):
+    """
+    asyncio engine: every device job runs as a coroutine (the async_form of
+    its task, see scripts/async_transport.py) over asyncssh on one event
+    loop, up to thread_pools.async_concurrency devices in flight, or the
+    adaptive limit when it is enabled. No thread per device.
+    """
+    run_coroutine(_run_asyncio(jobs, _async_concurrency(), worker, on_result, limiter, durations, run))
+
+
+def _prewarm(job, run, login_errors):
+    """
+    Connect stage of the pipeline engine: log in ahead of the command stage.
+    The parked session keeps the device lease until the command stage takes
+    both over. A failed login is kept in login_errors for the command stage.
+    """
+    _, device, _ = job
+    device_type = GROUP_TO_DEVICE_TYPE.get(device.get("group"))
+    if not device_type or (run is not None and run.cancelled.is_set()):
+        return job
+    try:
+        with bind(run, device.get("name")), device_lease(device, "connect"):
+            prewarm_session(device, device_type)
+    except Exception as e:
+        logger.debug(f"Connect stage failed for {device.get('name')}: {e}")
+        login_errors[id(job)] = e
+    return job
+
+
+def _after_login(job, error):
+    """
+    Command stage job of a device whose connect stage login failed: its
+    first try reports that failure instead of logging in again (so an
+    AAA server sees one attempt, plus the worker's retries of login
+    failures); retries run the task itself.
+    """
+    if error is None:
+        return job
+    task_func, device, args = job
+    tries = []
+
+    @functools.wraps(task_func)
+    def task(device, *args, **kwargs):
+        if not tries:
+            tries.append(error)
+            replay_failure("connect", error)
+        return task_func(device, *args, **kwargs)
+
+    return task, device, args
+
+
+def _run_pipeline(jobs, num_threads, worker, on_result, limiter=None, durations=None, run=None):
+    """
+    Staged engine: connect (login into the session pool) -> command (the
+    task itself) -> persist (on_result), each stage with its own threads and
+    a max_queue bound in front of the command and persist stages. Probing is
+    the bulk stage run by run_device_tasks before any job is scheduled.
+    """
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("thread_pools", {})
+    max_queue = params.get("max_queue", 20)
+    command_limit = _in_flight_limit(limiter, num_threads)
+    max_workers = limiter.max_limit if limiter is not None else num_threads
+    if get_session_pool() is None:
+        logger.warning("Session pool disabled, the pipeline connect stage cannot log in ahead")
+
+    # id(job) -> exception of a failed connect stage login
+    login_errors = {}
+
+    def command(job):
+        return job, _call(_after_login(job, login_errors.pop(id(job), None)), worker, run)
+
+    pipeline = StagedPipeline()
+    pipeline.add_stage("connect", lambda job: _prewarm(job, run, login_errors), params.get("connect_workers", 5))
+    pipeline.add_stage("command", command, max_workers, max_queue, command_limit)
+    pipeline.add_stage("persist", lambda item: on_result(item[1]) or item[0], 1, max_queue)
+    pipeline.start()
+
+    # Devices between connect and persist: the command slots plus both queues
+    scheduler = JobScheduler.from_config(jobs, lambda: command_limit() + 2 * max_queue, durations)
+    pending = {}
+    try:
+        while True:
+            job = scheduler.next_job() if run is None or not run.cancelled.is_set() else None
+            while job is not None:
+                pending[id(job)] = job
+                pipeline.submit(job)
+                job = scheduler.next_job()
+            if not pending:
+                break
+            try:
+                item = pipeline.results.get(timeout=run.wait_timeout() if run is not None else None)
+            except queue.Empty:
+                if _check_deadline(run, pending, on_result):
+                    break
+                continue
+            if isinstance(item, StageError):
+                if item.stage == "persist":
+                    # on_result itself failed (e.g. a result sink), as on the other engines
+                    raise item.exc
+                # One device failed outside its worker: a result for it, the run goes on
+                logger.error(f"{item.stage} stage failed for {item.item[1].get('name')}: {item.exc}")
+                device = item.item[1]
+                on_result(mark_failed({"device": device.get("name"), "host": device.get("host"), "output": ""}, item.exc))
+                item = item.item
+            scheduler.done(pending.pop(id(item)))
+        _drain_unstarted(scheduler, on_result, run)
+    finally:
+        pipeline.stop()
+
+
+def _run_distributed(jobs, num_threads, worker, task, on_result, run=None):
+    """
+    Coordinator: shard the jobs over the workers of the distributed section
+    of config.yaml (main.py --worker processes, or local_workers processes
+    started here), pass every result they stream back to on_result and
+    report the devices of a failed or disconnected worker as FAILED.
+    Probing, ordering and concurrency limits run on each worker.
+
+    When the run is cancelled (deadline or daemon cancel) every worker is
+    told to stop its shard and stops its devices through its own run
+    deadline; the coordinator waits cancel_grace plus report_grace seconds
+    for their results before abandoning the devices still missing.
+    """
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("distributed", {})
+    addresses = [parse_address(address) for address in params.get("workers") or []]
+    authkey = get_authkey()
+    processes = []
+    if not addresses:
+        authkey = authkey or os.urandom(16)
+        processes, addresses = start_local_workers(params.get("local_workers", 2), authkey)
+    elif authkey is None:
+        raise ValueError(f"Set {AUTHKEY_ENV} to the key the workers were started with")
+
+    if run is not None:
+        # Workers spend their own cancel_grace stopping devices, then report
+        run.cancel_grace += params.get("report_grace", 10)
+    messages = queue.Queue()
+    pending = {}
+    sent = set()
+    try:
+        pinned = {}
+        for key, address in (params.get("pins") or {}).items():
+            if parse_address(address) not in addresses:
+                raise ValueError(f"Pinned worker {address} for {key} is not in distributed.workers")
+            pinned[key] = addresses.index(parse_address(address))
+
+        shards = shard_jobs(jobs, len(addresses), params.get("shard_by", "site"), pinned)
+        for address, shard in zip(addresses, shards):
+            if not shard:
+                continue
+            pending[address] = {job[1].get("name"): job for job in shard}
+            sent.add(address)
+            request = {
+                "task": task,
+                "jobs": shard,
+                "num_threads": num_threads,
+                "engine": params.get("worker_engine"),
+                "worker": worker,
+            }
+            threading.Thread(target=send_shard, args=(address, authkey, request, messages, run), daemon=True).start()
+            logger.info(f"Sent {len(shard)} device(s) to worker {format_address(address)}")
+
+        while pending:
+            try:
+                address, kind, payload = messages.get(timeout=run.wait_timeout() if run is not None else None)
+            except queue.Empty:
+                waiting = {name: job for shard in pending.values() for name, job in shard.items()}
+                if _check_deadline(run, waiting, on_result):
+                    break
+                continue
+            if kind == "result":
+                pending[address].pop(result_device(payload), None)
+                on_result(payload)
+                continue
+            lost = pending.pop(address)
+            if kind == "error":
+                logger.error(f"Worker {format_address(address)} failed: {payload}")
+            for job in lost.values():
+                on_result(lost_result(job[1], f"Worker {format_address(address)} did not return a result"))
+    finally:
+        busy = [process for process, address in zip(processes, addresses) if address in sent]
+        for process in processes:
+            if process not in busy:
+                process.terminate()
+        stop_local_workers(busy, run.cancel_grace if run is not None else 30)
+
+
+def _split_unreachable(jobs, task=None):
+    """
+    Probe every device of the run at once and split the jobs into
+    (reachable, unreachable) before anything is scheduled.
+    """
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("reachability", {})
+    if not params.get("bulk_probe", True):
+        return jobs, []
+
+    hosts = [job[1].get("host") for job in jobs if validate_ip(job[1].get("host"))]
+    start = time.monotonic()
+    reachability = probe_reachability(
+        hosts,
+        timeout=params.get("probe_timeout", 2),
+        concurrency=params.get("probe_concurrency", 500),
+    )
+    # One probe phase for the whole run, not per device
+    events.emit("phase_finished", task=task, device=None, phase="probe", duration=time.monotonic() - start, outcome="ok")
+    # Only this run's devices were probed, keep the others' last status
+    write_device_status_yaml(build_device_status([job[1] for job in jobs]), merge=True)
+
+    reachable = [job for job in jobs if reachability.get(job[1].get("host"))]
+    unreachable = [job for job in jobs if not reachability.get(job[1].get("host"))]
+    return reachable, unreachable
+
+
+def _order_longest_first(jobs, task, num_threads):
+    """
+    Sort jobs longest-expected-first (LPT) from the duration history of task.
+    Returns (jobs, history, predicted makespan); history is None when
+    scheduling.lpt is disabled, leaving the devices.yaml order.
+    """
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("scheduling", {})
+    if not params.get("lpt", True):
+        return jobs, None, None
+
+    history = DurationHistory(alpha=params.get("history_alpha", 0.5))
+    names = [job[1].get("name") for job in jobs]
+    expected = history.expected(task)
+    estimates = estimate_durations(names, expected)
+    # sorted() is stable: equal estimates (e.g. no history yet) keep their order
+    jobs = sorted(jobs, key=lambda job: estimates[job[1].get("name")], reverse=True)
+    unseen = sum(1 for name in names if name not in expected)
+    if unseen:
+        logger.info(f"No duration history for {unseen} device(s) of {task}, using the median estimate")
+    return jobs, history, predict_makespan(list(estimates.values()), num_threads)
+
+
+def _count_result(result, statuses, timeouts):
+    """Count a result (or each task of a {task: result} pipeline result) by status."""
+    for r in ([result] if "status" in result else result.values()):
+        statuses[r.get("status")] += 1
+        if r.get("status") == "TIMEOUT":
+            timeouts[r.get("phase", "unknown")] += 1
+
+
+def _log_summary(task, statuses, timeouts):
+    if not statuses:
+        return
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+    if timeouts:
+        summary += " (timed out in " + ", ".join(f"{p}: {n}" for p, n in timeouts.most_common()) + ")"
+    logger.info(f"{task} summary: {summary}")
+
+
+def _task_finished(task, start, statuses, timeouts):
+    _log_summary(task, statuses, timeouts)
+    events.emit("task_finished", task=task, duration=time.monotonic() - start, statuses=dict(statuses))
+
+
+def run_device_tasks(jobs, num_threads, engine=None, worker=None, task="task", on_result=None):
+    """
+    Run (task_func, device, args) jobs on the selected engine.
+
+    Task functions stay engine-agnostic: the same callables are used by
+    every engine. When worker is given (e.g.
+    device_worker) each job is called as worker(task_func, device, *args).
+    The asyncio engine runs the coroutine form registered for the task and
+    the worker with async_form() (backup and inventory) over asyncssh; the
+    other tasks raise ValueError on it.
+
+    When adaptive_concurrency is enabled in config.yaml the number of
+    devices in flight starts at num_threads and follows an AIMD rule driven
+    by SSH login latency and failures (see scripts/concurrency.py). The
+    per-group and per-site caps of the scheduling section also apply.
+    Devices are submitted longest-expected-first, using the durations
+    recorded for this task by earlier runs.
+
+    The timeouts section of config.yaml bounds the run: each phase (connect,
+    auth, enable, command, save_config) has its own timeout, and at
+    run_deadline running tasks are cancelled at their next phase while
+    devices not started yet are reported with status TIMEOUT.
+
+    The distributed engine hands shards of the jobs to worker processes
+    (see scripts/distributed.py), which run them with their own engine.
+
+    Progress is published on the event bus (see scripts/events.py):
+    task_started, device_started, device_finished and task_finished here,
+    phase and retry events from the tasks themselves.
+
+    Each result dict is passed to on_result as soon as its device completes.
+    Without on_result the result dicts are collected and returned in
+    completion order.
+    """
+    results = None
+    if on_result is None:
+        results = []
+        on_result = results.append
+
+    statuses, timeouts = Counter(), Counter()
+    deliver = on_result
+
+    def on_result(result):
+        _count_result(result, statuses, timeouts)
+        if events.has_subscribers():
+            name = result_device(result)
+            started = run.started.pop(name, None)
+            events.emit(
+                "device_finished", task=task, device=name, status=result_status(result),
+                duration=time.monotonic() - started if started is not None else None, result=result,
+            )
+        deliver(result)
+
+    engine = get_engine(engine)
+    if engine == "asyncio":
+        _check_async_jobs(jobs, worker)
+    run = RunDeadline.from_config()
+    run.task = task
+    if not jobs:
+        logger.info(f"No devices left to run for {task}")
+        return results
+    events.emit("task_started", task=task, engine=engine, devices=len(jobs))
+    task_start = time.monotonic()
+
+    if engine == "distributed":
+        # Each worker probes and schedules its shard from its own network position
+        logger.info(f"Running {task} on {len(jobs)} device(s) with distributed engine")
+        try:
+            _run_distributed(jobs, num_threads, worker, task, on_result, run)
+        finally:
+            _task_finished(task, task_start, statuses, timeouts)
+        return results
+
+    jobs, unreachable = _split_unreachable(jobs, task)
+    if unreachable:
+        logger.warning(f"{len(unreachable)} device(s) unreachable or invalid, not scheduled on workers")
+
+    # Task functions fail fast on these (cached probe result), no worker needed
+    for job in unreachable:
+        on_result(_call(job, worker))
+
+    jobs, history, predicted = _order_longest_first(jobs, task, num_threads)
+    durations = {}
+
+    limiter = get_limiter(num_threads)
+    mode = f"adaptive concurrency {limiter.min_limit}-{limiter.max_limit}" if limiter else f"{num_threads} threads"
+    if engine == "asyncio" and limiter is None:
+        mode = f"{_async_concurrency()} devices in flight"
+    logger.info(f"Running {task} on {len(jobs)} device(s) with {engine} engine ({mode})")
+    if run.expires is not None:
+        logger.info(f"Run deadline in {run.remaining():.0f}s")
+    start = time.monotonic()
+    try:
+        with active_limiter(limiter):
+            if engine == "asyncio":
+                _run_asyncio_engine(jobs, worker, on_result, limiter, durations, run)
+            elif engine == "pipeline":
+                _run_pipeline(jobs, num_threads, worker, on_result, limiter, durations, run)
+            else:
+                _run_threaded(jobs, num_threads, worker, on_result, limiter, durations, run)
+    finally:
+        # Also keep the durations of an interrupted run
+        if history is not None:
+            history.record(task, durations)
+        _task_finished(task, task_start, statuses, timeouts)
+    actual = time.monotonic() - start
+    if predicted is not None:
+        logger.info(f"{task} makespan: predicted {predicted:.1f}s, actual {actual:.1f}s")
+    return results
@@ -0,0 +1,79 @@
+# scripts/events.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("events")
+
+# Events emitted by a run and their fields. Every event also carries
+# "event" (its name) and "time" (epoch seconds).
+EVENTS = {
+    "task_started": ("task", "engine", "devices"),
+    "device_started": ("task", "device"),
+    "phase_changed": ("task", "device", "phase"),
+    "phase_finished": ("task", "device", "phase", "duration", "outcome"),
+    "device_retry": ("task", "device", "attempt", "error", "delay"),
+    "device_finished": ("task", "device", "status", "duration", "result"),
+    "task_finished": ("task", "duration", "statuses"),
+}
+
+# (callback, event names or None) pairs. Replaced, never mutated, so emit()
+# reads it without a lock.
+_subscribers = ()
+_lock = threading.Lock()
+
+
+def subscribe(callback, events=None):
+    """
+    Call callback(event_dict) for every event, or only for the event names
+    in events. Callbacks run in the thread that emits the event (often a
+    worker thread) and must be quick; exceptions they raise are logged and
+    ignored.
+    """
+    global _subscribers
+    unknown = set(events or ()) - set(EVENTS)
+    if unknown:
+        raise ValueError(f"Unknown event(s): {', '.join(sorted(unknown))}")
+    with _lock:
+        _subscribers = _subscribers + ((callback, frozenset(events) if events else None),)
+
+
+def unsubscribe(callback):
+    global _subscribers
+    with _lock:
+        _subscribers = tuple(entry for entry in _subscribers if entry[0] != callback)
+
+
+@contextmanager
+def subscribed(callback, events=None):
+    """Subscribe callback for the duration of the block."""
+    subscribe(callback, events)
+    try:
+        yield
+    finally:
+        unsubscribe(callback)
+
+
+def has_subscribers():
+    """True when someone listens; lets callers skip building costly event fields."""
+    return bool(_subscribers)
+
+
+def emit(event, **fields):
+    """Send an event to its subscribers. Costs one check when nobody listens."""
+    subscribers = _subscribers
+    if not subscribers:
+        return
+    payload = {"event": event, "time": time.time(), **fields}
+    for callback, events in subscribers:
+        if events is not None and event not in events:
+            continue
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.debug(f"Event subscriber {callback!r} failed on {event}: {e}")
@@ -1,10 +1,5 @@
 # firmware_manager.py
 
-import os
-import yaml
-from filelock import FileLock
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
 from scripts.constants import (
     DEVICES_FILE_PATH,
     CONFIG_FILE_PATH,
@@ -15,8 +10,12 @@ from scripts.constants import (
 
 from scripts.netmiko_utils import firmware_upgrade_procedure
 from scripts.worker import device_worker
+from scripts.engine import run_device_tasks
+from scripts.result_writer import ResultSink
+from scripts.checkpoint import RunCheckpoint
+from scripts.phases import mark_failed
 from scripts.config_parser import load_yaml
-from utils.network_utils import validate_devices, validate_ip, is_reachable
+from utils.network_utils import validate_devices, validate_ip, is_reachable, select_devices
 
 from utils.logger_utils import setup_logger
 
@@ -42,18 +41,41 @@ def firmware_task(device, device_type):
         logger.error(msg)
         return result
 
+    if not is_reachable(ip):
+        msg = f"Device not reachable for device {result['device']} | {ip}"
+        result["output"] = f"Device not reachable: {ip}"
+        logger.error(msg)
+        return result
+
     try:
         output = firmware_upgrade_procedure(device, device_type)
         result["status"] = "SUCCESS"
         result["output"] = output
         logger.info(f"Firmware upgrade SUCCESS: {result['device']} ({ip})")
     except Exception as e:
-        result["output"] = str(e)
-        msg = f"Firmware upgrade FAILED: {result['device']} ({ip}): {e}"
+        mark_failed(result, e)
+        msg = f"Firmware upgrade {result['status']}: {result['device']} ({ip}): {e}"
         logger.error(msg)
     return result
 
-def main():
+def build_jobs(devices):
+    """Return (task_func, device, args) jobs for the firmware task."""
+    jobs = []
+    for device in devices:
+        group = device.get("group")
+        device_type = GROUP_TO_DEVICE_TYPE.get(group)
+        if not device_type:
+            msg = f"Unknown group '{group}' for device {device['name']}"
+            logger.error(msg)
+            continue
+        jobs.append((firmware_task, device, (device_type,)))
+    return jobs
+
+def open_result_sink():
+    """Return a sink streaming firmware upgrade results to FIRMWARE_RESULT_FILE_PATH."""
+    return ResultSink(FIRMWARE_RESULT_FILE_PATH)
+
+def main(engine=None, run_id=None, retry_failed=False, device_names=None, on_result=None):
     """
     Main function to handle firmware upgrade tasks.
     """
@@ -63,37 +85,30 @@ def main():
 
     devices_yaml = load_yaml(DEVICES_FILE_PATH)
     devices = devices_yaml.get("devices", [])
+    devices = select_devices(devices, device_names, logger)
 
     if not devices:
         logger.error("No devices found for firmware upgrade.")
         return [], True
 
-    results = []
-    with ThreadPoolExecutor(max_workers=num_threads) as executor:
-        futures = []
-        for device in devices:
-            group = device.get("group")
-            device_type = GROUP_TO_DEVICE_TYPE.get(group)
-            if not device_type:
-                msg = f"Unknown group '{group}' for device {device['name']}"
-                logger.error(msg)
-                continue
-            futures.append(executor.submit(firmware_task, device, device_type))
-
-        for future in as_completed(futures):
-            results.append(future.result())
-
-    # Write results as YAML
-    output_file = FIRMWARE_RESULT_FILE_PATH
-    lock_file = f"{output_file}.lock"
-    lock = FileLock(lock_file)
-    with lock:
-        with open(output_file, "w") as f:
-            yaml.dump(results, f, default_flow_style=False, allow_unicode=True)
-        logger.info(f"Firmware upgrade results written to {output_file}")
-
-    if os.path.exists(lock_file):
-        os.remove(lock_file)
+    # A run_id resumes that run: devices it already finished are skipped
+    checkpoint = RunCheckpoint(["firmware"], run_id)
+    devices, kept = checkpoint.pending(devices, retry_failed)
+
+    sink = open_result_sink()
+    for result in kept:
+        sink.write(result)
+    try:
+        run_device_tasks(
+            build_jobs(devices), num_threads, engine=engine, worker=device_worker, task="firmware",
+            on_result=checkpoint.recorder(sink.write, on_result),
+        )
+        checkpoint.complete()
+    finally:
+        # Also on Ctrl-C or a crash: keep every result that completed
+        sink.finalize()
+        checkpoint.close()
+        logger.info(f"Firmware upgrade results written to {FIRMWARE_RESULT_FILE_PATH}")
 
 
 if __name__ == "__main__":
@@ -3,8 +3,6 @@
 # This file is part of the Network Automation Suite.
 
 import os
-import yaml
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from scripts.constants import (
     DEVICES_FILE_PATH,
@@ -14,15 +12,21 @@ from scripts.constants import (
     INVENTORY_RESULT_FILE_PATH,
 )
 from scripts.netmiko_utils import get_device_inventory
+from scripts.async_transport import async_form, get_device_inventory_async
 from scripts.config_parser import load_yaml
-from utils.network_utils import validate_ip, is_reachable
+from scripts.worker import device_worker
+from scripts.engine import run_device_tasks
+from scripts.result_writer import ResultSink
+from scripts.checkpoint import RunCheckpoint
+from scripts.phases import mark_failed
+from utils.network_utils import validate_ip, is_reachable, select_devices
 from utils.logger_utils import setup_logger
 
 logger = setup_logger("inventory_manager")
 #logger.info("Inventory task started -- 2")
 
-def inventory_task(device, device_type):
-    """Collect inventory from a single device, log result and return status."""
+def _prepare(device):
+    """Start the result of a device; returns (result, ready), not ready when the device cannot be reached."""
     ip = device.get("host")
     device_name = device.get("name", "UNKNOWN")
     logger.info(f"Starting inventory collection for {device_name}")
@@ -38,26 +42,63 @@ def inventory_task(device, device_type):
         msg = f"Invalid IP address for device {device_name}: {ip}"
         logger.error(msg)
         result["output"] = msg
-        return result
+        return result, False
 
     if not is_reachable(ip):
         msg = f"Device not reachable for device {device_name}: {ip}"
         logger.error(msg)
         result["output"] = msg
+        return result, False
+    return result, True
+
+def _succeeded(result, inventory):
+    result["status"] = "SUCCESS"
+    result["output"] = inventory
+    logger.info(f"Inventory SUCCESS: {result['device']} ({result['host']})")
+
+def _failed(result, exc):
+    mark_failed(result, exc)
+    logger.error(f"Inventory {result['status']}: {result['device']} ({result['host']}): {exc}")
+
+def inventory_task(device, device_type):
+    """Collect inventory from a single device, log result and return status."""
+    result, ready = _prepare(device)
+    if not ready:
         return result
 
     try:
-        inventory = get_device_inventory(device, device_type)
-        result["status"] = "SUCCESS"
-        result["output"] = inventory
-        logger.info(f"Inventory SUCCESS: {device_name} ({ip})")
+        _succeeded(result, get_device_inventory(device, device_type))
     except Exception as e:
-        result["output"] = str(e)
-        logger.error(f"Inventory FAILED: {device_name} ({ip}): {e}")
+        _failed(result, e)
 
     return result
 
-def main():
+@async_form(inventory_task)
+async def inventory_task_async(device, device_type):
+    """inventory_task on the asyncio engine, over asyncssh."""
+    result, ready = _prepare(device)
+    if not ready:
+        return result
+
+    try:
+        _succeeded(result, await get_device_inventory_async(device, device_type))
+    except Exception as e:
+        _failed(result, e)
+
+    return result
+
+def build_jobs(devices):
+    """Return (task_func, device, args) jobs for the inventory task."""
+    return [
+        (inventory_task, device, (GROUP_TO_DEVICE_TYPE.get(device.get("group")),))
+        for device in devices if GROUP_TO_DEVICE_TYPE.get(device.get("group"))
+    ]
+
+def open_result_sink():
+    """Return a sink streaming inventory results to INVENTORY_RESULT_FILE_PATH."""
+    return ResultSink(INVENTORY_RESULT_FILE_PATH)
+
+def main(engine=None, run_id=None, retry_failed=False, device_names=None, on_result=None):
     """Main entry for inventory collection using multithreading."""
     config = load_yaml(CONFIG_FILE_PATH)
     thread_params = config.get("thread_pools", {})
@@ -65,25 +106,31 @@ def main():
 
     devices_yaml = load_yaml(DEVICES_FILE_PATH)
     devices = devices_yaml.get("devices", [])
+    devices = select_devices(devices, device_names, logger)
     if not devices:
         logger.error("No devices found for inventory collection.")
         return
 
     #logger.info("Inventory task started -- 3")
     os.makedirs(INVENTORY_FOLDER_PATH, exist_ok=True)
-    results = []
-    with ThreadPoolExecutor(max_workers=num_threads) as executor:
-        futures = [
-            executor.submit(inventory_task, device, GROUP_TO_DEVICE_TYPE.get(device.get("group")))
-            for device in devices if GROUP_TO_DEVICE_TYPE.get(device.get("group"))
-        ]
-        for future in as_completed(futures):
-            results.append(future.result())
-        #logger.info("Inventory task started -- 4")
-
-    with open(INVENTORY_RESULT_FILE_PATH, "w") as f:
-        yaml.dump(results, f, default_flow_style=False, allow_unicode=True)
-    logger.info(f"Inventory results written to {INVENTORY_RESULT_FILE_PATH}")
+    # A run_id resumes that run: devices it already finished are skipped
+    checkpoint = RunCheckpoint(["inventory"], run_id)
+    devices, kept = checkpoint.pending(devices, retry_failed)
+
+    sink = open_result_sink()
+    for result in kept:
+        sink.write(result)
+    try:
+        run_device_tasks(
+            build_jobs(devices), num_threads, engine=engine, worker=device_worker, task="inventory",
+            on_result=checkpoint.recorder(sink.write, on_result),
+        )
+        checkpoint.complete()
+    finally:
+        # Also on Ctrl-C or a crash: keep every result that completed
+        sink.finalize()
+        checkpoint.close()
+        logger.info(f"Inventory results written to {INVENTORY_RESULT_FILE_PATH}")
 
 if __name__ == "__main__":
     main()
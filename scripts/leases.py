@@ -0,0 +1,357 @@
+# scripts/leases.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import asyncio
+import contextvars
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+
+from filelock import FileLock, Timeout
+
+from scripts.constants import CONFIG_FILE_PATH, LEASES_FOLDER_PATH
+from scripts.config_parser import load_yaml
+from scripts.phases import TaskTimeout, is_cancelled, phase
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("leases")
+
+
+def _safe_name(name):
+    return re.sub(r"[^\w.-]", "_", str(name))
+
+
+def pid_alive(pid):
+    """True while a process with this pid runs on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# (manager, device) of the lease held by the current job, for the session pool
+_current = contextvars.ContextVar("lease", default=None)
+
+
+class _Held:
+    """The locks of a device lease held by this process."""
+
+    def __init__(self, device_lock):
+        self.device_lock = device_lock
+        self.slot_lock = None
+        # True while a job works on the device
+        self.active = True
+        # Pooled sessions still logged in to the device: token -> callable closing it
+        self.parked = {}
+
+
+class LeaseManager:
+    """
+    Host-local leases shared by every NetPilot process (GUI, TUIs, CLI, cron).
+
+    - One lease per device: a device is worked on by one job at a time.
+    - max_sessions slots: at most that many devices are worked on, or have
+      a session logged in, at once across all processes on this host.
+
+    Leases are OS file locks in LEASES_FOLDER_PATH, so they are released even
+    when a process dies. Jobs waiting for a lease queue (polling every
+    poll_interval seconds) instead of failing. Each held lock has a
+    .holder file describing who holds it, see holders().
+
+    A session parked in the session pool keeps the lease and slot of its
+    device (see park()), so no other process logs in to the device while it
+    is open. The next job of this process on the device takes the lease over;
+    a job waiting for a slot closes an idle parked session of this process.
+    """
+
+    def __init__(self, folder=LEASES_FOLDER_PATH, max_sessions=100, poll_interval=0.5):
+        self.folder = folder
+        self.max_sessions = max_sessions
+        self.poll_interval = poll_interval
+        # device -> _Held, leases of this process
+        self._held = {}
+        self._mutex = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def _holder_path(self, lock_path):
+        return f"{lock_path}.holder"
+
+    def _write_holder(self, lock_path, device, task):
+        holder = {
+            "pid": os.getpid(),
+            "hostname": socket.gethostname(),
+            "program": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python",
+            "thread": threading.current_thread().name,
+            "device": device,
+            "task": task,
+            "since": datetime.now().isoformat(timespec="seconds"),
+        }
+        with open(self._holder_path(lock_path), "w") as f:
+            json.dump(holder, f)
+
+    def _read_holder(self, lock_path):
+        try:
+            with open(self._holder_path(lock_path), "r") as f:
+                holder = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return holder if pid_alive(holder.get("pid", -1)) else None
+
+    def _release(self, lock, lock_path):
+        try:
+            os.remove(self._holder_path(lock_path))
+        except FileNotFoundError:
+            pass
+        lock.release()
+
+    def _check_cancelled(self, what):
+        if is_cancelled():
+            raise TaskTimeout("lease", f"run deadline reached while waiting for {what}")
+
+    def _wait(self, what):
+        """Sleep one poll interval; raise TaskTimeout once the run is cancelled."""
+        self._check_cancelled(what)
+        time.sleep(self.poll_interval)
+
+    async def _wait_async(self, what):
+        self._check_cancelled(what)
+        await asyncio.sleep(self.poll_interval)
+
+    def _poll(self, steps):
+        """Run a _take() generator, sleeping one poll interval each time it yields what it waits for."""
+        try:
+            what = next(steps)
+            while True:
+                try:
+                    self._wait(what)
+                except BaseException as e:
+                    what = steps.throw(e)
+                else:
+                    what = next(steps)
+        except StopIteration as done:
+            return done.value
+
+    async def _poll_async(self, steps):
+        """_poll() for coroutines: waiting does not block the event loop."""
+        try:
+            what = next(steps)
+            while True:
+                try:
+                    await self._wait_async(what)
+                except BaseException as e:
+                    what = steps.throw(e)
+                else:
+                    what = next(steps)
+        except StopIteration as done:
+            return done.value
+
+    def _lock(self, lock_path):
+        # Released by whichever thread ends the lease: the job, or the pool closing a parked session
+        return FileLock(lock_path, thread_local=False)
+
+    def _take_device(self, device, task):
+        """
+        Take the device lease, from an idle parked session of this process
+        or from its lock file. Generator: yields while the lease is held
+        elsewhere, returns the _Held entry.
+        """
+        lock_path = os.path.join(self.folder, f"device-{_safe_name(device)}.lock")
+        lock = self._lock(lock_path)
+        logged = False
+        while True:
+            with self._mutex:
+                held = self._held.get(device)
+                if held is not None and not held.active:
+                    held.active = True
+                    self._write_holder(lock_path, device, task)
+                    return held
+                if held is None:
+                    try:
+                        lock.acquire(timeout=0)
+                    except Timeout:
+                        pass
+                    else:
+                        self._held[device] = held = _Held((lock, lock_path))
+                        self._write_holder(lock_path, device, task)
+                        return held
+            if not logged:
+                holder = self._read_holder(lock_path) or {}
+                logger.info(
+                    f"Waiting for lease on {device}, held by {holder.get('program', '?')} "
+                    f"(pid {holder.get('pid', '?')}, task {holder.get('task', '?')})"
+                )
+                logged = True
+            yield f"the lease on {device}"
+
+    def _close_parked(self):
+        """Close one idle parked session of this process to free its slot. Returns False if there is none."""
+        with self._mutex:
+            for held in self._held.values():
+                if not held.active and held.parked and held.slot_lock is not None:
+                    close = next(iter(held.parked.values()))
+                    break
+            else:
+                return False
+        close()
+        return True
+
+    def _acquire_slot(self, device, task):
+        """Take a free session slot. Generator: yields while all slots are busy."""
+        logged = False
+        while True:
+            for slot in range(self.max_sessions):
+                lock_path = os.path.join(self.folder, f"slot-{slot}.lock")
+                lock = self._lock(lock_path)
+                try:
+                    lock.acquire(timeout=0)
+                except Timeout:
+                    continue
+                self._write_holder(lock_path, device, task)
+                return lock, lock_path
+            if self._close_parked():
+                continue
+            if not logged:
+                logger.info(f"All {self.max_sessions} session slots busy, {device} is queued")
+                logged = True
+            yield "a session slot"
+
+    def _free(self, device, held):
+        """Release the locks of a lease neither a job nor a parked session uses (mutex held)."""
+        if held.active:
+            return
+        if held.parked:
+            self._write_holder(held.device_lock[1], device, "idle session")
+            return
+        del self._held[device]
+        if held.slot_lock is not None:
+            self._release(*held.slot_lock)
+        self._release(*held.device_lock)
+
+    def _take(self, device, task):
+        """Take the device lease and a session slot (a generator, run by _poll or _poll_async)."""
+        held = yield from self._take_device(device, task)
+        try:
+            if held.slot_lock is None:
+                held.slot_lock = yield from self._acquire_slot(device, task)
+        except BaseException:
+            with self._mutex:
+                held.active = False
+                self._free(device, held)
+            raise
+        return held
+
+    @contextmanager
+    def _holding(self, device, held):
+        token = _current.set((self, device))
+        try:
+            yield
+        finally:
+            _current.reset(token)
+            with self._mutex:
+                held.active = False
+                self._free(device, held)
+
+    @contextmanager
+    def lease(self, device, task=None):
+        """Hold the device lease and one session slot for the duration of the block."""
+        with phase("lease"):
+            held = self._poll(self._take(device, task))
+        with self._holding(device, held):
+            yield
+
+    @asynccontextmanager
+    async def lease_async(self, device, task=None):
+        """lease() for coroutines: waiting for the lease does not block the event loop."""
+        with phase("lease"):
+            held = await self._poll_async(self._take(device, task))
+        with self._holding(device, held):
+            yield
+
+    def park(self, device, token, close):
+        """
+        Keep the lease of device while a pooled session (token) stays logged
+        in; close() logs it out. Called inside lease(); returns False when
+        the device is not leased by this process.
+        """
+        with self._mutex:
+            held = self._held.get(device)
+            if held is None:
+                return False
+            held.parked[token] = close
+            return True
+
+    def unpark(self, device, token):
+        """The parked session token was taken from the pool or closed: release the lease if unused."""
+        with self._mutex:
+            held = self._held.get(device)
+            if held is None or held.parked.pop(token, None) is None:
+                return
+            self._free(device, held)
+
+    def holders(self):
+        """Return the holder of every lease currently held on this host."""
+        holders = []
+        for name in sorted(os.listdir(self.folder)):
+            if not name.endswith(".lock"):
+                continue
+            holder = self._read_holder(os.path.join(self.folder, name))
+            if holder:
+                holders.append({"lease": name[:-len(".lock")], **holder})
+        return holders
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_lease_manager():
+    """Return the process-wide LeaseManager, or None when leases.enabled is false."""
+    global _manager
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("leases", {})
+    if not params.get("enabled", False):
+        return None
+    with _manager_lock:
+        if _manager is None:
+            _manager = LeaseManager(
+                max_sessions=params.get("max_sessions", 100),
+                poll_interval=params.get("poll_interval", 0.5),
+            )
+        return _manager
+
+
+def current_lease():
+    """Return (manager, device) of the lease the current job holds, or None."""
+    return _current.get()
+
+
+@contextmanager
+def device_lease(device, task=None):
+    """Hold the lease of a device dict while the block runs (no-op when leases are disabled)."""
+    manager = get_lease_manager()
+    if manager is None:
+        yield
+        return
+    with manager.lease(device.get("name") or device.get("host"), task):
+        yield
+
+
+@asynccontextmanager
+async def device_lease_async(device, task=None):
+    """device_lease() for coroutines (asyncio engine)."""
+    manager = get_lease_manager()
+    if manager is None:
+        yield
+        return
+    async with manager.lease_async(device.get("name") or device.get("host"), task):
+        yield
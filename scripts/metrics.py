@@ -0,0 +1,147 @@
+# scripts/metrics.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import bisect
+import os
+import threading
+from collections import defaultdict
+
+from scripts import events
+from scripts.constants import CONFIG_FILE_PATH, DEVICES_FILE_PATH, GROUP_TO_DEVICE_TYPE
+from scripts.config_parser import load_yaml
+
+# Histogram bucket upper bounds in seconds (overridden by metrics.buckets)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# name -> (type, help)
+METRICS = {
+    "netpilot_phase_seconds": ("histogram", "Duration of device task phases (probe, lease, connect, enable, command, save_config, write_files)."),
+    "netpilot_device_seconds": ("histogram", "Duration of a device task, retries included."),
+    "netpilot_device_results_total": ("counter", "Finished devices by result status."),
+    "netpilot_phase_timeouts_total": ("counter", "Phases that timed out."),
+    "netpilot_retries_total": ("counter", "Device task retries."),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label_value(value):
+    return str("" if value is None else value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in labels) + "}"
+
+
+class MetricsCollector:
+    """
+    Event bus subscriber aggregating phase and device durations into
+    histograms and results, timeouts and retries into counters, labelled by
+    task, group and device_type (from devices.yaml). With task set, only
+    events of that task are counted.
+    """
+
+    def __init__(self, task=None, buckets=DEFAULT_BUCKETS):
+        self.task = task
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._counters = defaultdict(float)
+        self._lock = threading.Lock()
+        self._groups = None
+
+    def _labels(self, event, **extra):
+        if self._groups is None:
+            devices = (load_yaml(DEVICES_FILE_PATH) or {}).get("devices", [])
+            self._groups = {device.get("name"): device.get("group") for device in devices}
+        group = self._groups.get(event.get("device"))
+        labels = [("task", event.get("task")), ("group", group), ("device_type", GROUP_TO_DEVICE_TYPE.get(group))]
+        return tuple(labels + sorted(extra.items()))
+
+    def _observe(self, name, labels, value):
+        key = (name, labels)
+        if key not in self._histograms:
+            self._histograms[key] = Histogram(self.buckets)
+        self._histograms[key].observe(value)
+
+    def __call__(self, event):
+        if self.task is not None and event.get("task") != self.task:
+            return
+        kind = event["event"]
+        with self._lock:
+            if kind == "phase_finished":
+                labels = self._labels(event, phase=event["phase"])
+                self._observe("netpilot_phase_seconds", labels, event["duration"])
+                if event.get("outcome") == "timeout":
+                    self._counters[("netpilot_phase_timeouts_total", labels)] += 1
+            elif kind == "device_finished":
+                if event.get("duration") is not None:
+                    self._observe("netpilot_device_seconds", self._labels(event), event["duration"])
+                self._counters[("netpilot_device_results_total", self._labels(event, status=event["status"]))] += 1
+            elif kind == "device_retry":
+                self._counters[("netpilot_retries_total", self._labels(event))] += 1
+
+    def start(self):
+        events.subscribe(self, ["phase_finished", "device_finished", "device_retry"])
+        return self
+
+    def stop(self):
+        events.unsubscribe(self)
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (metric, labels), value in sorted(self._counters.items(), key=str):
+                        if metric == name:
+                            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                    continue
+                for (metric, labels), histogram in sorted(self._histograms.items(), key=lambda item: str(item[0])):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to path atomically (node_exporter textfile collector friendly)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(self.render())
+        os.replace(f"{path}.tmp", path)
+
+
+def start_run_metrics(task):
+    """
+    Return a started MetricsCollector for the runs of task, or None when
+    metrics.enabled is false in config.yaml.
+    """
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("metrics", {})
+    if not params.get("enabled", False):
+        return None
+    return MetricsCollector(task, params.get("buckets") or DEFAULT_BUCKETS).start()
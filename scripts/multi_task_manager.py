@@ -0,0 +1,138 @@
+# multi_task_manager.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import os
+import importlib
+
+from scripts.constants import (
+    CONFIG_FILE_PATH,
+    DEVICES_FILE_PATH,
+    GROUP_TO_DEVICE_TYPE,
+    BACKUP_FOLDER_PATH,
+    INVENTORY_FOLDER_PATH,
+    PIPELINE_TASK_ORDER,
+)
+from scripts.netmiko_utils import shared_session
+from scripts.worker import device_worker
+from scripts.engine import run_device_tasks
+from scripts.checkpoint import RunCheckpoint
+from scripts.config_parser import load_yaml
+from utils.network_utils import validate_devices, select_devices
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("multi_task_manager")
+
+TASK_MODULES = {
+    "config": "scripts.config_manager",
+    "backup": "scripts.backup_manager",
+    "inventory": "scripts.inventory_manager",
+    "firmware": "scripts.firmware_manager",
+}
+
+
+def get_task_module(task):
+    """Import and return the manager module of a task."""
+    return importlib.import_module(TASK_MODULES[task])
+
+
+def order_tasks(tasks):
+    """Return the selected tasks in PIPELINE_TASK_ORDER, without duplicates."""
+    unknown = [task for task in tasks if task not in PIPELINE_TASK_ORDER]
+    if unknown:
+        raise ValueError(f"Unsupported task(s): {', '.join(unknown)}")
+    return [task for task in PIPELINE_TASK_ORDER if task in tasks]
+
+
+def pipeline_task(device, device_type, task_jobs):
+    """
+    Run several tasks on one device over a single login.
+    task_jobs is a list of (task, task_func, args); returns {task: result}.
+    """
+    results = {}
+    with shared_session():
+        for task, task_func, args in task_jobs:
+            results[task] = device_worker(task_func, device, *args)
+    return results
+
+
+def build_jobs(devices, tasks, device_tasks=None):
+    """
+    Return one pipeline job per device covering every selected task.
+    device_tasks maps a device name to the only tasks it runs (a resumed
+    run retrying the failed tasks of a device).
+    """
+    device_tasks = device_tasks or {}
+    jobs_by_task = {}
+    for task in tasks:
+        jobs_by_task[task] = {
+            job_device["name"]: (task, task_func, args)
+            for task_func, job_device, args in get_task_module(task).build_jobs(devices)
+        }
+
+    jobs = []
+    for device in devices:
+        device_type = GROUP_TO_DEVICE_TYPE.get(device.get("group"))
+        selected = device_tasks.get(device["name"], tasks)
+        task_jobs = [
+            jobs_by_task[task][device["name"]]
+            for task in tasks if task in selected and device["name"] in jobs_by_task[task]
+        ]
+        if device_type and task_jobs:
+            jobs.append((pipeline_task, device, (device_type, task_jobs)))
+    return jobs
+
+
+def main(tasks, engine=None, run_id=None, retry_failed=False, device_names=None, on_result=None):
+    """
+    Run the selected tasks as a per-device pipeline: devices.yaml is read and
+    validated once, each device is logged into once, and every task still
+    streams its own result file. A run_id resumes that run; with
+    retry_failed only the tasks that failed on a device run again.
+    device_names limits the run to those devices and on_result, when
+    given, is called with each {task: result} as its device finishes.
+    """
+    tasks = order_tasks(tasks)
+
+    config = load_yaml(CONFIG_FILE_PATH)
+    thread_params = config.get("thread_pools", {})
+    num_threads = thread_params.get("num_threads", 5)
+
+    devices_yaml = load_yaml(DEVICES_FILE_PATH)
+    devices = devices_yaml.get("devices", [])
+    devices = select_devices(devices, device_names, logger)
+
+    devices = validate_devices(devices, logger)
+    if not devices:
+        logger.error("No valid devices found. Exiting.")
+        return
+
+    os.makedirs(BACKUP_FOLDER_PATH, exist_ok=True)
+    os.makedirs(INVENTORY_FOLDER_PATH, exist_ok=True)
+
+    checkpoint = RunCheckpoint(tasks, run_id)
+    devices, kept = checkpoint.pending(devices, retry_failed)
+
+    sinks = {task: get_task_module(task).open_result_sink() for task in tasks}
+
+    def write_device_results(device_results):
+        for task, result in device_results.items():
+            sinks[task].write(result)
+
+    for device_results in kept:
+        write_device_results(device_results)
+    try:
+        run_device_tasks(
+            build_jobs(devices, tasks, checkpoint.retry_tasks), num_threads, engine=engine, task="+".join(tasks),
+            on_result=checkpoint.recorder(write_device_results, on_result),
+        )
+        checkpoint.complete()
+    finally:
+        # Also on Ctrl-C or a crash: keep every result that completed
+        checkpoint.close()
+        for task, sink in sinks.items():
+            sink.finalize()
+            logger.info(f"{task.capitalize()} results written to {sink.result_path}")
+
+if __name__ == "__main__":
+    main(["backup", "inventory"])
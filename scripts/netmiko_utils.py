@@ -1,10 +1,15 @@
 import os
 import hashlib
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from datetime import time as t
 from netmiko import ConnectHandler, file_transfer
-from time import sleep
+from netmiko.exceptions import ReadTimeout
+from time import sleep, monotonic
 from scripts.constants import (
+    CONFIG_FILE_PATH,
+    READ_ONLY_COMMANDS,
     BACKUP_FOLDER_PATH,
     INVENTORY_COMMANDS_PATHS,
     BACKUP_COMMANDS_PATHS,
@@ -12,20 +17,16 @@ from scripts.constants import (
     FIRMWARE_CONFIG_PATH,
     SUPPORTED_DEVICE_TYPES,
 )
-from scripts.config_parser import load_yaml
+from scripts.config_parser import load_yaml, load_command_file
+from scripts.session_pool import get_session_pool, open_session
+from scripts.phases import TaskTimeout, phase, phase_timeout, remaining_time
 from utils.credentials_utils import load_credentials
 from utils.logger_utils import setup_logger
 
 def load_commands_from_file(file_path):
     """Loads commands from a file, ignoring empty lines and comments."""
 
-    commands = []
-    with open(file_path, "r") as f:
-        for line in f:
-            cmd = line.strip()
-            if cmd and not cmd.startswith("!"):
-                commands.append(cmd)
-    return commands
+    return load_command_file(file_path)
 
 
 def _get_md5sum(file_path):
@@ -100,60 +101,283 @@ def _get_reload_time(hour, minute, reload_times):
         return after
 
 
-def get_device_inventory(device, device_type):
-    """Retrieves the inventory information from a network device using Netmiko."""
-
-    commands_file = INVENTORY_COMMANDS_PATHS.get(device_type)
-    if not commands_file:
-        raise ValueError(f"No inventory commands file for device type {device_type}")
-    commands = load_commands_from_file(commands_file)
+def _connection_params(device, device_type):
+    """Build Netmiko connection parameters for a device from credentials.yaml."""
 
     username, password, enable_secret = load_credentials(CREDENTIALS_FILE_PATH, device.get("name", device["host"]))
-    connection_params = {
+    return {
         "device_type": device_type,
         "host": device["host"],
         "username": username,
         "password": password,
         "secret": enable_secret if enable_secret else password,
+        "conn_timeout": phase_timeout("connect"),
+        "banner_timeout": phase_timeout("auth"),
+        "auth_timeout": phase_timeout("auth"),
     }
 
+
+def _acquire_session(connection_params):
+    """Open (or take from the pool) an enabled session."""
+
+    pool = get_session_pool()
+    if pool is not None:
+        return pool.acquire(connection_params)
+    return open_session(connection_params)
+
+
+def _release_session(net_connect, connection_params, healthy=True):
+    """Return a session to the pool, or close it when pooling is disabled."""
+
+    pool = get_session_pool()
+    if pool is not None:
+        pool.release(net_connect, connection_params, healthy=healthy)
+    else:
+        net_connect.disconnect()
+
+
+def prewarm_session(device, device_type):
+    """
+    Open and authenticate a session for the device and park it in the
+    session pool, where the next device_session() call picks it up.
+    Returns False when the session pool is disabled.
+    """
+
+    pool = get_session_pool()
+    if pool is None:
+        return False
+    connection_params = _connection_params(device, device_type)
+    pool.release(pool.acquire(connection_params), connection_params)
+    return True
+
+
+# Sessions kept open by shared_session() for the current worker thread
+_shared = threading.local()
+
+
+@contextmanager
+def shared_session():
+    """
+    Keep the session of every device_session() call inside the block open
+    until the block ends, so several tasks run over a single login.
+    """
+    _shared.sessions = {}
+    try:
+        yield
+    finally:
+        sessions, _shared.sessions = _shared.sessions, None
+        for net_connect, connection_params in sessions.values():
+            _release_session(net_connect, connection_params)
+
+
+@contextmanager
+def device_session(device, device_type):
+    """
+    Yield an enabled Netmiko session for the device.
+    Sessions come from the shared pool when it is enabled, otherwise a
+    dedicated connection is opened and closed around the block. Inside
+    shared_session() the same session is reused by every call.
+    """
+    shared = getattr(_shared, "sessions", None)
+    key = (device["host"], device_type)
+    if shared is not None and key in shared:
+        net_connect, connection_params = shared[key]
+    else:
+        connection_params = _connection_params(device, device_type)
+        net_connect = _acquire_session(connection_params)
+        if shared is not None:
+            shared[key] = (net_connect, connection_params)
+
+    try:
+        yield net_connect
+    except Exception:
+        # Session state is unknown after a failure, never reuse it
+        if shared is not None:
+            shared.pop(key, None)
+        _release_session(net_connect, connection_params, healthy=False)
+        raise
+    if shared is None:
+        _release_session(net_connect, connection_params)
+
+
+def _is_read_only(cmd):
+    """Return True if the command only reads state from the device."""
+
+    return cmd.split()[0].lower() in READ_ONLY_COMMANDS
+
+
+def _split_batched_output(raw_output, prompt, commands):
+    """
+    Split the output of commands written in one go back into per-command
+    sections. Each section starts at a line beginning with the prompt followed
+    by the command echo and ends at the next prompt.
+    Returns None while output is still incomplete and raises ValueError if the
+    echoed commands do not line up with the commands sent.
+    """
+
+    lines = raw_output.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    sections = []
+    for line in lines:
+        if line.startswith(prompt):
+            sections.append([line[len(prompt):].strip(), []])
+        elif sections:
+            sections[-1][1].append(line)
+
+    # The last section may still be arriving, every earlier one must match
+    complete = sections[:-1]
+    if len(complete) > len(commands):
+        raise ValueError(f"Received {len(complete)} command sections for {len(commands)} commands")
+    for (echo, _), cmd in zip(complete, commands):
+        if echo != cmd:
+            raise ValueError(f"Unexpected command echo '{echo}', expected '{cmd}'")
+
+    # Done once the prompt is back after the last command with nothing typed
+    if len(complete) < len(commands) or sections[-1][0] or any(sections[-1][1]):
+        return None
+    return ["\n".join(body).strip("\n") for _, body in complete]
+
+
+def _clamp(seconds):
+    """Cap a timeout to the time left before the run deadline."""
+    remaining = remaining_time()
+    return seconds if remaining is None else min(seconds, remaining)
+
+
+def _drain_channel(net_connect, prompt, timeout, quiet=1.0):
+    """
+    Discard what the device still sends for an abandoned batch: write a
+    newline, then read until the output ends with the prompt and nothing
+    more arrived for quiet seconds. Returns False if the device did not
+    settle within timeout.
+    """
+
+    net_connect.write_channel(net_connect.RETURN)
+    output = ""
+    deadline = monotonic() + timeout
+    last_data = monotonic()
+    while monotonic() < deadline:
+        data = net_connect.read_channel()
+        if data:
+            output += data
+            last_data = monotonic()
+        elif output.rstrip().endswith(prompt) and monotonic() - last_data >= quiet:
+            return True
+        sleep(0.05)
+    return False
+
+
+def send_commands_batched(net_connect, commands, read_timeout=120):
+    """
+    Write all commands to the channel in a single write and read until every
+    command has returned to the prompt. Returns the outputs in command order.
+    Raises ValueError on unexpected command echoes once the device is back
+    at its prompt, and ReadTimeout if it never gets there.
+    """
+
+    prompt = net_connect.find_prompt()
+    net_connect.write_channel(net_connect.RETURN.join(commands) + net_connect.RETURN)
+
+    raw_output = ""
+    deadline = monotonic() + read_timeout
+    while monotonic() < deadline:
+        raw_output += net_connect.read_channel()
+        try:
+            # find_prompt() consumed the first prompt, put it back for the splitter
+            outputs = _split_batched_output(prompt + raw_output, prompt, commands)
+        except ValueError:
+            # The device may still be running the rest of the batch: its
+            # output must not be read as the output of the next command
+            if not _drain_channel(net_connect, prompt, max(deadline - monotonic(), 0)):
+                raise ReadTimeout("Device still sending output of a batch with unexpected echoes")
+            raise
+        if outputs is not None:
+            return outputs
+        sleep(0.05)
+    raise ReadTimeout(f"Timed out after {read_timeout}s waiting for batched command output")
+
+
+def run_show_commands(net_connect, commands):
+    """
+    Run read-only commands and return a list of (command, output) pairs.
+    When command_batching is enabled in config.yaml and every command is
+    read-only, all commands are sent in one channel write; otherwise each
+    command waits for its own prompt.
+    """
+
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    batching = config.get("command_batching", {})
+    if batching.get("enabled", False) and len(commands) > 1 and all(_is_read_only(c) for c in commands):
+        try:
+            with phase("command"):
+                outputs = send_commands_batched(net_connect, commands, _clamp(batching.get("read_timeout", 120)))
+            return list(zip(commands, outputs))
+        except ValueError as e:
+            # The channel was drained back to the prompt before ValueError was raised
+            setup_logger("netmiko_utils").warning(
+                f"Batched commands failed on {net_connect.host}, falling back to sequential: {e}"
+            )
+
+    outputs = []
+    for cmd in commands:
+        # One phase per command: the timeout applies to each command
+        with phase("command", net_connect):
+            outputs.append((cmd, net_connect.send_command(cmd, expect_string=r"#")))
+    return outputs
+
+
+def inventory_commands(device_type):
+    """Return the inventory commands of a device type."""
+
+    commands_file = INVENTORY_COMMANDS_PATHS.get(device_type)
+    if not commands_file:
+        raise ValueError(f"No inventory commands file for device type {device_type}")
+    return load_commands_from_file(commands_file)
+
+
+def format_inventory(outputs):
+    """Join (command, output) pairs into the inventory text of a device."""
+
     all_output = ""
-    with ConnectHandler(**connection_params) as net_connect:
-        net_connect.enable()
-        for cmd in commands:
-            output = net_connect.send_command(cmd, expect_string=r"#")
-            all_output += f"\n\n> {cmd}\n{output}"
+    for cmd, output in outputs:
+        all_output += f"\n\n> {cmd}\n{output}"
     print(f"All inputs:\n{all_output.strip()}")
     return all_output.strip()
 
 
+def get_device_inventory(device, device_type):
+    """Retrieves the inventory information from a network device using Netmiko."""
+
+    commands = inventory_commands(device_type)
+    with device_session(device, device_type) as net_connect:
+        return format_inventory(run_show_commands(net_connect, commands))
+
+
 def push_config_to_device(device, commands, device_type):
     """Push configuration commands to a network device using Netmiko."""
-    
-    username, password, enable_secret = load_credentials(CREDENTIALS_FILE_PATH, device.get("name", device["host"]))
-    connection_params = {
-        "device_type": device_type,
-        "host": device["host"],
-        "username": username,
-        "password": password,
-        "secret": enable_secret if enable_secret else password,
-    }
+
     output = ""
-    with ConnectHandler(**connection_params) as net_connect:
-        net_connect.enable()
-        output += net_connect.send_config_set(commands)
-        output += "\n" + net_connect.save_config()
+    with device_session(device, device_type) as net_connect:
+        with phase("command", net_connect):
+            output += net_connect.send_config_set(commands)
+        with phase("save_config", net_connect):
+            output += "\n" + net_connect.save_config()
     return output
 
 
-def backup_device_config(device, device_type):
-    """
-    Backs up device config using Netmiko and commands from BACKUP_COMMANDS_PATHS.
-    """
+def backup_commands(device_type):
+    """Return the backup commands of a device type."""
+
     commands_file = BACKUP_COMMANDS_PATHS.get(device_type)
     if not commands_file:
         raise ValueError(f"No backup commands file for device type {device_type}")
-    commands = load_commands_from_file(commands_file)
+    return load_commands_from_file(commands_file)
+
+
+def write_backup_files(device, outputs):
+    """
+    Write one backup file per (command, output) pair in BACKUP_FOLDER_PATH.
+    Returns the list of files and the combined output.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     base_name = device.get("name", device["host"])
     output_dir = BACKUP_FOLDER_PATH
@@ -161,44 +385,34 @@ def backup_device_config(device, device_type):
     files = []
     output = ""
 
-    username, password, enable_secret = load_credentials(CREDENTIALS_FILE_PATH, device.get("name", device["host"]))
-    connection_params = {
-        "device_type": device_type,
-        "host": device["host"],
-        "username": username,
-        "password": password,
-        "secret": enable_secret if enable_secret else password,
-    }
-
-    with ConnectHandler(**connection_params) as net_connect:
-        net_connect.enable()
-        for cmd in commands:
-            cmd_output = net_connect.send_command(cmd, expect_string=r"#")
-            fname_part = cmd.replace(" ", "_").replace("/", "_")
-            filename = f"{base_name}_{fname_part}_{timestamp}.txt"
-            file_path = os.path.join(output_dir, filename)
-            with open(file_path, "w") as f:
-                f.write(cmd_output)
-            files.append(file_path)
-            output += f"\n> {cmd}\n{cmd_output}"
+    for cmd, cmd_output in outputs:
+        fname_part = cmd.replace(" ", "_").replace("/", "_")
+        filename = f"{base_name}_{fname_part}_{timestamp}.txt"
+        file_path = os.path.join(output_dir, filename)
+        with phase("write_files"), open(file_path, "w") as f:
+            f.write(cmd_output)
+        files.append(file_path)
+        output += f"\n> {cmd}\n{cmd_output}"
     return files, output.strip()
 
 
+def backup_device_config(device, device_type):
+    """
+    Backs up device config using Netmiko and commands from BACKUP_COMMANDS_PATHS.
+    """
+    commands = backup_commands(device_type)
+    with device_session(device, device_type) as net_connect:
+        return write_backup_files(device, run_show_commands(net_connect, commands))
+
+
 def detect_device_vendor(device):
     """
     Detect device vendor by running 'show version' or equivalent.
     Returns string: 'arista', 'cisco', etc.
     """
     try:
-        username, password, enable_secret = load_credentials(CREDENTIALS_FILE_PATH, device.get("name", device["host"]))
         for device_type in SUPPORTED_DEVICE_TYPES:
-            connection_params = {
-                "device_type": device_type,
-                "host": device["host"],
-                "username": username,
-                "password": password,
-                "secret": enable_secret if enable_secret else password,
-            }
+            connection_params = _connection_params(device, device_type)
             try:
                 with ConnectHandler(**connection_params) as net_connect:
                     out = net_connect.send_command("show version", expect_string=r"#|>")
@@ -276,48 +490,42 @@ def arista_firmware_procedure(device, config, logger):
         print("Local firmware MD5 mismatch! Check your firmware file or hash.")
         return
 
-    username, password, enable_secret = load_credentials(CREDENTIALS_FILE_PATH, device.get("name", device["host"]))
-    connection_params = {
-        "device_type": "arista_eos",
-        "host": device["host"],
-        "username": username,
-        "password": password,
-        "secret": enable_secret if enable_secret else password,
-    }
-
     try:
-        with ConnectHandler(**connection_params) as net_connect:
+        with device_session(device, "arista_eos") as net_connect:
             logger.info(f"Connected to {device['name']} ({device['host']})")
 
             # Step 2: Flash usage & cleanup
-            flash_dir = net_connect.send_command("dir flash:")
-            free_mb = _parse_free_space(flash_dir)
-            logger.info(f"Free flash: {free_mb} MB")
-            if free_mb < min_free_mb:
-                old_bins = _parse_old_firmwares(flash_dir, fw_name)
-                for binfile in old_bins:
-                    net_connect.send_command(f"delete flash:{binfile}")
-                    logger.info(f"Deleted old firmware: {binfile}")
-                sleep(3)
+            with phase("command", net_connect):
                 flash_dir = net_connect.send_command("dir flash:")
                 free_mb = _parse_free_space(flash_dir)
+                logger.info(f"Free flash: {free_mb} MB")
                 if free_mb < min_free_mb:
-                    logger.error(f"Not enough free flash on {device['name']}")
-                    print("Insufficient flash space after cleanup!")
-                    return
+                    old_bins = _parse_old_firmwares(flash_dir, fw_name)
+                    for binfile in old_bins:
+                        net_connect.send_command(f"delete flash:{binfile}")
+                        logger.info(f"Deleted old firmware: {binfile}")
+                    sleep(3)
+                    flash_dir = net_connect.send_command("dir flash:")
+                    free_mb = _parse_free_space(flash_dir)
+            if free_mb < min_free_mb:
+                logger.error(f"Not enough free flash on {device['name']}")
+                print("Insufficient flash space after cleanup!")
+                return
 
             # Step 3: Copy firmware if not present
             if fw_name not in flash_dir:
                 logger.info(f"Transferring firmware {fw_name} to device...")
-                transfer_result = file_transfer(
-                    net_connect,
-                    source_file=fw_path,
-                    dest_file=fw_name,
-                    file_system="flash:",
-                    direction="put",
-                    overwrite_file=True,
-                    disable_md5=True,
-                )
+                # No phase timeout: the image transfer runs as long as it needs
+                with phase("transfer"):
+                    transfer_result = file_transfer(
+                        net_connect,
+                        source_file=fw_path,
+                        dest_file=fw_name,
+                        file_system="flash:",
+                        direction="put",
+                        overwrite_file=True,
+                        disable_md5=True,
+                    )
                 if not transfer_result["file_exists"]:
                     logger.error("Firmware file transfer failed.")
                     print("File transfer failed!")
@@ -325,7 +533,8 @@ def arista_firmware_procedure(device, config, logger):
                 logger.info(f"Firmware {fw_name} copied to switch.")
 
             # Step 4: MD5 verify on device
-            output = net_connect.send_command(f"verify /md5 flash:{fw_name}")
+            with phase("command", net_connect):
+                output = net_connect.send_command(f"verify /md5 flash:{fw_name}")
             if expected_md5 not in output:
                 logger.error(f"MD5 mismatch for {fw_name} on {device['name']}")
                 print("MD5 mismatch after copy!")
@@ -333,24 +542,31 @@ def arista_firmware_procedure(device, config, logger):
             logger.info("MD5 hash verified on device.")
 
             # Step 5: Set boot system, save config
-            net_connect.send_config_set([f"boot system flash:{fw_name}"])
-            net_connect.save_config()
+            with phase("command", net_connect):
+                net_connect.send_config_set([f"boot system flash:{fw_name}"])
+            with phase("save_config", net_connect):
+                net_connect.save_config()
             logger.info("Boot system set and config saved.")
 
             # Step 6: Clock check/set
-            hour, minute = _get_switch_time(net_connect)
-            if hour is None:
-                _set_switch_time(net_connect)
+            with phase("command", net_connect):
                 hour, minute = _get_switch_time(net_connect)
+                if hour is None:
+                    _set_switch_time(net_connect)
+                    hour, minute = _get_switch_time(net_connect)
             reload_at = _get_reload_time(hour, minute, reload_times)
             logger.info(f"Scheduled reload at {reload_at}")
 
             # Step 7: Schedule reload
-            net_connect.send_command(f"reload at {reload_at}")
+            with phase("command", net_connect):
+                net_connect.send_command(f"reload at {reload_at}")
             logger.info(f"Reload scheduled at {reload_at} on {device['name']}")
 
             print(f"Firmware successfully upgraded and reload scheduled for {device['name']}")
             logger.info(f"Firmware successfully upgraded on {device['name']}")
+    except TaskTimeout:
+        # Timed out or cancelled: firmware_task reports TIMEOUT, never SUCCESS
+        raise
     except Exception as e:
         logger.error(f"Firmware upgrade failed for {device.get('name','unknown')}: {e}")
         print(f"Error upgrading firmware on {device.get('name','unknown')}: {e}")
@@ -0,0 +1,289 @@
+# scripts/phases.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import contextvars
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from netmiko import NetmikoTimeoutException
+from netmiko.exceptions import ReadTimeout
+
+from scripts import events
+from scripts.constants import CONFIG_FILE_PATH, DEFAULT_PHASE_TIMEOUTS
+from scripts.config_parser import load_yaml
+
+# Exceptions raised by Netmiko, Paramiko and sockets when a read or connect times out
+TIMEOUT_EXCEPTIONS = (NetmikoTimeoutException, ReadTimeout, socket.timeout, TimeoutError)
+
+
+class TaskTimeout(Exception):
+    """A device task exceeded a phase timeout or the run deadline."""
+
+    def __init__(self, phase, message):
+        super().__init__(f"Timeout during {phase}: {message}")
+        self.phase = phase
+
+
+class RunDeadline:
+    """
+    Deadline and per-phase timeouts of one run.
+
+    The engine binds it to every device job; phase() then clamps Netmiko
+    timeouts to the time left and, once cancel() has been called, stops a
+    task at its next phase boundary (cooperative cancellation).
+    """
+
+    def __init__(self, seconds=0, timeouts=None, cancel_grace=30):
+        self.expires = time.monotonic() + seconds if seconds else None
+        # Why the run ends early, used in the results of cancelled devices
+        self.reason = "Run deadline reached"
+        self.timeouts = {**DEFAULT_PHASE_TIMEOUTS, **(timeouts or {})}
+        self.cancel_grace = cancel_grace
+        self.cancelled = threading.Event()
+        self.grace_end = None
+        # device name -> phase it is currently in
+        self.phases = {}
+        # Task name of the run and device name -> start time, for events
+        self.task = None
+        self.started = {}
+
+    @classmethod
+    def from_config(cls):
+        """Build the deadline from the timeouts section of config.yaml."""
+        config = load_yaml(CONFIG_FILE_PATH) or {}
+        params = dict(config.get("timeouts", {}))
+        run = cls(params.pop("run_deadline", 0), params, params.pop("cancel_grace", 30))
+        scope = _scope.get()
+        if scope is not None:
+            scope.add(run)
+        return run
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without a deadline."""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self):
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def cancel(self):
+        """Stop every task at its next phase; stragglers get cancel_grace seconds."""
+        self.grace_end = time.monotonic() + self.cancel_grace
+        self.cancelled.set()
+
+    def stop(self, reason):
+        """End the run now, as if its deadline had been reached."""
+        self.reason = reason
+        self.expires = time.monotonic()
+        self.cancel()
+
+    def wait_timeout(self):
+        """Seconds the engine may wait for results before checking the deadline again."""
+        if self.expires is None:
+            return None
+        end = self.grace_end if self.cancelled.is_set() else self.expires
+        return max(0.0, end - time.monotonic())
+
+    def grace_over(self):
+        """True once cancelled tasks have had cancel_grace seconds to stop."""
+        return self.cancelled.is_set() and time.monotonic() >= self.grace_end
+
+
+class CancelScope:
+    """
+    Stops, from any thread, every run started inside cancel_scope(scope),
+    e.g. the runs of one daemon job. Runs started after cancel() start
+    stopped.
+    """
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.reason = "Run cancelled"
+        self._runs = []
+        self._lock = threading.Lock()
+
+    def add(self, run):
+        with self._lock:
+            self._runs.append(run)
+            if self.cancelled.is_set():
+                run.stop(self.reason)
+
+    def cancel(self, reason="Run cancelled"):
+        with self._lock:
+            self.reason = reason
+            self.cancelled.set()
+            for run in self._runs:
+                run.stop(reason)
+
+    def in_flight(self):
+        """Return {device: current phase or None} of the devices running in the scope's runs."""
+        with self._lock:
+            runs = list(self._runs)
+        devices = {}
+        for run in runs:
+            devices.update(run.phases.copy())
+        return devices
+
+
+_scope = contextvars.ContextVar("scope", default=None)
+_run = contextvars.ContextVar("run", default=None)
+_device = contextvars.ContextVar("device", default=None)
+_phase = contextvars.ContextVar("phase", default=None)
+_entered = contextvars.ContextVar("entered", default=None)
+
+
+@contextmanager
+def bind(run, device_name):
+    """Attach a device job to its run for phase() and phase_timeout()."""
+    run_token, device_token = _run.set(run), _device.set(device_name)
+    try:
+        yield
+    finally:
+        if run is not None:
+            run.phases.pop(device_name, None)
+        _run.reset(run_token)
+        _device.reset(device_token)
+
+
+@contextmanager
+def record_phases():
+    """Collect the names of the phases entered in the block (the list yielded), in order."""
+    entered = []
+    token = _entered.set(entered)
+    try:
+        yield entered
+    finally:
+        _entered.reset(token)
+
+
+def replay_failure(name, exc):
+    """
+    Raise exc as a failure of phase name that already ran elsewhere (the
+    pipeline connect stage), without timing the phase a second time.
+    """
+    entered = _entered.get()
+    if entered is not None:
+        entered.append(name)
+    raise exc
+
+
+@contextmanager
+def cancel_scope(scope):
+    """Attach the runs started inside the block to scope."""
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def remaining_time():
+    """Seconds left before the deadline of the current run, or None."""
+    run = _run.get()
+    return run.remaining() if run is not None else None
+
+
+def current_task():
+    """Task name of the current run, or None."""
+    run = _run.get()
+    return run.task if run is not None else None
+
+
+def is_cancelled():
+    """True once the current run has been cancelled at its deadline."""
+    run = _run.get()
+    return run is not None and run.cancelled.is_set()
+
+
+def phase_timeout(name):
+    """Timeout of a phase in seconds, clamped to what is left of the run deadline."""
+    run = _run.get()
+    if run is None:
+        config = load_yaml(CONFIG_FILE_PATH) or {}
+        return config.get("timeouts", {}).get(name, DEFAULT_PHASE_TIMEOUTS.get(name))
+    timeout = run.timeouts.get(name)
+    remaining = run.remaining()
+    if remaining is not None:
+        timeout = remaining if timeout is None else min(timeout, remaining)
+    return max(timeout, 0.1) if timeout is not None else None
+
+
+@contextmanager
+def phase(name, net_connect=None):
+    """
+    Run a block as phase `name` of the current device task.
+
+    Raises TaskTimeout if the run was cancelled before the block starts, and
+    turns timeout exceptions raised inside it into TaskTimeout(name). With
+    net_connect, every Netmiko read in the block is bounded by the phase
+    timeout (read_timeout_override).
+    """
+    run = _run.get()
+    if run is not None and run.cancelled.is_set():
+        raise TaskTimeout(name, f"{run.reason}, task cancelled")
+
+    entered = _entered.get()
+    if entered is not None:
+        entered.append(name)
+    token = _phase.set(name)
+    if run is not None:
+        run.phases[_device.get()] = name
+    previous_override = None
+    if net_connect is not None:
+        previous_override = getattr(net_connect, "read_timeout_override", None)
+        net_connect.read_timeout_override = phase_timeout(name)
+    task = run.task if run is not None else None
+    events.emit("phase_changed", task=task, device=_device.get(), phase=name)
+    start = time.monotonic()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except TaskTimeout:
+        outcome = "timeout"
+        raise
+    except TIMEOUT_EXCEPTIONS as e:
+        outcome = "timeout"
+        raise TaskTimeout(name, str(e)) from e
+    finally:
+        if net_connect is not None:
+            net_connect.read_timeout_override = previous_override
+        _phase.reset(token)
+        if run is not None:
+            run.phases[_device.get()] = _phase.get()
+        events.emit(
+            "phase_finished", task=task, device=_device.get(), phase=name,
+            duration=time.monotonic() - start, outcome=outcome,
+        )
+
+
+def mark_failed(result, exc):
+    """
+    Record a failed task in its result dict: status TIMEOUT with the phase
+    for TaskTimeout, FAILED otherwise, plus the error class.
+    """
+    result["output"] = str(exc)
+    # Class of the underlying error, e.g. NetmikoTimeoutException for a connect timeout
+    cause = exc.__cause__ if isinstance(exc, TaskTimeout) and exc.__cause__ else exc
+    result["error"] = type(cause).__name__
+    if isinstance(exc, TaskTimeout):
+        result["status"] = "TIMEOUT"
+        result["phase"] = exc.phase
+    else:
+        result["status"] = "FAILED"
+    return result
+
+
+def timeout_result(device, phase_name, message):
+    """Result dict for a device stopped by the run deadline."""
+    return {
+        "device": device.get("name", "UNKNOWN"),
+        "host": device.get("host", "UNKNOWN"),
+        "status": "TIMEOUT",
+        "phase": phase_name,
+        "output": message,
+    }
@@ -0,0 +1,137 @@
+# scripts/pipeline.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import queue
+import threading
+
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("pipeline")
+
+# Tells a stage worker to exit
+_STOP = object()
+
+
+class StageError:
+    """
+    Wraps an exception raised by a stage function and the item it failed
+    on. Delivered instead of a result; later stages pass it on unchanged.
+    """
+
+    def __init__(self, stage, exc, item=None):
+        self.stage = stage
+        self.exc = exc
+        self.item = item
+
+
+class _Gate:
+    """Lets at most limit() callers in at once; limit may change between calls."""
+
+    def __init__(self, limit):
+        self._limit = limit
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            # Re-check periodically: an adaptive limit can grow without a notify
+            while self._active >= self._limit():
+                self._cond.wait(0.1)
+            self._active += 1
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+
+class Stage:
+    """
+    A pool of worker threads applying func to each item of its input queue
+    and putting the return value on the next stage's queue. A bounded
+    output queue blocks the workers when the next stage falls behind.
+    """
+
+    def __init__(self, name, func, workers, limit=None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.gate = _Gate(limit) if limit is not None else None
+        self.input = None
+        self.output = None
+        self._threads = []
+
+    def _work(self, stop):
+        while True:
+            item = self.input.get()
+            if item is _STOP or stop.is_set():
+                return
+            if isinstance(item, StageError):
+                self.output.put(item)
+                continue
+            try:
+                if self.gate is not None:
+                    with self.gate:
+                        out = self.func(item)
+                else:
+                    out = self.func(item)
+            except BaseException as e:
+                out = StageError(self.name, e, item)
+            self.output.put(out)
+
+    def start(self, stop):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(stop,), name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+
+class StagedPipeline:
+    """
+    Stages connected by bounded queues, each stage with its own worker pool.
+
+    Items submitted go through every stage in order; the return value of the
+    last stage (or a StageError) comes out of results. Backpressure follows
+    from the queue bounds: when a stage is slow the queue in front of it
+    fills and the stage before it waits. Workers are daemon threads, so a
+    hung stage never keeps the process alive.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.results = queue.Queue()
+        self._stop = threading.Event()
+
+    def add_stage(self, name, func, workers, maxsize=0, limit=None):
+        """
+        Append a stage of `workers` threads. maxsize bounds the queue in front
+        of the stage (0 = unbounded); limit() optionally caps how many of its
+        workers may run func at once.
+        """
+        stage = Stage(name, func, workers, limit)
+        stage.input = queue.Queue(maxsize=maxsize)
+        if self.stages:
+            self.stages[-1].output = stage.input
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        self.stages[-1].output = self.results
+        for stage in self.stages:
+            stage.start(self._stop)
+            logger.debug(f"Stage {stage.name}: {stage.workers} worker(s), queue bound {stage.input.maxsize or 'none'}")
+
+    def submit(self, item):
+        self.stages[0].input.put(item)
+
+    def stop(self):
+        """Ask every worker to exit once it finishes its current item."""
+        self._stop.set()
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                try:
+                    stage.input.put_nowait(_STOP)
+                except queue.Full:
+                    # Workers see the stop event after their current item
+                    pass
@@ -0,0 +1,147 @@
+# scripts/result_writer.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+import yaml
+from filelock import FileLock
+
+from scripts.leases import pid_alive
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("result_writer")
+
+
+def partial_path(result_path, owner=None):
+    """
+    Path of the in-progress JSON Lines file of one run for a result file.
+    owner (default: this process id) starts with the pid of the writing
+    process and keeps concurrent runs of a task out of each other's journal.
+    """
+    return f"{result_path}.{owner or os.getpid()}.partial.jsonl"
+
+
+def live_partial_paths(result_path):
+    """Journals of result_path written by running processes, newest first."""
+    paths = []
+    for path in glob.glob(partial_path(glob.escape(result_path), "*")):
+        owner = path[len(result_path) + 1:-len(".partial.jsonl")]
+        pid = owner.split("-")[0]
+        # Journals of crashed runs are left behind, never shown as in progress
+        if pid.isdigit() and pid_alive(int(pid)):
+            paths.append(path)
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+class JsonlWriter:
+    """
+    Appends JSON records, one per line, fsyncing every fsync_every records
+    or fsync_interval seconds. Safe to call from several threads.
+    """
+
+    def __init__(self, path, mode="w", fsync_every=50, fsync_interval=2.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, mode, encoding="utf-8")
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, record):
+        """Append one record."""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self.count += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def close(self):
+        """Flush, fsync and close the file. Returns False if it was already closed."""
+        with self._lock:
+            if self._file.closed:
+                return False
+            self._sync()
+            self._file.close()
+            return True
+
+
+class ResultSink(JsonlWriter):
+    """
+    Streams per-device result dicts to disk as they complete.
+    Each result is appended as one JSON line to a journal of its own,
+    <result_path>.<pid>-<id>.partial.jsonl, so concurrent runs of a task
+    (GUI and cron) never share one; finalize() converts the journal into
+    the YAML result file atomically.
+    """
+
+    def __init__(self, result_path, fsync_every=50, fsync_interval=2.0):
+        self.result_path = result_path
+        self.partial_path = partial_path(result_path, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        super().__init__(self.partial_path, "w", fsync_every, fsync_interval)
+
+    def finalize(self):
+        """
+        Write every journaled result to the YAML result file and remove the
+        journal. The YAML file is replaced atomically, so readers see either
+        the previous results or the complete new ones; of two concurrent
+        runs, the one finishing last writes the file.
+        """
+        if not self.close():
+            return
+
+        tmp_path = f"{self.result_path}.tmp"
+        # Kept in place: removing it could let a waiting run and a new one both take the lock
+        lock_file = f"{self.result_path}.lock"
+        with FileLock(lock_file):
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                # One-item list dumps concatenate into a valid YAML sequence
+                for result in iter_partial_results(self.partial_path):
+                    yaml.dump([result], out, default_flow_style=False, allow_unicode=True)
+                if not self.count:
+                    yaml.dump([], out)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.result_path)
+            os.remove(self.partial_path)
+
+
+def iter_partial_results(path):
+    """Yield result dicts from a JSON Lines journal, skipping a torn last line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping incomplete record in {path}")
+
+
+def load_results(result_path):
+    """
+    Return the results of a task: the in-progress journal while a run is
+    writing it (the most recently written one when several runs are),
+    otherwise the final YAML result file.
+    """
+    for path in live_partial_paths(result_path):
+        try:
+            return list(iter_partial_results(path))
+        except FileNotFoundError:
+            # That run finalized in the meantime
+            continue
+    with open(result_path, "r") as f:
+        return yaml.safe_load(f) or []
@@ -0,0 +1,102 @@
+# scripts/scheduler.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import time
+from collections import defaultdict, deque
+
+from scripts.constants import CONFIG_FILE_PATH
+from scripts.config_parser import load_yaml
+
+
+class JobScheduler:
+    """
+    Hands out (task_func, device, args) jobs in submission order while
+    keeping the run within its limits:
+
+    - limit(): devices in flight overall (fixed or adaptive)
+    - group_limits: devices in flight per devices.yaml group, e.g. {"cisco": 10}
+    - site_limit / site_limits: devices in flight per site (the device's
+      "site" key), a default for every site plus per-site overrides
+
+    A limit of 0 (or a missing entry) means unlimited. Jobs blocked by a
+    full group or site wait while jobs of other groups and sites go ahead.
+    When durations is a dict, the run time of every finished job is stored
+    in it by device name.
+    """
+
+    def __init__(self, jobs, limit, group_limits=None, site_limit=0, site_limits=None, durations=None):
+        self._limit = limit
+        self.durations = durations
+        self._started = {}
+        self.group_limits = dict(group_limits or {})
+        self.site_limit = site_limit
+        self.site_limits = dict(site_limits or {})
+        self.in_flight = 0
+        self._running = defaultdict(int)
+        # One FIFO per (group, site); the head with the lowest index runs first
+        self._queues = defaultdict(deque)
+        for index, job in enumerate(jobs):
+            self._queues[self._key(job)].append((index, job))
+
+    @classmethod
+    def from_config(cls, jobs, limit, durations=None):
+        """Build a scheduler with the scheduling section of config.yaml."""
+        config = load_yaml(CONFIG_FILE_PATH) or {}
+        params = config.get("scheduling", {})
+        return cls(
+            jobs,
+            limit,
+            group_limits=params.get("group_limits"),
+            site_limit=params.get("site_limit", 0),
+            site_limits=params.get("site_limits"),
+            durations=durations,
+        )
+
+    @staticmethod
+    def _key(job):
+        device = job[1]
+        return device.get("group"), device.get("site")
+
+    def _caps(self, key):
+        group, site = key
+        yield ("group", group), self.group_limits.get(group, 0)
+        if site is not None:
+            yield ("site", site), self.site_limits.get(site, self.site_limit)
+
+    def _has_room(self, key):
+        return all(not cap or self._running[name] < cap for name, cap in self._caps(key))
+
+    def __len__(self):
+        """Jobs not handed out yet."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def next_job(self):
+        """Return the next job allowed to start now, or None."""
+        if self.in_flight >= self._limit():
+            return None
+        candidates = [(queue[0][0], key) for key, queue in self._queues.items() if queue and self._has_room(key)]
+        if not candidates:
+            return None
+        _, key = min(candidates)
+        _, job = self._queues[key].popleft()
+        self.in_flight += 1
+        for name, _ in self._caps(key):
+            self._running[name] += 1
+        self._started[id(job)] = time.monotonic()
+        return job
+
+    def drain(self):
+        """Remove and return every job not handed out yet."""
+        jobs = sorted(entry for queue in self._queues.values() for entry in queue)
+        self._queues.clear()
+        return [job for _, job in jobs]
+
+    def done(self, job):
+        """Release the slots held by a finished job."""
+        self.in_flight -= 1
+        for name, _ in self._caps(self._key(job)):
+            self._running[name] -= 1
+        started = self._started.pop(id(job), None)
+        if self.durations is not None and started is not None:
+            self.durations[job[1].get("name")] = time.monotonic() - started
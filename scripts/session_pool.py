@@ -0,0 +1,237 @@
+# scripts/session_pool.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import atexit
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from netmiko import ConnectHandler, NetmikoTimeoutException
+
+from scripts.constants import CONFIG_FILE_PATH
+from scripts.concurrency import observe_connect
+from scripts.leases import current_lease
+from scripts.phases import phase, phase_timeout
+from scripts.config_parser import load_yaml
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("session_pool")
+
+
+class SessionPool:
+    """
+    Pool of authenticated, enabled Netmiko sessions keyed by (host, device_type).
+    Idle sessions are health-checked before reuse and evicted least-recently-used
+    once max_sessions is exceeded. Sessions idle for more than max_idle seconds
+    are closed on the next acquire or release, or by the reaper thread when the
+    pool is not used (a long-running daemon between jobs). Idle sessions keep
+    the device lease they were released under until they are closed.
+    """
+
+    def __init__(self, max_sessions=100, max_idle=300):
+        self.max_sessions = max_sessions
+        self.max_idle = max_idle
+        # (host, device_type) -> (net_connect, last_used, lease), oldest first;
+        # lease is the (LeaseManager, device) the session keeps while idle
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _key(connection_params):
+        return (connection_params["host"], connection_params["device_type"])
+
+    @staticmethod
+    def _close(net_connect, lease=None):
+        try:
+            net_connect.disconnect()
+        except Exception as e:
+            logger.debug(f"Error while closing session to {net_connect.host}: {e}")
+        if lease is not None:
+            # Logged out: the device lease and session slot can go
+            lease[0].unpark(lease[1], id(net_connect))
+
+    def _pop_expired(self):
+        """Remove the entries idle for more than max_idle (lock held) and return them."""
+        now = time.monotonic()
+        expired = [key for key, (_, last_used, _) in self._idle.items() if now - last_used > self.max_idle]
+        return [self._idle.pop(key) for key in expired]
+
+    def sweep(self):
+        """Close every session idle for more than max_idle seconds."""
+        with self._lock:
+            expired = self._pop_expired()
+        for net_connect, _, lease in expired:
+            logger.debug(f"Idle session expired for {net_connect.host}")
+            self._close(net_connect, lease)
+        return len(expired)
+
+    def start_reaper(self, interval):
+        """Sweep expired sessions every interval seconds in a daemon thread, until close_all()."""
+        def reap():
+            while not self._stopped.wait(interval):
+                self.sweep()
+
+        self._stopped.clear()
+        self._reaper = threading.Thread(target=reap, name="session-reaper", daemon=True)
+        self._reaper.start()
+
+    def discard(self, net_connect):
+        """Close net_connect if it is still idle in the pool (a lease waiter needs its slot)."""
+        with self._lock:
+            for key, entry in self._idle.items():
+                if entry[0] is net_connect:
+                    del self._idle[key]
+                    break
+            else:
+                return
+        logger.debug(f"Closing idle session to {net_connect.host} to free its session slot")
+        self._close(net_connect, entry[2])
+
+    def acquire(self, connection_params):
+        """Return an enabled session, reusing an idle one when it is still alive."""
+        key = self._key(connection_params)
+        self.sweep()
+        with self._lock:
+            entry = self._idle.pop(key, None)
+
+        if entry:
+            net_connect, last_used, lease = entry
+            if time.monotonic() - last_used > self.max_idle:
+                logger.debug(f"Idle session expired for {key[0]} ({key[1]})")
+                self._close(net_connect, lease)
+            elif not net_connect.is_alive():
+                logger.debug(f"Stale session dropped for {key[0]} ({key[1]})")
+                self._close(net_connect, lease)
+            else:
+                logger.debug(f"Reusing session for {key[0]} ({key[1]})")
+                if lease is not None:
+                    # In use again, under the lease of the calling job
+                    lease[0].unpark(lease[1], id(net_connect))
+                return net_connect
+
+        net_connect = open_session(connection_params)
+        logger.debug(f"Opened new session for {key[0]} ({key[1]})")
+        return net_connect
+
+    def release(self, net_connect, connection_params, healthy=True):
+        """
+        Return a session to the pool, or close it if it is not reusable. A
+        session released inside a device lease keeps that lease while idle.
+        """
+        if not healthy:
+            self._close(net_connect)
+            return
+
+        lease = current_lease()
+        if lease is not None and not lease[0].park(lease[1], id(net_connect), lambda: self.discard(net_connect)):
+            lease = None
+        key = self._key(connection_params)
+        with self._lock:
+            evicted = self._pop_expired()
+            previous = self._idle.pop(key, None)
+            if previous:
+                evicted.append(previous)
+            self._idle[key] = (net_connect, time.monotonic(), lease)
+            while len(self._idle) > self.max_sessions:
+                _, old = self._idle.popitem(last=False)
+                evicted.append(old)
+
+        for old_connect, _, old_lease in evicted:
+            self._close(old_connect, old_lease)
+
+    @contextmanager
+    def session(self, connection_params):
+        """Context manager handing out a pooled session for one unit of work."""
+        net_connect = self.acquire(connection_params)
+        try:
+            yield net_connect
+        except Exception:
+            # Session state is unknown after a failure, never hand it out again
+            self.release(net_connect, connection_params, healthy=False)
+            raise
+        self.release(net_connect, connection_params)
+
+    def close_all(self):
+        """Disconnect every idle session and stop the reaper."""
+        self._stopped.set()
+        with self._lock:
+            entries = list(self._idle.values())
+            self._idle.clear()
+        for net_connect, _, lease in entries:
+            self._close(net_connect, lease)
+        if entries:
+            logger.info(f"Closed {len(entries)} pooled SSH session(s)")
+
+    def __len__(self):
+        return len(self._idle)
+
+
+def open_tcp(host, port=22):
+    """Open the TCP connection of an SSH session; failures are raised as NetmikoTimeoutException like Netmiko's."""
+    try:
+        return socket.create_connection((host, port), timeout=phase_timeout("connect"))
+    except OSError as e:
+        raise NetmikoTimeoutException(f"TCP connection to {host}:{port} failed: {e}") from e
+
+
+def open_session(connection_params):
+    """
+    Open a new Netmiko session and enter enable mode, timed as three
+    phases: connect (TCP connect), auth (SSH handshake and login, where
+    AAA latency shows) and enable.
+    """
+    with observe_connect():
+        with phase("connect"):
+            sock = open_tcp(connection_params["host"], connection_params.get("port", 22))
+        try:
+            with phase("auth"):
+                net_connect = ConnectHandler(**connection_params, sock=sock)
+        except BaseException:
+            sock.close()
+            raise
+    try:
+        with phase("enable", net_connect):
+            net_connect.enable()
+    except Exception:
+        net_connect.disconnect()
+        raise
+    return net_connect
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool():
+    """
+    Return the process-wide session pool, or None when pooling is disabled
+    in config.yaml (session_pool.enabled).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = load_yaml(CONFIG_FILE_PATH) or {}
+            params = config.get("session_pool", {})
+            if not params.get("enabled", True):
+                return None
+            _pool = SessionPool(
+                max_sessions=params.get("max_sessions", 100),
+                max_idle=params.get("max_idle", 300),
+            )
+            _pool.start_reaper(max(1, _pool.max_idle / 2))
+            atexit.register(close_session_pool)
+        return _pool
+
+
+def close_session_pool():
+    """Close all pooled sessions at the end of a run."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close_all()
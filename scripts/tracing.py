@@ -0,0 +1,172 @@
+# scripts/tracing.py
+# -*- coding: utf-8 -*-
+# This file is part of the Network Automation Suite.
+
+import asyncio
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from scripts import events
+from utils.logger_utils import setup_logger
+
+logger = setup_logger("tracing")
+
+
+def _track_key():
+    """The emitting thread, and the asyncio task when one runs in it (asyncio engine devices share the loop thread)."""
+    thread = threading.current_thread()
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return thread.ident, thread.name, task.get_name() if task is not None else None
+
+
+class TraceRecorder:
+    """
+    Event bus subscriber recording a run as a timeline in the Chrome
+    trace-event format (open it in https://ui.perfetto.dev or
+    chrome://tracing). Every worker thread, or device coroutine on the
+    asyncio engine, is a track: devices and their phases are spans on the
+    track that ran them, retries are instants.
+    The coordinator track shows the task span and the moment each result
+    was collected, so gaps between a device ending on its worker and its
+    result being collected are visible.
+    """
+
+    def __init__(self):
+        self._origin = time.time()
+        self._trace = []
+        self._tracks = {}
+        # track id -> (device, start timestamp) of the device span still open
+        self._open = {}
+        # device -> span closed by the next device of its worker before its result was collected
+        self._uncollected = {}
+        # track id -> last closed device span
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def _ts(self, seconds):
+        return round((seconds - self._origin) * 1e6)
+
+    def _tid(self):
+        """Track of the emitting thread, or of the emitting coroutine on the asyncio engine."""
+        ident, thread_name, task_name = _track_key()
+        key = (ident, task_name)
+        if key not in self._tracks:
+            self._tracks[key] = len(self._tracks) + 1
+            name = f"{thread_name} / {task_name}" if task_name else thread_name
+            self._trace.append({"ph": "M", "name": "thread_name", "pid": 1, "tid": self._tracks[key], "args": {"name": name}})
+        return self._tracks[key]
+
+    def _span(self, name, tid, start, end, category, args=None):
+        span = {
+            "ph": "X", "name": name, "cat": category, "pid": 1, "tid": tid,
+            "ts": self._ts(start), "dur": max(round((end - start) * 1e6), 0), "args": args or {},
+        }
+        self._trace.append(span)
+        return span
+
+    def _close_device(self, tid, end, status=None):
+        device, start = self._open.pop(tid)
+        span = self._span(device, tid, start, end, "device", {"status": status} if status else None)
+        self._last[tid] = span
+        if status is None:
+            self._uncollected[device] = span
+
+    def __call__(self, event):
+        kind = event["event"]
+        with self._lock:
+            tid = self._tid()
+            if kind == "device_started":
+                # A worker only starts its next device once the previous one returned
+                if tid in self._open:
+                    self._close_device(tid, event["time"])
+                last = self._last.get(tid)
+                if last is not None and last["ts"] + last["dur"] > self._ts(event["time"]):
+                    # Its result was stamped after this start but handled first
+                    last["dur"] = max(self._ts(event["time"]) - last["ts"], 0)
+                self._open[tid] = (event["device"], event["time"])
+            elif kind == "phase_finished":
+                self._span(
+                    event["phase"], tid, event["time"] - event["duration"], event["time"], "phase",
+                    {"device": event["device"], "outcome": event["outcome"]},
+                )
+            elif kind == "device_retry":
+                self._trace.append({
+                    "ph": "i", "s": "t", "name": f"retry {event['device']}", "cat": "retry", "pid": 1, "tid": tid,
+                    "ts": self._ts(event["time"]), "args": {"attempt": event["attempt"], "error": str(event["error"])},
+                })
+            elif kind == "device_finished":
+                if event["device"] in self._uncollected:
+                    self._uncollected.pop(event["device"])["args"]["status"] = event["status"]
+                for worker_tid, (device, _) in list(self._open.items()):
+                    if device == event["device"]:
+                        self._close_device(worker_tid, event["time"], event["status"])
+                        break
+                self._trace.append({
+                    "ph": "i", "s": "t", "name": f"result {event['device']}", "cat": "result", "pid": 1, "tid": tid,
+                    "ts": self._ts(event["time"]), "args": {"status": event["status"]},
+                })
+            elif kind == "task_finished":
+                self._span(
+                    event["task"], tid, event["time"] - event["duration"], event["time"], "task",
+                    {"statuses": event["statuses"]},
+                )
+
+    def start(self):
+        self._trace.append({"ph": "M", "name": "process_name", "pid": 1, "args": {"name": "netpilot"}})
+        events.subscribe(self, ["device_started", "phase_finished", "device_retry", "device_finished", "task_finished"])
+        return self
+
+    def stop(self):
+        events.unsubscribe(self)
+        with self._lock:
+            # Devices abandoned without a result
+            for tid in list(self._open):
+                self._close_device(tid, time.time(), "UNFINISHED")
+
+    def write(self, path):
+        """Write the trace as JSON to path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            trace = {"traceEvents": list(self._trace), "displayTimeUnit": "ms"}
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(trace, f, default=str)
+        os.replace(f"{path}.tmp", path)
+
+
+@contextmanager
+def profiled(path):
+    """
+    Profile the calling thread (the coordinator) for the duration of the
+    block. A path ending in .html gets a pyinstrument report, anything else
+    cProfile stats (python -m pstats FILE). Worker threads are not profiled.
+    """
+    if path.endswith(".html"):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("pyinstrument is not installed; use a .prof file for cProfile stats") from None
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path, "w") as f:
+                f.write(profiler.output_html())
+            logger.info(f"Profile written to {path}")
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        logger.info(f"Profile written to {path} (view with: python -m pstats {path})")
@@ -1,19 +1,193 @@
 # scripts/worker.py
 
+import asyncio
 import logging
+import random
+import threading
+import time
+
+from scripts.constants import CONFIG_FILE_PATH
+from scripts.config_parser import load_yaml
+from scripts import events
+from scripts.async_transport import async_form, get_async_form
+from scripts.phases import current_task, is_cancelled, mark_failed, record_phases, remaining_time
+from utils.circuit_breaker import CircuitBreaker
+
+# Phases that send nothing that changes the device; only failures there are retried
+RETRY_PHASES = ("connect", "auth", "enable")
+
+
+class RetryPolicy:
+    """
+    Retry rules by error class. attempts maps an exception class name
+    (e.g. NetmikoTimeoutException) to the total number of tries for that
+    error; other errors are not retried, nor are failures after a command
+    was sent (see device_worker). Delays grow exponentially from backoff
+    seconds up to max_backoff, with full jitter so devices failing together
+    do not retry together.
+    """
+
+    def __init__(self, attempts=None, backoff=1.0, max_backoff=30.0):
+        self.attempts = dict(attempts or {})
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    @classmethod
+    def from_config(cls):
+        config = load_yaml(CONFIG_FILE_PATH) or {}
+        params = config.get("retry", {})
+        return cls(params.get("attempts"), params.get("backoff", 1.0), params.get("max_backoff", 30.0))
+
+    def max_attempts(self, error):
+        return self.attempts.get(error, 1)
+
+    def delay(self, attempt):
+        """Seconds to wait after failed try number attempt."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Return the shared CircuitBreaker, or None when circuit_breaker.enabled is false."""
+    global _breaker
+    config = load_yaml(CONFIG_FILE_PATH) or {}
+    params = config.get("circuit_breaker", {})
+    if not params.get("enabled", False):
+        return None
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(threshold=params.get("threshold", 3), cooldown=params.get("cooldown", 3600))
+        return _breaker
+
+
+def _run_once(task_func, device, args, kwargs):
+    """
+    Run the task once; returns its result dict, failures included, and
+    whether it may be retried: it failed in the connect, auth or enable
+    phase, before any command reached the device.
+    """
+    with record_phases() as entered:
+        try:
+            result = task_func(device, *args, **kwargs)
+        except Exception as e:
+            result = mark_failed({"device": device.get("name"), "status": "FAILED", "output": ""}, e)
+    return result, bool(entered) and set(entered) <= set(RETRY_PHASES)
+
+
+async def _run_once_async(task_func, device, args, kwargs):
+    """_run_once() for the coroutine form of a task."""
+    with record_phases() as entered:
+        try:
+            result = await task_func(device, *args, **kwargs)
+        except Exception as e:
+            result = mark_failed({"device": device.get("name"), "status": "FAILED", "output": ""}, e)
+    return result, bool(entered) and set(entered) <= set(RETRY_PHASES)
+
+
+def _failed(result):
+    return result.get("status") in ("FAILED", "TIMEOUT")
+
+
+def _skipped(breaker, task, device):
+    """Result of a device skipped by its open circuit breaker, else None."""
+    if breaker is None:
+        return None
+    reason = breaker.is_open(task, device.get("name"))
+    if not reason:
+        return None
+    logging.getLogger("worker").warning(f"Skipping {task} for {device.get('name')}: {reason}")
+    return {"device": device.get("name"), "host": device.get("host"), "status": "SKIPPED", "output": reason}
+
+
+def _retry_delay(policy, name, result, retryable, attempt):
+    """Seconds to wait before retrying try number attempt, or None when it must not be retried."""
+    if not _failed(result) or not retryable or attempt >= policy.max_attempts(result.get("error")):
+        return None
+    delay = policy.delay(attempt)
+    remaining = remaining_time()
+    if is_cancelled() or (remaining is not None and remaining <= delay):
+        return None
+    logging.getLogger("worker").warning(
+        f"Task {result['status']} for {name} ({result.get('error')}), "
+        f"retry {attempt + 1}/{policy.max_attempts(result.get('error'))} in {delay:.1f}s"
+    )
+    events.emit(
+        "device_retry", task=current_task(), device=name, attempt=attempt + 1,
+        error=result.get("error"), delay=delay,
+    )
+    return delay
+
+
+def _finish(breaker, task, name, result):
+    logger = logging.getLogger("worker")
+    if _failed(result):
+        logger.error(f"Task {result['status']} for {name}: {result.get('output')}")
+    else:
+        logger.info(f"Task {result.get('status', 'SUCCESS')} for {name}")
+    # A run stopped at its deadline says nothing about the device
+    if breaker is not None and not is_cancelled():
+        breaker.record(task, name, not _failed(result), result.get("error"))
+    return result
+
 
 def device_worker(task_func, device, *args, **kwargs):
     """
     Generic worker for any device task (config, backup, etc.).
     Handles logging, exception and result.
+
+    Failures whose error class is listed in retry.attempts are retried with
+    exponential backoff (never past the run deadline) when they happened
+    while connecting, before any command was sent: a command or config set
+    is never sent twice. Devices with an open circuit breaker are skipped
+    with status SKIPPED.
     """
-    logger = logging.getLogger("worker")
-    try:
-        logger.info(f"Starting task for {device.get('name')}")
-        result = task_func(device, *args, **kwargs)
-        logger.info(f"Task SUCCESS for {device.get('name')}")
-        return result
-    except Exception as e:
-        logger.error(f"Task FAILED for {device.get('name')}: {e}")
-        return {"device": device.get("name"), "status": "FAILED", "output": str(e)}
+    name = device.get("name")
+    task = task_func.__name__
+
+    breaker = get_circuit_breaker()
+    skipped = _skipped(breaker, task, device)
+    if skipped:
+        return skipped
+
+    policy = RetryPolicy.from_config()
+    attempt = 1
+    logging.getLogger("worker").info(f"Starting task for {name}")
+    while True:
+        result, retryable = _run_once(task_func, device, args, kwargs)
+        delay = _retry_delay(policy, name, result, retryable, attempt)
+        if delay is None:
+            break
+        time.sleep(delay)
+        attempt += 1
+    return _finish(breaker, task, name, result)
+
+
+@async_form(device_worker)
+async def device_worker_async(task_func, device, *args, **kwargs):
+    """
+    device_worker on the asyncio engine: runs the coroutine form of
+    task_func with the same retries, circuit breaker and results.
+    """
+    name = device.get("name")
+    task = task_func.__name__
+    coroutine_func = get_async_form(task_func)
+
+    breaker = get_circuit_breaker()
+    skipped = _skipped(breaker, task, device)
+    if skipped:
+        return skipped
 
+    policy = RetryPolicy.from_config()
+    attempt = 1
+    logging.getLogger("worker").info(f"Starting task for {name}")
+    while True:
+        result, retryable = await _run_once_async(coroutine_func, device, args, kwargs)
+        delay = _retry_delay(policy, name, result, retryable, attempt)
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+        attempt += 1
+    return _finish(breaker, task, name, result)
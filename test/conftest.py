@@ -0,0 +1,37 @@
+"""
+Shared fixtures and helpers for the engine, distributed and tracing tests.
+"""
+
+import pytest
+from scripts import engine, leases, worker
+from utils.duration_history import DurationHistory
+
+
+def fake_task(device, device_type):
+    return {"device": device["name"], "status": "SUCCESS", "output": device_type}
+
+
+def make_jobs(task_func=fake_task, count=5):
+    """
+    Jobs of task_func on count devices sw1..swN, spread over three sites.
+    No group: the pipeline engine would log in to them in its connect stage.
+    """
+    devices = [{"name": f"sw{i}", "host": f"10.0.0.{i}", "site": f"site{i % 3}"} for i in range(1, count + 1)]
+    return [(task_func, device, ("arista_eos",)) for device in devices]
+
+
+@pytest.fixture
+def isolated_run(tmp_path, monkeypatch):
+    """
+    No TCP probes, status.yaml, circuit breaker or leases for test runs;
+    every device is reachable and duration history (returned) is kept out
+    of output/.
+    """
+    history = DurationHistory(str(tmp_path / "durations.db"))
+    monkeypatch.setattr(engine, "probe_reachability", lambda hosts, **kwargs: {h: True for h in hosts})
+    monkeypatch.setattr(engine, "build_device_status", lambda devices: [])
+    monkeypatch.setattr(engine, "write_device_status_yaml", lambda devices, **kwargs: None)
+    monkeypatch.setattr(engine, "DurationHistory", lambda **kwargs: history)
+    monkeypatch.setattr(worker, "get_circuit_breaker", lambda: None)
+    monkeypatch.setattr(leases, "get_lease_manager", lambda: None)
+    return history
@@ -0,0 +1,151 @@
+"""
+Unit tests for async_transport.py
+
+These tests cover:
+- Inventory and backup collected over asyncssh, as over Netmiko
+- Login failures raised as the Netmiko exceptions results already use, in
+  the connect (TCP) or auth (SSH handshake and login) phase
+- Command timeouts reported in the command phase
+- Coroutine task and worker forms: same result dicts and retries
+"""
+
+import asyncio
+import pytest
+from scripts import async_transport, backup_manager, concurrency, inventory_manager, netmiko_utils, worker
+from scripts.phases import RunDeadline, bind
+
+DEVICE = {"name": "sw1", "host": "10.0.0.1", "group": "arista"}
+
+
+class FakeConnection:
+    def __init__(self, host, delay):
+        self.host = host
+        self.delay = delay
+        self.closed = False
+
+    async def run(self, cmd):
+        await asyncio.sleep(self.delay)
+        return type("Result", (), {"stdout": f"{cmd} on {self.host}"})()
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+class FakeAsyncssh:
+    """Stand-in for the asyncssh module: connect() fails with the queued errors first."""
+
+    class Error(Exception):
+        pass
+
+    class PermissionDenied(Error):
+        pass
+
+    def __init__(self, errors=(), delay=0):
+        self.errors = list(errors)
+        self.tcp_errors = []
+        self.delay = delay
+        self.connections = []
+
+    async def open_tcp(self, host, port=22):
+        if self.tcp_errors:
+            raise self.tcp_errors.pop(0)
+        return FakeSocket()
+
+    async def connect(self, host, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        conn = FakeConnection(host, self.delay)
+        self.connections.append(conn)
+        return conn
+
+
+class FakeSocket:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def asyncssh(monkeypatch):
+    fake = FakeAsyncssh()
+    monkeypatch.setattr(async_transport, "asyncssh", fake)
+    monkeypatch.setattr(async_transport, "_open_tcp", fake.open_tcp)
+    monkeypatch.setattr(async_transport, "load_credentials", lambda path, name: ("admin", "secret", None))
+    monkeypatch.setattr(async_transport, "inventory_commands", lambda device_type: ["show version", "show inventory"])
+    monkeypatch.setattr(async_transport, "backup_commands", lambda device_type: ["show running-config"])
+    monkeypatch.setattr(concurrency, "get_login_bucket", lambda: None)
+    monkeypatch.setattr(inventory_manager, "is_reachable", lambda ip: True)
+    monkeypatch.setattr(backup_manager, "is_reachable", lambda ip: True)
+    monkeypatch.setattr(worker, "get_circuit_breaker", lambda: None)
+    return fake
+
+
+def test_inventory_matches_netmiko_path(asyncssh, monkeypatch):
+    """The coroutine form of inventory_task returns the result dict of inventory_task."""
+    outputs = [("show version", "show version on 10.0.0.1"), ("show inventory", "show inventory on 10.0.0.1")]
+    monkeypatch.setattr(
+        inventory_manager, "get_device_inventory", lambda device, device_type: netmiko_utils.format_inventory(outputs)
+    )
+    expected = inventory_manager.inventory_task(DEVICE, "arista_eos")
+
+    result = asyncio.run(inventory_manager.inventory_task_async(DEVICE, "arista_eos"))
+    assert result == expected and result["status"] == "SUCCESS"
+    assert asyncssh.connections[0].closed
+
+
+def test_backup_writes_files(asyncssh, monkeypatch, tmp_path):
+    monkeypatch.setattr(netmiko_utils, "BACKUP_FOLDER_PATH", str(tmp_path))
+    result = asyncio.run(backup_manager.backup_task_async(DEVICE, "arista_eos"))
+    assert result["status"] == "SUCCESS"
+    assert len(result["files"]) == 1
+    with open(result["files"][0]) as f:
+        assert f.read() == "show running-config on 10.0.0.1"
+
+
+@pytest.mark.parametrize("error, status, error_class, phase_name", [
+    (FakeAsyncssh.PermissionDenied("denied"), "FAILED", "NetmikoAuthenticationException", None),
+    (FakeAsyncssh.Error("kex failed"), "TIMEOUT", "NetmikoTimeoutException", "auth"),
+])
+def test_login_failures_use_netmiko_errors(asyncssh, error, status, error_class, phase_name):
+    asyncssh.errors = [error]
+    result = asyncio.run(inventory_manager.inventory_task_async(DEVICE, "arista_eos"))
+    assert (result["status"], result["error"], result.get("phase")) == (status, error_class, phase_name)
+
+
+def test_tcp_failure_in_connect_phase(asyncssh, monkeypatch):
+    async def refused(host, port=22):
+        raise async_transport.NetmikoTimeoutException("TCP connection refused")
+
+    monkeypatch.setattr(async_transport, "_open_tcp", refused)
+    result = asyncio.run(inventory_manager.inventory_task_async(DEVICE, "arista_eos"))
+    assert (result["status"], result["error"], result["phase"]) == ("TIMEOUT", "NetmikoTimeoutException", "connect")
+
+
+def test_command_timeout(asyncssh):
+    asyncssh.delay = 1
+
+    async def run():
+        with bind(RunDeadline(timeouts={"command": 0.05}), DEVICE["name"]):
+            return await inventory_manager.inventory_task_async(DEVICE, "arista_eos")
+
+    result = asyncio.run(run())
+    assert (result["status"], result["phase"]) == ("TIMEOUT", "command")
+    assert asyncssh.connections[0].closed
+
+
+def test_worker_form_retries_login_failures(asyncssh, monkeypatch):
+    """device_worker_async applies the retry policy of device_worker to the coroutine form."""
+    policy = worker.RetryPolicy({"NetmikoTimeoutException": 3}, backoff=0.01, max_backoff=0.01)
+    monkeypatch.setattr(worker.RetryPolicy, "from_config", classmethod(lambda cls: policy))
+    asyncssh.tcp_errors = [async_transport.NetmikoTimeoutException("refused")] * 2
+
+    result = asyncio.run(worker.device_worker_async(inventory_manager.inventory_task, DEVICE, "arista_eos"))
+    assert result["status"] == "SUCCESS"
+    assert async_transport.get_async_form(worker.device_worker) is worker.device_worker_async
+
+
+def test_no_coroutine_form():
+    with pytest.raises(ValueError, match="cannot run on the asyncio engine"):
+        async_transport.get_async_form(lambda device: None)
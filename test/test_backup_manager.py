@@ -9,6 +9,14 @@ These tests focus on:
 
 import pytest
 from scripts import backup_manager
+from utils import network_utils
+from utils.reachability_cache import ReachabilityCache
+
+
+@pytest.fixture(autouse=True)
+def reachability_cache(tmp_path, monkeypatch):
+    """Keep reachability probes of the tests out of output/status."""
+    monkeypatch.setattr(network_utils, "_cache", ReachabilityCache(path=str(tmp_path / "reachability.db"), ttl=300))
 
 
 def test_validate_ip_valid():
@@ -0,0 +1,145 @@
+"""
+Unit tests for checkpoint.py
+
+These tests cover:
+- Journaling finished devices under a run ID
+- Resuming a run: skipping finished devices, retrying failed ones
+- Pipeline ({task: result}) records, retrying only their failed tasks
+- Keeping the last checkpoint.keep_runs run folders
+- Unknown run IDs and task mismatches
+- Writing the run's metrics.prom on close
+- Devices stopped before they started left for the resume
+"""
+
+import os
+import pytest
+from scripts import checkpoint, events
+from scripts.metrics import MetricsCollector
+
+
+DEVICES = [{"name": f"sw{i}", "host": f"10.0.0.{i}"} for i in range(1, 5)]
+
+
+def result(name, status="SUCCESS"):
+    return {"device": name, "status": status, "output": ""}
+
+
+@pytest.fixture(autouse=True)
+def runs_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "RUNS_FOLDER_PATH", str(tmp_path / "runs"))
+    monkeypatch.setattr(checkpoint, "start_run_metrics", lambda task: None)
+
+
+def interrupted_run():
+    """A backup run that finished sw1 (SUCCESS) and sw2 (FAILED) before stopping."""
+    run = checkpoint.RunCheckpoint(["backup"])
+    run.record(result("sw1"))
+    run.record(result("sw2", "FAILED"))
+    run.close()
+    return run.run_id
+
+
+def test_new_run_schedules_everything():
+    run = checkpoint.RunCheckpoint(["backup"])
+    to_run, kept = run.pending(DEVICES)
+    run.close()
+    assert to_run == DEVICES and kept == []
+    assert checkpoint.load_run(run.run_id)["status"] == "interrupted"
+
+
+def test_resume_skips_finished_devices():
+    run_id = interrupted_run()
+    run = checkpoint.RunCheckpoint(["backup"], run_id)
+    to_run, kept = run.pending(DEVICES)
+    assert [d["name"] for d in to_run] == ["sw3", "sw4"]
+    assert kept == [result("sw1"), result("sw2", "FAILED")]
+    run.complete()
+    run.close()
+    assert checkpoint.load_run(run_id)["status"] == "finished"
+
+
+def test_resume_retry_failed():
+    run_id = interrupted_run()
+    run = checkpoint.RunCheckpoint(["backup"], run_id)
+    to_run, kept = run.pending(DEVICES, retry_failed=True)
+    assert [d["name"] for d in to_run] == ["sw2", "sw3", "sw4"]
+    assert kept == [result("sw1")]
+
+    # The retry's record replaces the failure on the next resume
+    run.recorder(lambda r: None)(result("sw2"))
+    run.close()
+    to_run, kept = checkpoint.RunCheckpoint(["backup"], run_id).pending(DEVICES, retry_failed=True)
+    assert [d["name"] for d in to_run] == ["sw3", "sw4"]
+
+
+def test_pipeline_results():
+    run = checkpoint.RunCheckpoint(["backup", "inventory"])
+    run.record({"backup": result("sw1"), "inventory": result("sw1", "FAILED")})
+    run.close()
+    resumed = checkpoint.RunCheckpoint(["backup", "inventory"], run.run_id)
+    assert resumed.finished["sw1"]["status"] == "FAILED"
+
+
+def test_retry_failed_reruns_only_failed_tasks():
+    """--retry-failed on a backup,config run never pushes a config that already succeeded."""
+    run = checkpoint.RunCheckpoint(["backup", "config"])
+    run.record({"backup": result("sw1", "FAILED"), "config": result("sw1")})
+    run.record({"backup": result("sw2"), "config": result("sw2")})
+    run.close()
+
+    resumed = checkpoint.RunCheckpoint(["backup", "config"], run.run_id)
+    to_run, kept = resumed.pending(DEVICES[:2], retry_failed=True)
+    assert [d["name"] for d in to_run] == ["sw1"]
+    assert resumed.retry_tasks == {"sw1": ["backup"]}
+    assert kept == [{"config": result("sw1")}, {"backup": result("sw2"), "config": result("sw2")}]
+
+    # The retry is journaled with the kept config result
+    resumed.record({"backup": result("sw1")})
+    resumed.close()
+    record = checkpoint.RunCheckpoint(["backup", "config"], run.run_id).finished["sw1"]
+    assert record["status"] == "SUCCESS"
+    assert record["result"] == {"backup": result("sw1"), "config": result("sw1")}
+
+
+def test_old_runs_pruned(monkeypatch):
+    monkeypatch.setattr(checkpoint, "load_yaml", lambda path: {"checkpoint": {"keep_runs": 2}})
+    run_ids = [f"20250101-00000{i}-aaaaaa" for i in range(4)]
+    for run_id in run_ids:
+        os.makedirs(checkpoint.run_folder(run_id))
+    # A run still in progress in another process is never deleted
+    with open(os.path.join(checkpoint.run_folder(run_ids[0]), checkpoint.RUN_FILE), "w") as f:
+        f.write("status: running\n")
+
+    run = checkpoint.RunCheckpoint(["backup"])
+    run.close()
+    assert sorted(os.listdir(checkpoint.RUNS_FOLDER_PATH)) == [run_ids[0], run_ids[3], run.run_id]
+
+
+def test_unknown_run_and_task_mismatch():
+    with pytest.raises(ValueError):
+        checkpoint.RunCheckpoint(["backup"], "no-such-run")
+    with pytest.raises(ValueError):
+        checkpoint.RunCheckpoint(["config"], interrupted_run())
+
+
+def test_close_writes_run_metrics(monkeypatch):
+    monkeypatch.setattr(checkpoint, "start_run_metrics", lambda task: MetricsCollector(task).start())
+    run = checkpoint.RunCheckpoint(["backup"])
+    events.emit("device_finished", task="backup", device="sw1", status="SUCCESS", duration=1.0, result={})
+    run.close()
+    assert not events.has_subscribers()
+    with open(os.path.join(run.folder, checkpoint.METRICS_FILE)) as f:
+        assert 'netpilot_device_results_total{task="backup",group="",device_type="",status="SUCCESS"} 1' in f.read()
+
+
+def test_unstarted_devices_resumed():
+    run = checkpoint.RunCheckpoint(["backup"])
+    run.record(result("sw1"))
+    run.record({"device": "sw2", "status": "TIMEOUT", "phase": "queued", "output": "Run deadline reached"})
+    run.record({"device": "sw3", "status": "TIMEOUT", "phase": "command", "output": "Run deadline reached"})
+    run.complete()
+    run.close()
+    assert checkpoint.load_run(run.run_id)["status"] == "interrupted"
+    to_run, kept = checkpoint.RunCheckpoint(["backup"], run.run_id).pending(DEVICES)
+    assert [d["name"] for d in to_run] == ["sw2", "sw4"]
+    assert [r["device"] for r in kept] == ["sw1", "sw3"]
@@ -0,0 +1,89 @@
+"""
+Unit tests for concurrency.py
+
+These tests cover:
+- Additive increase after a window of fast logins
+- Multiplicative decrease on slow logins, auth failures and timeouts
+- Min/max bounds and the decrease cooldown
+- Login reports routed to the active limiter
+- Token bucket login rate limiting, shared by the processes of a host
+"""
+
+import pytest
+from netmiko import NetmikoAuthenticationException
+from scripts import concurrency
+
+
+def make_limiter(**kwargs):
+    params = dict(min_limit=2, max_limit=12, target_latency=5.0, decrease_factor=0.5, cooldown=0)
+    params.update(kwargs)
+    return concurrency.AdaptiveLimiter(10, **params)
+
+
+def test_additive_increase():
+    limiter = make_limiter()
+    for _ in range(9):
+        limiter.on_connect(1.0)
+    assert limiter.limit == 10
+    limiter.on_connect(1.0)
+    assert limiter.limit == 11
+
+
+def test_increase_capped_at_max():
+    limiter = make_limiter(max_limit=10)
+    for _ in range(50):
+        limiter.on_connect(1.0)
+    assert limiter.limit == 10
+
+
+def test_multiplicative_decrease_bounded_by_min():
+    limiter = make_limiter()
+    limiter.on_connect(8.0)
+    assert limiter.limit == 5
+    limiter.on_error("connect timeout")
+    assert limiter.limit == 2
+    limiter.on_error("authentication failure")
+    assert limiter.limit == 2
+
+
+def test_cooldown_merges_failure_bursts():
+    limiter = make_limiter(cooldown=60)
+    for _ in range(5):
+        limiter.on_error("authentication failure")
+    assert limiter.limit == 5
+
+
+def test_observe_connect_reports_to_active_limiter(monkeypatch):
+    monkeypatch.setattr(concurrency, "get_login_bucket", lambda: None)
+    limiter = make_limiter()
+    with concurrency.active_limiter(limiter):
+        with pytest.raises(NetmikoAuthenticationException):
+            with concurrency.observe_connect():
+                raise NetmikoAuthenticationException("bad password")
+    assert limiter.limit == 5
+
+    # Outside a run nothing is reported
+    with concurrency.observe_connect():
+        pass
+    assert limiter.limit == 5
+
+
+def test_token_bucket_limits_rate(monkeypatch):
+    """After the burst, logins wait for tokens at the configured rate."""
+    clock = [0.0]
+    monkeypatch.setattr(concurrency.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(concurrency.time, "sleep", lambda s: clock.__setitem__(0, clock[0] + s))
+
+    bucket = concurrency.TokenBucket(rate=10, burst=2)
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.1)
+
+
+def test_shared_token_bucket_across_processes(tmp_path):
+    """Buckets of two processes (one state file) share the burst and the rate."""
+    path = str(tmp_path / "login-rate.json")
+    gui = concurrency.SharedTokenBucket(rate=10, burst=2, path=path)
+    cli = concurrency.SharedTokenBucket(rate=10, burst=2, path=path)
+    assert gui.acquire() == 0.0
+    assert cli.acquire() == 0.0
+    assert cli.acquire() > 0
@@ -0,0 +1,80 @@
+"""
+Unit tests for config_parser.py
+
+These tests cover:
+- Cached YAML and command file loading
+- Invalidation on file changes
+- Read-only parsed objects and error handling
+"""
+
+import os
+import pickle
+import pytest
+from scripts import config_parser
+from utils.exceptions import ConfigFileError
+
+
+def touch_later(path):
+    """Bump mtime so a rewrite is detected even on coarse filesystem clocks."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_load_yaml_cached(tmp_path):
+    """An unchanged file should return the same parsed object."""
+    path = tmp_path / "config.yaml"
+    path.write_text("thread_pools:\n  num_threads: 10\n")
+    first = config_parser.load_yaml(str(path))
+    assert first["thread_pools"]["num_threads"] == 10
+    assert config_parser.load_yaml(str(path)) is first
+
+
+def test_load_yaml_invalidated_on_change(tmp_path):
+    """A modified file should be parsed again."""
+    path = tmp_path / "config.yaml"
+    path.write_text("thread_pools:\n  num_threads: 10\n")
+    config_parser.load_yaml(str(path))
+    path.write_text("thread_pools:\n  num_threads: 20\n")
+    touch_later(path)
+    assert config_parser.load_yaml(str(path))["thread_pools"]["num_threads"] == 20
+
+
+def test_load_yaml_read_only(tmp_path):
+    """Cached objects cannot be mutated, thaw() gives a mutable copy."""
+    path = tmp_path / "devices.yaml"
+    path.write_text("devices:\n- name: sw1\n  host: 10.0.0.1\n")
+    devices = config_parser.load_yaml(str(path))["devices"]
+    assert isinstance(devices, tuple)
+    with pytest.raises(TypeError):
+        devices[0]["host"] = "10.0.0.2"
+
+    copy = config_parser.thaw(devices)
+    copy[0]["host"] = "10.0.0.2"
+    assert devices[0]["host"] == "10.0.0.1"
+    assert pickle.loads(pickle.dumps(devices)) == devices
+
+
+def test_load_yaml_missing_file(tmp_path):
+    """Should raise ConfigFileError for a missing file."""
+    with pytest.raises(ConfigFileError):
+        config_parser.load_yaml(str(tmp_path / "missing.yaml"))
+
+
+def test_load_command_file(tmp_path):
+    """Should skip blank lines and comments and return a tuple."""
+    path = tmp_path / "commands.cfg"
+    path.write_text("! comment\nshow version\n\n  show inventory  \n")
+    assert config_parser.load_command_file(str(path)) == ("show version", "show inventory")
+
+
+def test_error_reporter_called(tmp_path):
+    """Registered reporters receive config file errors."""
+    messages = []
+    config_parser.register_error_reporter(messages.append)
+    try:
+        with pytest.raises(ConfigFileError):
+            config_parser.load_yaml(str(tmp_path / "missing.yaml"))
+    finally:
+        config_parser._error_reporters.remove(messages.append)
+    assert len(messages) == 1
+    assert "not found" in messages[0]
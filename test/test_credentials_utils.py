@@ -0,0 +1,68 @@
+"""
+Unit tests for credentials_utils.py
+
+These tests cover:
+- Override and default credential resolution
+- Parsing the file once and reloading on change
+"""
+
+import os
+import pytest
+from utils import credentials_utils
+
+
+CREDENTIALS = """
+default:
+  username: admin
+  password: admin
+  enable_secret: ""
+overrides:
+  sw1:
+    username: sw1_user
+    password: sw1_pass
+    enable_secret: sw1_secret
+"""
+
+
+@pytest.fixture
+def creds_file(tmp_path):
+    path = tmp_path / "credentials.yaml"
+    path.write_text(CREDENTIALS)
+    return str(path)
+
+
+def test_override_and_default(creds_file):
+    """Overrides win, other devices fall back to default."""
+    assert credentials_utils.load_credentials(creds_file, "sw1") == ("sw1_user", "sw1_pass", "sw1_secret")
+    assert credentials_utils.load_credentials(creds_file, "sw2") == ("admin", "admin", "")
+
+
+def test_no_credentials(tmp_path):
+    """Should raise ValueError without a matching override or default."""
+    path = tmp_path / "credentials.yaml"
+    path.write_text("overrides: {}\n")
+    with pytest.raises(ValueError):
+        credentials_utils.load_credentials(str(path), "sw1")
+
+
+def test_parsed_once(creds_file, monkeypatch):
+    """Repeated lookups should not re-parse an unchanged file."""
+    resolver = credentials_utils.CredentialResolver(creds_file)
+    calls = []
+    real_load = credentials_utils.yaml.safe_load
+    monkeypatch.setattr(credentials_utils.yaml, "safe_load", lambda f: calls.append(1) or real_load(f))
+    for _ in range(5):
+        resolver.resolve("sw2")
+    assert len(calls) == 1
+
+
+def test_reload_on_change(creds_file):
+    """A modified file should be picked up on the next lookup."""
+    resolver = credentials_utils.CredentialResolver(creds_file)
+    assert resolver.resolve("sw2")[0] == "admin"
+
+    with open(creds_file, "w") as f:
+        f.write(CREDENTIALS.replace("username: admin", "username: operator"))
+    stat = os.stat(creds_file)
+    os.utime(creds_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert resolver.resolve("sw2")[0] == "operator"
@@ -0,0 +1,172 @@
+"""
+Unit tests for daemon.py
+
+These tests cover:
+- Jobs run through the task managers with device selection and a result callback
+- Submit, status and streamed results over the HTTP API
+- Cancelling a running job stops its runs
+- Invalid submissions rejected
+- Prometheus metrics served on /metrics
+- Requests without the API token rejected, token file private
+- Finished jobs beyond keep_jobs dropped
+- Front-ends following daemon jobs, or an in-process queue when no daemon runs
+"""
+
+import os
+import stat
+import threading
+import types
+from urllib import request
+import pytest
+from scripts import daemon, events, multi_task_manager
+from scripts.daemon import DaemonClient, DaemonError, DaemonJobs, JobQueue, create_server, follow_job, open_job_queue
+from scripts.phases import RunDeadline
+
+
+def fake_manager(calls):
+    def main(engine=None, device_names=None, on_result=None, **kwargs):
+        calls.append((engine, device_names))
+        for name in device_names or ["sw1", "sw2"]:
+            on_result({"device": name, "status": "SUCCESS"})
+    return types.SimpleNamespace(main=main)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(multi_task_manager, "get_task_module", lambda task: fake_manager(calls))
+    return calls
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = create_server(("127.0.0.1", 0), max_jobs=1, token_file=str(tmp_path / "token"))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.jobs.shutdown()
+    server.metrics.stop()
+
+
+@pytest.fixture
+def client(server):
+    return DaemonClient(server.server_address[:2], token=server.token)
+
+
+def wait_done(job):
+    job.wait_results(0, timeout=5)
+    for _ in range(50):
+        if job.done:
+            return
+        job.wait_results(len(job.results), timeout=0.1)
+
+
+def test_job_runs_manager(calls):
+    jobs = JobQueue()
+    job = jobs.submit(["inventory"], ["sw3"], "thread")
+    wait_done(job)
+    assert job.state == "finished"
+    assert calls == [("thread", ["sw3"])]
+    assert job.summary()["statuses"] == {"SUCCESS": 1}
+    jobs.shutdown()
+
+
+def test_submit_invalid_task():
+    with pytest.raises(ValueError):
+        JobQueue().submit(["reboot"])
+
+
+def test_api_submit_stream_status(calls, client):
+    job = client.submit(["backup"])
+    results = list(client.results(job["id"]))
+    assert [r["device"] for r in results] == ["sw1", "sw2"]
+    status = client.status(job["id"])
+    assert status["state"] == "finished" and status["completed"] == 2
+    assert [j["id"] for j in client.jobs()] == [job["id"]]
+
+
+def test_api_errors(client):
+    with pytest.raises(DaemonError, match="Invalid task"):
+        client.submit(["reboot"])
+    with pytest.raises(DaemonError, match="Unknown job"):
+        client.status("nope")
+
+
+def test_api_cancel_running_job(monkeypatch, client):
+    started = threading.Event()
+
+    def main(on_result=None, **kwargs):
+        run = RunDeadline.from_config()
+        started.set()
+        # Stands in for a run: waits until the job is cancelled
+        run.cancelled.wait(5)
+        on_result({"device": "sw1", "status": "TIMEOUT", "output": run.reason})
+
+    monkeypatch.setattr(multi_task_manager, "get_task_module", lambda task: types.SimpleNamespace(main=main))
+    job = client.submit(["inventory"])
+    assert started.wait(5)
+    client.cancel(job["id"])
+    results = list(client.results(job["id"]))
+    assert results == [{"device": "sw1", "status": "TIMEOUT", "output": "Run cancelled"}]
+    assert client.status(job["id"])["state"] == "cancelled"
+
+
+def test_api_metrics(client):
+    events.emit("phase_finished", task="backup", device="sw1", phase="connect", duration=0.3, outcome="timeout")
+    req = request.Request(f"{client.url}/metrics", headers={"Authorization": f"Bearer {client.token}"})
+    with request.urlopen(req, timeout=5) as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        body = response.read().decode()
+    assert 'netpilot_phase_seconds_count{task="backup",group="",device_type="",phase="connect"} 1' in body
+    assert 'netpilot_phase_timeouts_total{task="backup",group="",device_type="",phase="connect"} 1' in body
+
+
+def test_api_requires_token(server, tmp_path):
+    assert stat.S_IMODE(os.stat(tmp_path / "token").st_mode) == 0o600
+    with pytest.raises(DaemonError, match="API token"):
+        DaemonClient(server.server_address[:2], token="guess").jobs()
+    with pytest.raises(DaemonError, match="API token"):
+        DaemonClient(server.server_address[:2], token="").submit(["backup"])
+    assert server.jobs.list() == []
+
+
+def test_results_since(calls, client):
+    job = client.submit(["backup"], ["sw1", "sw2", "sw3"])
+    list(client.results(job["id"]))
+    assert [r["device"] for r in client.results_since(job["id"], 1)] == ["sw2", "sw3"]
+
+
+def test_finished_jobs_evicted(calls):
+    jobs = JobQueue(keep_jobs=2)
+    submitted = [jobs.submit(["inventory"], [f"sw{i}"]) for i in range(4)]
+    for job in submitted:
+        wait_done(job)
+    jobs.shutdown()
+    assert [job.device_names for job in jobs.list()] == [["sw2"], ["sw3"]]
+    assert jobs.get(submitted[0].id) is None
+
+
+def test_front_end_uses_daemon(calls, server, tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, "get_daemon_address", lambda: server.server_address[:2])
+    monkeypatch.setattr(daemon, "get_token_file", lambda: str(tmp_path / "token"))
+    jobs = open_job_queue()
+    assert isinstance(jobs, DaemonJobs)
+    job = jobs.submit(["backup"], ["sw1", "sw2", "sw3"])
+    followed = [(job.state, [r["device"] for r in results]) for job, results in follow_job(jobs, job, 0.05)]
+    assert [device for _, devices in followed for device in devices] == ["sw1", "sw2", "sw3"]
+    assert followed[-1][0] == "finished"
+    assert jobs.get(job.id).summary()["completed"] == 3
+    assert server.jobs.get(job.id).state == "finished"
+
+
+def test_front_end_without_daemon(calls, tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, "get_daemon_address", lambda: ("127.0.0.1", 1))
+    monkeypatch.setattr(daemon, "get_token_file", lambda: str(tmp_path / "missing"))
+    jobs = open_job_queue()
+    assert isinstance(jobs, JobQueue)
+    job = jobs.submit(["inventory"], ["sw1"])
+    followed = list(follow_job(jobs, job, 0.05))
+    assert followed[-1][0].state == "finished"
+    assert [r["device"] for _, results in followed for r in results] == ["sw1"]
+    jobs.shutdown()
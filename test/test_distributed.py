@@ -0,0 +1,120 @@
+"""
+Unit tests for distributed.py
+
+These tests cover:
+- Sharding by site, group and hash, with pinned sites
+- Worker address parsing
+- A coordinator run against an in-process worker
+- A coordinator run on spawned local worker processes
+- Devices of an unavailable worker reported as FAILED
+- Cancelling the coordinator stops the devices running on its workers
+"""
+
+import multiprocessing
+import threading
+import time
+import pytest
+from scripts import distributed, engine, worker
+from scripts.distributed import parse_address, serve_worker, shard_jobs
+from scripts.phases import CancelScope, cancel_scope, phase
+from test.conftest import make_jobs
+
+
+pytestmark = pytest.mark.usefixtures("isolated_run")
+
+
+def use_config(monkeypatch, **params):
+    monkeypatch.setattr(engine, "load_yaml", lambda path: {"distributed": params})
+
+
+def names(shard):
+    return sorted(job[1]["name"] for job in shard)
+
+
+def test_shard_by_site_keeps_sites_together():
+    shards = shard_jobs(make_jobs(count=6), 2, by="site")
+    sites = [{job[1]["site"] for job in shard} for shard in shards]
+    assert not sites[0] & sites[1]
+    assert sum(len(shard) for shard in shards) == 6
+
+
+def test_shard_pinned_site():
+    shards = shard_jobs(make_jobs(count=6), 3, by="site", pinned={"site1": 2})
+    assert names(shards[2]) == ["sw1", "sw4"]
+
+
+def test_shard_by_hash_is_stable():
+    assert [names(s) for s in shard_jobs(make_jobs(count=6), 3, "hash")] == [names(s) for s in shard_jobs(make_jobs(count=6), 3, "hash")]
+
+
+def test_shard_unknown_key():
+    with pytest.raises(ValueError):
+        shard_jobs(make_jobs(count=6), 2, by="rack")
+
+
+def test_parse_address():
+    assert parse_address("10.1.0.5:6000") == ("10.1.0.5", 6000)
+    with pytest.raises(ValueError):
+        parse_address("10.1.0.5")
+
+
+def start_thread_worker(authkey):
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    threading.Thread(target=serve_worker, args=(("127.0.0.1", 0), authkey, sender), daemon=True).start()
+    return receiver.recv()
+
+
+def test_distributed_run_matches_thread_engine(monkeypatch):
+    host, port = start_thread_worker(b"secret")
+    monkeypatch.setenv(distributed.AUTHKEY_ENV, "secret")
+    use_config(monkeypatch, workers=[f"{host}:{port}"], worker_engine="thread")
+    results = engine.run_device_tasks(make_jobs(count=6), 2, engine="distributed")
+    expected = engine.run_device_tasks(make_jobs(count=6), 2, engine="thread")
+    assert sorted(results, key=lambda r: r["device"]) == sorted(expected, key=lambda r: r["device"])
+
+
+def test_local_worker_processes(monkeypatch, tmp_path):
+    # Spawned workers read config.yaml instead of inheriting the patches: run them in tmp_path
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "config.yaml").write_text(
+        "leases: {enabled: false}\nreachability: {bulk_probe: false}\nscheduling: {lpt: false}\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    use_config(monkeypatch, local_workers=2, shard_by="hash")
+    results = engine.run_device_tasks(make_jobs(count=6), 2, engine="distributed")
+    assert sorted(r["device"] for r in results) == [f"sw{i}" for i in range(1, 7)]
+    assert {r["status"] for r in results} == {"SUCCESS"}
+
+
+def test_unavailable_worker_fails_its_devices(monkeypatch):
+    monkeypatch.setenv(distributed.AUTHKEY_ENV, "secret")
+    # Nothing listens on port 1
+    use_config(monkeypatch, workers=["127.0.0.1:1"])
+    results = engine.run_device_tasks(make_jobs(count=3), 2, engine="distributed")
+    assert len(results) == 3
+    assert {(r["status"], r["error"]) for r in results} == {("FAILED", "WorkerUnavailable")}
+
+
+def slow_task(device, device_type):
+    with phase("connect"):
+        pass
+    for _ in range(100):
+        with phase("command"):
+            time.sleep(0.05)
+    return {"device": device["name"], "status": "SUCCESS", "output": device_type}
+
+
+def test_cancel_reaches_workers(monkeypatch):
+    host, port = start_thread_worker(b"secret")
+    monkeypatch.setenv(distributed.AUTHKEY_ENV, "secret")
+    use_config(monkeypatch, workers=[f"{host}:{port}"], worker_engine="thread")
+    jobs = [(slow_task, device, args) for _, device, args in make_jobs(count=2)]
+    scope = CancelScope()
+    threading.Timer(0.5, scope.cancel).start()
+    start = time.monotonic()
+    with cancel_scope(scope):
+        results = engine.run_device_tasks(jobs, 2, engine="distributed", worker=worker.device_worker)
+    # Stopped by the worker at its next phase, not abandoned by the coordinator
+    assert time.monotonic() - start < 3
+    assert {r["status"] for r in results} == {"TIMEOUT"}
+    assert all("Run cancelled" in r["output"] and "abandoned" not in r["output"] for r in results)
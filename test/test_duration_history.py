@@ -0,0 +1,33 @@
+"""
+Unit tests for duration_history.py
+
+These tests cover:
+- Recording per-device durations as a moving average per task
+- Median fallback for devices never seen before
+- Predicted longest-first makespan
+"""
+
+import pytest
+from utils.duration_history import DurationHistory, estimate_durations, predict_makespan
+
+
+def test_record_and_expected(tmp_path):
+    history = DurationHistory(str(tmp_path / "durations.db"), alpha=0.5)
+    history.record("backup", {"sw1": 10.0, "sw2": 2.0})
+    history.record("backup", {"sw1": 20.0})
+    history.record("inventory", {"sw1": 1.0})
+    assert history.expected("backup") == {"sw1": pytest.approx(15.0), "sw2": 2.0}
+    assert history.expected("config") == {}
+
+
+def test_unseen_devices_use_median():
+    estimates = estimate_durations(["sw1", "sw2", "sw3", "new"], {"sw1": 1.0, "sw2": 5.0, "sw3": 9.0})
+    assert estimates["new"] == 5.0
+    assert estimate_durations(["new"], {}) == {"new": 0.0}
+
+
+def test_predict_makespan_longest_first():
+    # LPT on 2 workers: [7] and [5, 3] -> 8
+    assert predict_makespan([3, 5, 7], 2) == 8
+    assert predict_makespan([3, 5, 7], 10) == 7
+    assert predict_makespan([], 4) == 0.0
@@ -0,0 +1,335 @@
+"""
+Unit tests for engine.py
+
+These tests cover:
+- Thread, asyncio and pipeline engines returning the same result dicts
+- Worker wrapper
+- asyncio engine: coroutine task forms, devices in flight without a thread
+  each, tasks without a coroutine form and a missing asyncssh rejected
+- Unreachable devices kept off the workers
+- Unknown engine names
+- In-flight devices bounded by the adaptive limit
+- Longest-expected-first ordering
+- Run deadline cancellation and TIMEOUT results
+- Abandoned tasks not delaying the exit of the process
+- Cancellation through a cancel scope
+- Devices waiting for a lease at the deadline reported as TIMEOUT
+- A task failing outside a worker on the pipeline engine failing only its device
+- A failed pipeline connect stage login reported, not repeated
+- Progress events of a run
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+import pytest
+from netmiko import NetmikoAuthenticationException
+from types import SimpleNamespace
+from scripts import async_transport, engine, events, leases, worker
+from scripts.concurrency import AdaptiveLimiter
+from scripts.phases import CancelScope, cancel_scope, phase
+from scripts.worker import RetryPolicy, device_worker
+from test.conftest import fake_task, make_jobs
+
+
+pytestmark = pytest.mark.usefixtures("isolated_run")
+
+
+async def fake_task_async(device, device_type):
+    return fake_task(device, device_type)
+
+
+@pytest.fixture
+def asyncio_forms(monkeypatch):
+    """asyncio engine prerequisites: a stand-in for asyncssh and the coroutine form of fake_task."""
+    monkeypatch.setattr(async_transport, "asyncssh", SimpleNamespace())
+    monkeypatch.setitem(async_transport._async_forms, fake_task, fake_task_async)
+
+    def register(task_func, coroutine_func):
+        monkeypatch.setitem(async_transport._async_forms, task_func, coroutine_func)
+    return register
+
+
+def by_device(results):
+    return sorted(results, key=lambda r: r["device"])
+
+
+def test_engines_return_same_results(asyncio_forms):
+    """All engines should produce identical result dicts."""
+    threaded = engine.run_device_tasks(make_jobs(fake_task), 2, engine="thread")
+    async_results = engine.run_device_tasks(make_jobs(fake_task), 2, engine="asyncio")
+    pipeline_results = engine.run_device_tasks(make_jobs(fake_task), 2, engine="pipeline")
+    assert by_device(threaded) == by_device(async_results) == by_device(pipeline_results)
+    assert len(threaded) == 5
+
+
+def test_asyncio_engine_runs_worker_form(asyncio_forms):
+    """device_worker jobs run through its coroutine form, with the same results."""
+    threaded = engine.run_device_tasks(make_jobs(fake_task), 2, engine="thread", worker=device_worker)
+    async_results = engine.run_device_tasks(make_jobs(fake_task), 2, engine="asyncio", worker=device_worker)
+    assert by_device(threaded) == by_device(async_results)
+
+
+def test_asyncio_engine_without_thread_per_device(asyncio_forms, monkeypatch):
+    """Hundreds of devices are in flight at once on the event loop thread."""
+    monkeypatch.setattr(engine, "_async_concurrency", lambda: 300)
+    running, peak, threads = [0], [0], set()
+
+    async def slow_task(device, device_type):
+        threads.add(threading.get_ident())
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.2)
+        running[0] -= 1
+        return fake_task(device, device_type)
+
+    asyncio_forms(fake_task, slow_task)
+    devices = [{"name": f"sw{i}", "host": f"10.0.{i // 250}.{i % 250 + 1}"} for i in range(400)]
+    results = engine.run_device_tasks([(fake_task, device, ("arista_eos",)) for device in devices], 2, engine="asyncio")
+    assert len(results) == 400 and {r["status"] for r in results} == {"SUCCESS"}
+    assert peak[0] == 300
+    assert len(threads) == 1
+
+
+def test_asyncio_engine_rejects_tasks_without_coroutine_form(asyncio_forms, monkeypatch):
+    """Tasks without a coroutine form (config, firmware) fail before any device is probed."""
+    probed = []
+    monkeypatch.setattr(engine, "probe_reachability", lambda hosts, **kwargs: probed.extend(hosts))
+
+    def config_task(device, device_type):
+        return fake_task(device, device_type)
+
+    with pytest.raises(ValueError, match="config_task cannot run on the asyncio engine"):
+        engine.run_device_tasks(make_jobs(config_task), 2, engine="asyncio")
+    assert probed == []
+
+
+def test_asyncio_engine_needs_asyncssh(asyncio_forms, monkeypatch):
+    monkeypatch.setattr(async_transport, "asyncssh", None)
+    with pytest.raises(ValueError, match="asyncssh"):
+        engine.run_device_tasks(make_jobs(fake_task), 2, engine="asyncio")
+
+
+def test_worker_wrapper_is_used():
+    """Jobs should be called through the worker when one is given."""
+    calls = []
+
+    def worker(task_func, device, *args):
+        calls.append(device["name"])
+        return task_func(device, *args)
+
+    engine.run_device_tasks(make_jobs(fake_task), 2, engine="thread", worker=worker)
+    assert sorted(calls) == ["sw1", "sw2", "sw3", "sw4", "sw5"]
+
+
+def test_unreachable_devices_not_scheduled(monkeypatch):
+    """Dead devices are resolved before the pool starts and never take a worker."""
+    monkeypatch.setattr(engine, "probe_reachability", lambda hosts, **kwargs: {h: h != "10.0.0.3" for h in hosts})
+    scheduled = []
+    monkeypatch.setattr(engine, "_run_threaded", lambda jobs, *args: scheduled.extend(jobs))
+
+    results = engine.run_device_tasks(make_jobs(fake_task), 2, engine="thread")
+    assert [job[1]["name"] for job in scheduled] == ["sw1", "sw2", "sw4", "sw5"]
+    assert [r["device"] for r in results] == ["sw3"]
+
+
+def test_unknown_engine():
+    """Should raise ValueError for unsupported engines."""
+    with pytest.raises(ValueError):
+        engine.get_engine("gevent")
+
+
+def test_in_flight_follows_limiter():
+    """The thread engine never runs more devices at once than the current limit."""
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def slow_task(device, device_type):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return fake_task(device, device_type)
+
+    results = []
+    limiter = AdaptiveLimiter(2, min_limit=1, max_limit=8)
+    engine._run_threaded(make_jobs(slow_task), 8, None, results.append, limiter)
+    assert len(results) == 5
+    assert peak[0] <= 2
+
+
+def test_longest_expected_first(isolated_run):
+    """Jobs are submitted slowest-first from the recorded durations of the task."""
+    isolated_run.record("backup", {"sw1": 1.0, "sw2": 30.0, "sw4": 10.0})
+
+    jobs, _, predicted = engine._order_longest_first(make_jobs(fake_task), "backup", 2)
+    # sw3 and sw5 have no history: median estimate of 10s
+    assert [job[1]["name"] for job in jobs] == ["sw2", "sw3", "sw4", "sw5", "sw1"]
+    assert predicted == 31.0
+
+
+@pytest.mark.parametrize("engine_name", ["thread", "asyncio"])
+def test_run_deadline_cancels_and_reports_timeout(monkeypatch, asyncio_forms, engine_name):
+    """At the deadline running tasks stop at their next phase and unstarted ones are not run."""
+    monkeypatch.setattr(engine.RunDeadline, "from_config", classmethod(lambda cls: cls(0.2, cancel_grace=1)))
+    monkeypatch.setattr(engine, "_async_concurrency", lambda: 2)
+
+    def slow_task(device, device_type):
+        for _ in range(20):
+            with phase("command"):
+                time.sleep(0.05)
+        return fake_task(device, device_type)
+
+    async def slow_task_async(device, device_type):
+        for _ in range(20):
+            with phase("command"):
+                await asyncio.sleep(0.05)
+        return fake_task(device, device_type)
+
+    asyncio_forms(slow_task, slow_task_async)
+    results = engine.run_device_tasks(make_jobs(slow_task), 2, engine=engine_name, worker=device_worker)
+    assert sorted(r["status"] for r in results) == ["TIMEOUT"] * 5
+    assert sorted(r["phase"] for r in results) == ["command", "command", "queued", "queued", "queued"]
+
+
+@pytest.mark.parametrize("engine_name", ["thread", "pipeline"])
+def test_abandoned_task_does_not_delay_exit(tmp_path, engine_name):
+    """The run deadline bounds the run time of the process (e.g. a cron job), even with a hung task."""
+    script = textwrap.dedent(f"""
+        import time
+        from scripts import engine, leases
+        from utils.duration_history import DurationHistory
+
+        engine.probe_reachability = lambda hosts, **kwargs: {{h: True for h in hosts}}
+        engine.build_device_status = lambda devices: []
+        engine.write_device_status_yaml = lambda devices, **kwargs: None
+        engine.DurationHistory = lambda **kwargs: DurationHistory({str(tmp_path / "durations.db")!r})
+        engine.RunDeadline.from_config = classmethod(lambda cls: cls(0.5, cancel_grace=0.5))
+        leases.get_lease_manager = lambda: None
+
+        def hung_task(device, device_type):
+            time.sleep(15)
+
+        jobs = [(hung_task, {{"name": "sw1", "host": "10.0.0.1"}}, ("arista_eos",))]
+        results = engine.run_device_tasks(jobs, 1, engine={engine_name!r})
+        print(results[0]["status"])
+    """)
+    start = time.monotonic()
+    child = subprocess.run(
+        [sys.executable, "-c", script], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, timeout=30,
+    )
+    assert child.stdout.strip() == "TIMEOUT", child.stderr
+    assert time.monotonic() - start < 10
+
+
+@pytest.mark.parametrize("engine_name", ["thread", "asyncio", "pipeline"])
+def test_deadline_while_waiting_for_lease(monkeypatch, tmp_path, asyncio_forms, engine_name):
+    """A device whose lease is held elsewhere at the deadline is a TIMEOUT result, not a crashed run."""
+    manager = leases.LeaseManager(str(tmp_path / "leases"), max_sessions=10, poll_interval=0.01)
+    monkeypatch.setattr(leases, "get_lease_manager", lambda: manager)
+    monkeypatch.setattr(engine.RunDeadline, "from_config", classmethod(lambda cls: cls(0.3, cancel_grace=1)))
+
+    def slow_task(device, device_type):
+        with phase("command"):
+            time.sleep(0.05)
+        return fake_task(device, device_type)
+
+    async def slow_task_async(device, device_type):
+        with phase("command"):
+            await asyncio.sleep(0.05)
+        return fake_task(device, device_type)
+
+    asyncio_forms(slow_task, slow_task_async)
+
+    # Another process holds sw1 for the whole run
+    other = leases.LeaseManager(str(tmp_path / "leases"), max_sessions=10, poll_interval=0.01)
+    with other.lease("sw1", "backup"):
+        results = engine.run_device_tasks(make_jobs(slow_task), 2, engine=engine_name, worker=device_worker)
+    assert len(results) == 5
+    sw1 = next(r for r in results if r["device"] == "sw1")
+    assert sw1["status"] == "TIMEOUT" and sw1["phase"] in ("lease", "queued")
+
+
+def test_pipeline_task_error_fails_one_device():
+    def task(device, device_type):
+        if device["name"] == "sw2":
+            raise RuntimeError("boom")
+        return fake_task(device, device_type)
+
+    results = engine.run_device_tasks(make_jobs(task), 2, engine="pipeline")
+    assert len(results) == 5
+    sw2 = next(r for r in results if r["device"] == "sw2")
+    assert (sw2["status"], sw2["error"], sw2["output"]) == ("FAILED", "RuntimeError", "boom")
+    assert {r["status"] for r in results if r["device"] != "sw2"} == {"SUCCESS"}
+
+
+def test_cancel_scope_stops_run():
+    """Cancelling the scope of a run stops it like a deadline, with the cancel reason."""
+    scope = CancelScope()
+
+    def slow_task(device, device_type):
+        scope.cancel()
+        for _ in range(20):
+            with phase("command"):
+                time.sleep(0.05)
+        return fake_task(device, device_type)
+
+    with cancel_scope(scope):
+        results = engine.run_device_tasks(make_jobs(slow_task), 1, engine="thread", worker=device_worker)
+    assert [r["status"] for r in results] == ["TIMEOUT"] * 5
+    assert "queued" in {r["phase"] for r in results}
+    assert all("Run cancelled" in r["output"] for r in results)
+
+
+def test_run_emits_progress_events():
+    seen = []
+
+    def task(device, device_type):
+        with phase("command"):
+            return fake_task(device, device_type)
+
+    with events.subscribed(seen.append):
+        engine.run_device_tasks(make_jobs(task), 2, engine="thread", worker=device_worker, task="backup")
+    names = [e["event"] for e in seen]
+    assert names[0] == "task_started" and names[-1] == "task_finished"
+    assert names.count("device_started") == names.count("device_finished") == 5
+    # One command phase per device, plus the bulk reachability probe
+    assert names.count("phase_finished") == 6
+    assert [e["device"] for e in seen if e["event"] == "phase_finished" and e["phase"] == "probe"] == [None]
+    finished = [e for e in seen if e["event"] == "device_finished"]
+    assert all(e["task"] == "backup" and e["status"] == "SUCCESS" and e["duration"] >= 0 for e in finished)
+    assert seen[-1]["statuses"] == {"SUCCESS": 5}
+
+
+@pytest.mark.parametrize("attempts, task_logins", [(1, 0), (2, 1)])
+def test_pipeline_login_failure_not_repeated(monkeypatch, attempts, task_logins):
+    """A connect stage login failure is the device's first try; only the retry policy logs in again."""
+    prewarmed, logins = [], []
+
+    def failing_prewarm(device, device_type):
+        prewarmed.append(device["name"])
+        with phase("connect"):
+            raise NetmikoAuthenticationException("Authentication failed")
+
+    def task(device, device_type):
+        logins.append(device["name"])
+        return fake_task(device, device_type)
+
+    policy = RetryPolicy({"NetmikoAuthenticationException": attempts}, backoff=0)
+    monkeypatch.setattr(RetryPolicy, "from_config", classmethod(lambda cls: policy))
+    monkeypatch.setattr(engine, "prewarm_session", failing_prewarm)
+    jobs = [(task, {"name": "sw1", "host": "10.0.0.1", "group": "arista"}, ("arista_eos",))]
+    [result] = engine.run_device_tasks(jobs, 1, engine="pipeline", worker=device_worker)
+    assert prewarmed == ["sw1"]
+    assert len(logins) == task_logins
+    if attempts == 1:
+        assert result["status"] == "FAILED" and result["error"] == "NetmikoAuthenticationException"
+    else:
+        assert result["status"] == "SUCCESS"
@@ -0,0 +1,40 @@
+"""
+Unit tests for events.py
+
+These tests cover:
+- Subscribing, filtering by event name and unsubscribing
+- Failing subscribers not breaking the emitter
+- Unknown event names rejected
+"""
+
+import pytest
+from scripts import events
+
+
+def test_subscribe_and_filter():
+    seen, finished = [], []
+    with events.subscribed(seen.append), events.subscribed(finished.append, ["device_finished"]):
+        assert events.has_subscribers()
+        events.emit("device_started", task="backup", device="sw1")
+        events.emit("device_finished", task="backup", device="sw1", status="SUCCESS")
+    events.emit("device_started", task="backup", device="sw2")
+    assert [e["event"] for e in seen] == ["device_started", "device_finished"]
+    assert [e["device"] for e in finished] == ["sw1"]
+    assert "time" in seen[0]
+    assert not events.has_subscribers()
+
+
+def test_failing_subscriber_ignored():
+    seen = []
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    with events.subscribed(broken), events.subscribed(seen.append):
+        events.emit("task_started", task="backup", engine="thread", devices=1)
+    assert len(seen) == 1
+
+
+def test_unknown_event():
+    with pytest.raises(ValueError):
+        events.subscribe(print, ["device_exploded"])
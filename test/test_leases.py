@@ -0,0 +1,125 @@
+"""
+Unit tests for leases.py
+
+These tests cover:
+- One holder per device lease, later jobs queue instead of failing
+- Session slots bounding devices worked on at once
+- Holder information
+- Cancellation while waiting for a lease
+- Parked pooled sessions keeping their lease and slot
+"""
+
+import threading
+import time
+import pytest
+from scripts import leases, phases
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return leases.LeaseManager(str(tmp_path / "leases"), max_sessions=2, poll_interval=0.01)
+
+
+def hold(manager, device, started, release):
+    with manager.lease(device, "backup_task"):
+        started.set()
+        release.wait(5)
+
+
+def test_device_lease_queues(manager):
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold, args=(manager, "sw1", started, release))
+    holder.start()
+    started.wait(5)
+
+    [held] = [h for h in manager.holders() if h["lease"] == "device-sw1"]
+    assert held["task"] == "backup_task" and held["device"] == "sw1"
+
+    acquired_at = []
+
+    def wait_for_lease():
+        with manager.lease("sw1"):
+            acquired_at.append(time.monotonic())
+
+    waiter = threading.Thread(target=wait_for_lease)
+    waiter.start()
+    time.sleep(0.1)
+    assert not acquired_at
+    released_at = time.monotonic()
+    release.set()
+    waiter.join(5)
+    holder.join(5)
+    assert acquired_at and acquired_at[0] >= released_at
+
+
+def test_session_slots_bound_devices(manager):
+    started = [threading.Event() for _ in range(3)]
+    release = threading.Event()
+    threads = [threading.Thread(target=hold, args=(manager, f"sw{i}", started[i], release)) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    assert sum(e.is_set() for e in started) == 2
+    assert len([h for h in manager.holders() if h["lease"].startswith("slot-")]) == 2
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert all(e.is_set() for e in started)
+    assert manager.holders() == []
+
+
+def test_cancelled_run_stops_waiting(manager):
+    started, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold, args=(manager, "sw1", started, release))
+    holder.start()
+    started.wait(5)
+
+    run = phases.RunDeadline()
+    run.cancel()
+    with phases.bind(run, "sw1"):
+        with pytest.raises(phases.TaskTimeout) as exc:
+            with manager.lease("sw1"):
+                pytest.fail("lease acquired while held")
+    assert exc.value.phase == "lease"
+    release.set()
+    holder.join(5)
+
+
+def try_lease(manager, device):
+    """True when device can be leased within 0.1s."""
+    run = phases.RunDeadline()
+    threading.Timer(0.1, run.cancel).start()
+    try:
+        with phases.bind(run, device), manager.lease(device):
+            return True
+    except phases.TaskTimeout:
+        return False
+
+
+def test_parked_session_keeps_lease(tmp_path, manager):
+    other = leases.LeaseManager(str(tmp_path / "leases"), max_sessions=2, poll_interval=0.01)
+    with manager.lease("sw1", "backup_task"):
+        (owner, device) = leases.current_lease()
+        assert owner.park(device, "session", lambda: None)
+    # Another process cannot log in while the session is open
+    assert not try_lease(other, "sw1")
+    assert [h["task"] for h in manager.holders() if h["lease"] == "device-sw1"] == ["idle session"]
+    # A job of this process takes the lease over
+    assert try_lease(manager, "sw1")
+    manager.unpark("sw1", "session")
+    assert manager.holders() == []
+    assert try_lease(other, "sw1")
+
+
+def test_slot_waiter_closes_parked_session(tmp_path):
+    manager = leases.LeaseManager(str(tmp_path / "leases"), max_sessions=1, poll_interval=0.01)
+    closed = []
+
+    def close():
+        closed.append("sw1")
+        manager.unpark("sw1", "session")
+
+    with manager.lease("sw1"):
+        manager.park("sw1", "session", close)
+    with manager.lease("sw2"):
+        assert closed == ["sw1"]
@@ -0,0 +1,69 @@
+"""
+Unit tests for metrics.py
+
+These tests cover:
+- Phase histograms with cumulative buckets, labelled by group and device type
+- Result, timeout and retry counters
+- The task filter and label escaping
+- Atomic writes and the metrics.enabled switch
+"""
+
+import pytest
+from scripts import events, metrics
+from scripts.metrics import MetricsCollector, start_run_metrics
+
+
+DEVICES = {"devices": [{"name": "sw1", "group": "arista"}, {"name": "r1", "group": "cisco"}]}
+
+
+@pytest.fixture(autouse=True)
+def inventory(monkeypatch):
+    monkeypatch.setattr(metrics, "load_yaml", lambda path: DEVICES)
+
+
+def test_phase_histogram_buckets():
+    collector = MetricsCollector(buckets=[1, 5])
+    with events.subscribed(collector):
+        for duration in (0.5, 1, 3, 7):
+            events.emit("phase_finished", task="backup", device="sw1", phase="connect", duration=duration, outcome="ok")
+    text = collector.render()
+    labels = 'task="backup",group="arista",device_type="arista_eos",phase="connect"'
+    assert f'netpilot_phase_seconds_bucket{{{labels},le="1"}} 2' in text
+    assert f'netpilot_phase_seconds_bucket{{{labels},le="5"}} 3' in text
+    assert f'netpilot_phase_seconds_bucket{{{labels},le="+Inf"}} 4' in text
+    assert f"netpilot_phase_seconds_sum{{{labels}}} 11.500000" in text
+    assert f"netpilot_phase_seconds_count{{{labels}}} 4" in text
+    assert "# TYPE netpilot_phase_seconds histogram" in text
+
+
+def test_counters():
+    collector = MetricsCollector().start()
+    events.emit("phase_finished", task="backup", device="r1", phase="command", duration=60.0, outcome="timeout")
+    events.emit("device_retry", task="backup", device="r1", attempt=1, error="timeout", delay=1)
+    events.emit("device_finished", task="backup", device="r1", status="TIMEOUT", duration=61.0, result={})
+    events.emit("device_finished", task="backup", device="sw1", status="SUCCESS", duration=2.0, result={})
+    collector.stop()
+    text = collector.render()
+    assert 'netpilot_phase_timeouts_total{task="backup",group="cisco",device_type="cisco_ios",phase="command"} 1' in text
+    assert 'netpilot_retries_total{task="backup",group="cisco",device_type="cisco_ios"} 1' in text
+    assert 'netpilot_device_results_total{task="backup",group="cisco",device_type="cisco_ios",status="TIMEOUT"} 1' in text
+    assert 'netpilot_device_seconds_count{task="backup",group="arista",device_type="arista_eos"} 1' in text
+    assert not events.has_subscribers()
+
+
+def test_task_filter_and_escaping():
+    collector = MetricsCollector(task='odd"task')
+    collector({"event": "device_finished", "task": "backup", "device": "sw1", "status": "SUCCESS", "duration": 1.0})
+    collector({"event": "device_finished", "task": 'odd"task', "device": "sw9", "status": "SUCCESS", "duration": 1.0})
+    text = collector.render()
+    assert 'task="backup"' not in text
+    assert 'netpilot_device_results_total{task="odd\\"task",group="",device_type="",status="SUCCESS"} 1' in text
+
+
+def test_write_and_enabled_switch(tmp_path, monkeypatch):
+    path = tmp_path / "run" / "metrics.prom"
+    MetricsCollector().write(str(path))
+    assert path.read_text().startswith("# HELP netpilot_phase_seconds")
+    assert not (tmp_path / "run" / "metrics.prom.tmp").exists()
+    monkeypatch.setattr(metrics, "load_yaml", lambda path: {"metrics": {"enabled": False}})
+    assert start_run_metrics("backup") is None
@@ -0,0 +1,79 @@
+"""
+Unit tests for multi_task_manager.py
+
+These tests cover:
+- Task ordering and validation
+- One pipeline job per device with every selected task, or only its failed ones on a retry
+- Tasks sharing a single session per device
+"""
+
+import pytest
+from scripts import multi_task_manager, netmiko_utils, worker
+
+
+@pytest.fixture(autouse=True)
+def no_circuit_breaker(monkeypatch):
+    """Keep circuit breaker state of test runs out of output/."""
+    monkeypatch.setattr(worker, "get_circuit_breaker", lambda: None)
+
+
+def test_order_tasks():
+    """Selected tasks run in the defined pipeline order."""
+    assert multi_task_manager.order_tasks(["config", "backup", "inventory"]) == ["backup", "inventory", "config"]
+
+
+def test_order_tasks_invalid():
+    """Should raise ValueError for unknown tasks."""
+    with pytest.raises(ValueError):
+        multi_task_manager.order_tasks(["backup", "reboot"])
+
+
+def test_build_jobs_one_per_device():
+    """Each known device gets a single job holding all selected tasks."""
+    devices = [
+        {"name": "sw1", "host": "192.168.1.1", "group": "arista"},
+        {"name": "sw2", "host": "192.168.1.2", "group": "unknown"},
+    ]
+    jobs = multi_task_manager.build_jobs(devices, ["backup", "inventory"])
+    assert len(jobs) == 1
+    task_func, device, (device_type, task_jobs) = jobs[0]
+    assert device["name"] == "sw1"
+    assert device_type == "arista_eos"
+    assert [task for task, _, _ in task_jobs] == ["backup", "inventory"]
+
+
+def test_build_jobs_retry_tasks():
+    """A device retrying its failed tasks only runs those."""
+    devices = [
+        {"name": "sw1", "host": "192.168.1.1", "group": "arista"},
+        {"name": "sw2", "host": "192.168.1.2", "group": "arista"},
+    ]
+    jobs = multi_task_manager.build_jobs(devices, ["backup", "config"], {"sw1": ["backup"]})
+    assert [[task for task, _, _ in job[2][1]] for job in jobs] == [["backup"], ["backup", "config"]]
+
+
+def test_pipeline_task_single_login(monkeypatch):
+    """All tasks of a pipeline should run over one session."""
+    opened = []
+
+    class FakeConnection:
+        def disconnect(self):
+            pass
+
+    def fake_acquire(params):
+        opened.append(params["host"])
+        return FakeConnection()
+
+    monkeypatch.setattr(netmiko_utils, "_connection_params", lambda d, t: {"host": d["host"], "device_type": t})
+    monkeypatch.setattr(netmiko_utils, "_acquire_session", fake_acquire)
+    monkeypatch.setattr(netmiko_utils, "_release_session", lambda *args, **kwargs: None)
+
+    def fake_task(device, device_type):
+        with netmiko_utils.device_session(device, device_type) as net_connect:
+            return {"device": device["name"], "status": "SUCCESS", "output": id(net_connect)}
+
+    device = {"name": "sw1", "host": "192.168.1.1", "group": "arista"}
+    task_jobs = [("backup", fake_task, ("arista_eos",)), ("inventory", fake_task, ("arista_eos",))]
+    results = multi_task_manager.pipeline_task(device, "arista_eos", task_jobs)
+    assert opened == ["192.168.1.1"]
+    assert results["backup"]["output"] == results["inventory"]["output"]
@@ -0,0 +1,155 @@
+"""
+Unit tests for netmiko_utils.py
+
+These tests cover:
+- Splitting batched command output back into per-command sections
+- Batched vs sequential execution of read-only command lists
+- Draining the rest of a mismatched batch before falling back, or failing
+- Firmware upgrades reporting timeouts and cancellation instead of success
+"""
+
+import hashlib
+from contextlib import contextmanager
+import pytest
+from scripts import firmware_manager, netmiko_utils
+from scripts.phases import RunDeadline, TaskTimeout, bind
+
+
+PROMPT = "sw1#"
+COMMANDS = ["show version", "show inventory"]
+RAW = (
+    "sw1#show version\r\n"
+    "Arista vEOS\r\n"
+    "Software image version: 4.32\r\n"
+    "sw1#show inventory\r\n"
+    "System has 1 power supply slot\r\n"
+    "sw1#"
+)
+
+
+class FakeChannel:
+    """Feeds pre-recorded output in chunks, like a slow SSH channel."""
+    host = "10.0.0.1"
+    RETURN = "\n"
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.written = []
+
+    def find_prompt(self):
+        return PROMPT
+
+    def write_channel(self, data):
+        self.written.append(data)
+
+    def read_channel(self):
+        return self.chunks.pop(0) if self.chunks else ""
+
+    def send_command(self, cmd, expect_string=None):
+        return {"show version": "Arista vEOS\nSoftware image version: 4.32",
+                "show inventory": "System has 1 power supply slot"}[cmd]
+
+    def clear_buffer(self):
+        pass
+
+
+def test_split_batched_output_complete():
+    """Complete output should split into one section per command."""
+    outputs = netmiko_utils._split_batched_output(RAW, PROMPT, COMMANDS)
+    assert outputs == [
+        "Arista vEOS\nSoftware image version: 4.32",
+        "System has 1 power supply slot",
+    ]
+
+
+def test_split_batched_output_incomplete():
+    """Output without the final prompt is not complete yet."""
+    assert netmiko_utils._split_batched_output(RAW[:-len(PROMPT)], PROMPT, COMMANDS) is None
+
+
+def test_split_batched_output_echo_mismatch():
+    """Echoes that do not match the sent commands raise ValueError."""
+    with pytest.raises(ValueError):
+        netmiko_utils._split_batched_output(RAW, PROMPT, ["show clock", "show inventory"])
+
+
+def test_send_commands_batched_single_write():
+    """All commands go out in one write and the output is reassembled."""
+    channel = FakeChannel([RAW[len(PROMPT):40], RAW[40:]])
+    outputs = netmiko_utils.send_commands_batched(channel, COMMANDS, read_timeout=5)
+    assert channel.written == ["show version\nshow inventory\n"]
+    assert outputs == [channel.send_command(cmd) for cmd in COMMANDS]
+
+
+def test_run_show_commands_matches_sequential(monkeypatch):
+    """Batched mode should give the same result as sequential execution."""
+    monkeypatch.setattr(netmiko_utils, "load_yaml", lambda path: {"command_batching": {"enabled": True}})
+    batched = netmiko_utils.run_show_commands(FakeChannel([RAW[len(PROMPT):]]), COMMANDS)
+
+    monkeypatch.setattr(netmiko_utils, "load_yaml", lambda path: {})
+    sequential = netmiko_utils.run_show_commands(FakeChannel([]), COMMANDS)
+    assert batched == sequential
+
+
+def test_mismatched_batch_drained_before_fallback(monkeypatch):
+    """Leftover batch output is read away before commands run one by one."""
+    monkeypatch.setattr(netmiko_utils, "load_yaml", lambda path: {"command_batching": {"enabled": True}})
+    raw = RAW.replace("show version", "show clock", 1)
+    # Mismatched first echo, then the rest of the batch and the drain newline's prompt
+    channel = FakeChannel([raw[len(PROMPT):40], raw[40:], "", "\r\nsw1#"])
+    outputs = netmiko_utils.run_show_commands(channel, COMMANDS)
+    assert outputs == [(cmd, channel.send_command(cmd)) for cmd in COMMANDS]
+    assert channel.chunks == []
+    assert channel.written == ["show version\nshow inventory\n", "\n"]
+
+
+def test_mismatched_batch_never_settling_fails(monkeypatch):
+    """A device that keeps sending after a mismatched echo fails the command instead of falling back."""
+    channel = FakeChannel([RAW.replace("show version", "show clock", 1)[len(PROMPT):]] + ["more output\r\n"] * 1000)
+    with pytest.raises(netmiko_utils.ReadTimeout):
+        netmiko_utils.send_commands_batched(channel, COMMANDS, read_timeout=0.5)
+
+
+@pytest.fixture
+def firmware_files(tmp_path, monkeypatch):
+    image = tmp_path / "EOS.swi"
+    image.write_bytes(b"image")
+    md5 = tmp_path / "EOS.swi.md5"
+    md5.write_text(hashlib.md5(b"image").hexdigest())
+    firmware = {"arista_eos": {"firmware": {"file_path": str(image), "file_name": "EOS.swi", "md5sum_path": str(md5)}}}
+    monkeypatch.setattr(netmiko_utils, "load_yaml", lambda path: firmware)
+    monkeypatch.setattr(firmware_manager, "is_reachable", lambda ip: True)
+
+
+def test_firmware_timeout_not_reported_as_success(firmware_files, monkeypatch):
+
+    @contextmanager
+    def timed_out_session(device, device_type):
+        raise TaskTimeout("connect", "Run deadline reached, task cancelled")
+        yield
+
+    monkeypatch.setattr(netmiko_utils, "device_session", timed_out_session)
+    result = firmware_manager.firmware_task({"name": "sw1", "host": "10.0.0.1", "group": "arista"}, "arista_eos")
+    assert result["status"] == "TIMEOUT" and result["phase"] == "connect"
+
+
+def test_firmware_steps_stop_when_cancelled(firmware_files, monkeypatch):
+    run = RunDeadline()
+    sent = []
+
+    class Switch:
+        def send_command(self, command, **kwargs):
+            sent.append(command)
+            # The run is cancelled while the first step runs
+            run.cancel()
+            return "EOS.swi\n 2000000000 bytes free"
+
+    @contextmanager
+    def session(device, device_type):
+        yield Switch()
+
+    monkeypatch.setattr(netmiko_utils, "device_session", session)
+    with bind(run, "sw1"):
+        result = firmware_manager.firmware_task({"name": "sw1", "host": "10.0.0.1", "group": "arista"}, "arista_eos")
+    assert result["status"] == "TIMEOUT" and result["phase"] == "command"
+    assert sent == ["dir flash:"]
@@ -0,0 +1,124 @@
+"""
+Unit tests for network_utils.py
+
+These tests cover:
+- Bulk reachability probing with non-blocking connects
+- Reuse of probe results by is_reachable()
+- TTL reachability cache and device status entries
+- Merging a run's device status into status.yaml, also from concurrent writers
+"""
+
+import socket
+import threading
+import pytest
+import yaml
+from utils import network_utils
+from utils.reachability_cache import ReachabilityCache
+
+
+@pytest.fixture
+def listener():
+    """A local TCP listener standing in for an SSH port."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(16)
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def test_probe_reachability(listener):
+    """Open ports are reachable, closed ports are not."""
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+
+    assert network_utils.probe_reachability(["127.0.0.1"], port=listener, timeout=1) == {"127.0.0.1": True}
+    assert network_utils.probe_reachability(["127.0.0.1"], port=closed_port, timeout=1) == {"127.0.0.1": False}
+
+
+def test_probe_reachability_empty():
+    """An empty inventory needs no probing."""
+    assert network_utils.probe_reachability([]) == {}
+
+
+def test_is_reachable_uses_probe_result(monkeypatch):
+    """is_reachable() should trust a fresh bulk probe result."""
+    monkeypatch.setitem(network_utils._probe_results, "192.0.2.10", (True, network_utils.time.monotonic()))
+    monkeypatch.setattr(network_utils.socket, "create_connection", lambda *a, **k: pytest.fail("probed again"))
+    assert network_utils.is_reachable("192.0.2.10") is True
+
+
+def test_reachability_cache_ttl(tmp_path):
+    """Fresh entries are returned, expired ones are not."""
+    cache = ReachabilityCache(path=str(tmp_path / "reachability.db"), ttl=300)
+    cache.update({"192.0.2.1": (True, 0.012), "192.0.2.2": (False, None)})
+    fresh = cache.get_fresh(["192.0.2.1", "192.0.2.2", "192.0.2.3"])
+    assert fresh["192.0.2.1"][:2] == (True, 0.012)
+    assert fresh["192.0.2.2"][:2] == (False, None)
+    assert "192.0.2.3" not in fresh
+
+    cache.ttl = 0
+    assert cache.get_fresh(["192.0.2.1"]) == {}
+
+
+def test_probe_reachability_trusts_cache(tmp_path, monkeypatch):
+    """Hosts with a fresh cache entry are not probed again."""
+    cache = ReachabilityCache(path=str(tmp_path / "reachability.db"), ttl=300)
+    cache.update({"192.0.2.1": (True, 0.01)})
+    monkeypatch.setattr(network_utils, "_cache", cache)
+    monkeypatch.setattr(network_utils, "run_coroutine", lambda coro: coro.close() or pytest.fail("probed again"))
+    assert network_utils.probe_reachability(["192.0.2.1"]) == {"192.0.2.1": True}
+
+
+def test_build_device_status(tmp_path, monkeypatch):
+    """Device List entries come from the cache, unknown hosts stay UNKNOWN."""
+    cache = ReachabilityCache(path=str(tmp_path / "reachability.db"), ttl=300)
+    cache.update({"192.0.2.1": (True, 0.0123)})
+    monkeypatch.setattr(network_utils, "_cache", cache)
+    devices = [
+        {"name": "sw1", "host": "192.0.2.1", "group": "arista"},
+        {"name": "sw2", "host": "192.0.2.2", "group": "cisco"},
+    ]
+    status = network_utils.build_device_status(devices)
+    assert status[0]["status"] == "UP"
+    assert status[0]["latency_ms"] == 12.3
+    assert status[1]["status"] == "UNKNOWN"
+
+
+def test_write_device_status_merge(tmp_path, monkeypatch):
+    """A merged write replaces the given devices and keeps the others."""
+    path = tmp_path / "status" / "status.yaml"
+    monkeypatch.setattr(network_utils, "STATUS_FILE_PATH", str(path))
+    network_utils.write_device_status_yaml([
+        {"name": "sw1", "ip": "192.0.2.1", "status": "UP"},
+        {"name": "sw2", "ip": "192.0.2.2", "status": "UP"},
+    ])
+    network_utils.write_device_status_yaml([
+        {"name": "sw2", "ip": "192.0.2.2", "status": "DOWN"},
+        {"name": "sw3", "ip": "192.0.2.3", "status": "UP"},
+    ], merge=True)
+    status = yaml.safe_load(path.read_text())
+    assert [(d["name"], d["status"]) for d in status] == [("sw1", "UP"), ("sw2", "DOWN"), ("sw3", "UP")]
+    network_utils.write_device_status_yaml([{"name": "sw1", "ip": "192.0.2.1", "status": "DOWN"}])
+    assert [d["name"] for d in yaml.safe_load(path.read_text())] == ["sw1"]
+
+
+def test_write_device_status_concurrent_merges(tmp_path, monkeypatch):
+    """Concurrent merged writes keep every writer's devices; UNKNOWN devices were never seen."""
+    path = tmp_path / "status.yaml"
+    monkeypatch.setattr(network_utils, "STATUS_FILE_PATH", str(path))
+    writers = [
+        threading.Thread(target=network_utils.write_device_status_yaml, args=(
+            [{"name": f"sw{i}", "ip": f"192.0.2.{i}", "status": "UNKNOWN" if i % 2 else "UP"}],
+        ), kwargs={"merge": True})
+        for i in range(20)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    status = {d["name"]: d for d in yaml.safe_load(path.read_text())}
+    assert sorted(status) == sorted(f"sw{i}" for i in range(20))
+    assert status["sw1"]["last_seen"] is None
+    assert status["sw2"]["last_seen"] is not None
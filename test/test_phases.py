@@ -0,0 +1,74 @@
+"""
+Unit tests for phases.py
+
+These tests cover:
+- Timeout exceptions reported as TaskTimeout with their phase
+- Cooperative cancellation at phase boundaries
+- Phase timeouts clamped to the run deadline
+- TIMEOUT vs FAILED result status
+- Cancel scopes tracking and stopping their runs
+"""
+
+import pytest
+from netmiko.exceptions import ReadTimeout
+from scripts import phases
+
+
+class FakeConnection:
+    read_timeout_override = None
+
+
+def test_timeout_exception_names_phase():
+    run = phases.RunDeadline()
+    with phases.bind(run, "sw1"):
+        with pytest.raises(phases.TaskTimeout) as exc:
+            with phases.phase("command"):
+                raise ReadTimeout("pattern not found")
+    assert exc.value.phase == "command"
+    assert run.phases == {}
+
+
+def test_cancelled_run_stops_at_next_phase():
+    run = phases.RunDeadline()
+    with phases.bind(run, "sw1"):
+        with phases.phase("connect"):
+            assert run.phases == {"sw1": "connect"}
+            run.cancel()
+        with pytest.raises(phases.TaskTimeout):
+            with phases.phase("enable"):
+                pytest.fail("phase started after cancel()")
+
+
+def test_read_timeout_clamped_to_deadline():
+    run = phases.RunDeadline(5, {"command": 120})
+    net_connect = FakeConnection()
+    with phases.bind(run, "sw1"):
+        with phases.phase("command", net_connect):
+            assert net_connect.read_timeout_override <= 5
+        assert phases.phase_timeout("enable") <= 5
+    assert net_connect.read_timeout_override is None
+
+
+def test_mark_failed():
+    assert phases.mark_failed({}, ValueError("boom")) == {"output": "boom", "error": "ValueError", "status": "FAILED"}
+    try:
+        with phases.phase("save_config"):
+            raise ReadTimeout("no prompt")
+    except phases.TaskTimeout as e:
+        result = phases.mark_failed({}, e)
+    assert result["status"] == "TIMEOUT" and result["phase"] == "save_config"
+    assert result["error"] == "ReadTimeout"
+
+
+def test_cancel_scope_tracks_and_stops_runs(monkeypatch):
+    monkeypatch.setattr(phases, "load_yaml", lambda path: {})
+    scope = phases.CancelScope()
+    with phases.cancel_scope(scope):
+        run = phases.RunDeadline.from_config()
+    with phases.bind(run, "sw1"), phases.phase("connect"):
+        assert scope.in_flight() == {"sw1": "connect"}
+        scope.cancel()
+    assert run.expired() and run.reason == "Run cancelled"
+    with phases.cancel_scope(scope):
+        # Runs started after the cancel start stopped
+        assert phases.RunDeadline.from_config().cancelled.is_set()
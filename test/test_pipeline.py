@@ -0,0 +1,88 @@
+"""
+Unit tests for pipeline.py
+
+These tests cover:
+- Items flowing through every stage in order
+- Backpressure from bounded queues
+- Concurrency limit of a stage
+- Stage exceptions delivered as StageError, passed unchanged through later stages
+"""
+
+import threading
+import time
+from scripts.pipeline import StagedPipeline, StageError
+
+
+def collect(pipeline, count):
+    return [pipeline.results.get(timeout=5) for _ in range(count)]
+
+
+def test_items_pass_every_stage():
+    pipeline = StagedPipeline()
+    pipeline.add_stage("double", lambda x: x * 2, 2)
+    pipeline.add_stage("inc", lambda x: x + 1, 2, maxsize=2)
+    pipeline.start()
+    for i in range(10):
+        pipeline.submit(i)
+    assert sorted(collect(pipeline, 10)) == [i * 2 + 1 for i in range(10)]
+    pipeline.stop()
+
+
+def test_bounded_queue_backpressure():
+    """A blocked stage stops the stage before it once its queue is full."""
+    release = threading.Event()
+    started = []
+
+    def first(x):
+        started.append(x)
+        return x
+
+    pipeline = StagedPipeline()
+    pipeline.add_stage("first", first, 1)
+    pipeline.add_stage("blocked", lambda x: release.wait(5) and x, 1, maxsize=2)
+    pipeline.start()
+    for i in range(10):
+        pipeline.submit(i)
+    time.sleep(0.2)
+    # 1 item in the blocked stage, 2 queued, 1 held by the first stage's put
+    assert len(started) == 4
+    release.set()
+    assert sorted(collect(pipeline, 10)) == list(range(10))
+    pipeline.stop()
+
+
+def test_stage_limit():
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def work(x):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return x
+
+    pipeline = StagedPipeline()
+    pipeline.add_stage("work", work, 6, limit=lambda: 2)
+    pipeline.start()
+    for i in range(12):
+        pipeline.submit(i)
+    collect(pipeline, 12)
+    assert peak[0] <= 2
+    pipeline.stop()
+
+
+def test_stage_error():
+    seen = []
+    pipeline = StagedPipeline()
+    pipeline.add_stage("fail", lambda x: 1 / x, 1)
+    pipeline.add_stage("after", lambda x: seen.append(x) or x, 1)
+    pipeline.start()
+    pipeline.submit(0)
+    [item] = collect(pipeline, 1)
+    assert isinstance(item, StageError) and item.stage == "fail" and item.item == 0
+    assert isinstance(item.exc, ZeroDivisionError)
+    assert seen == []
+    pipeline.stop()
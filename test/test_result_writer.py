@@ -0,0 +1,85 @@
+"""
+Unit tests for result_writer.py
+
+These tests cover:
+- Streaming results to the JSON Lines journal
+- Atomic finalization into the YAML result file
+- Reading partial results while a run is in progress
+- Concurrent runs of a task keeping separate journals
+- Journals left by crashed runs ignored
+"""
+
+import os
+import yaml
+from scripts import result_writer
+
+
+RESULTS = [
+    {"device": "sw1", "host": "10.0.0.1", "status": "SUCCESS", "output": "ok"},
+    {"device": "sw2", "host": "10.0.0.2", "status": "FAILED", "output": "Device not reachable"},
+]
+
+
+def test_partial_results_readable(tmp_path):
+    """Results are visible through load_results() before finalize()."""
+    result_path = str(tmp_path / "results.yaml")
+    sink = result_writer.ResultSink(result_path, fsync_every=1)
+    sink.write(RESULTS[0])
+    assert result_writer.load_results(result_path) == [RESULTS[0]]
+    sink.finalize()
+
+
+def test_finalize_writes_yaml(tmp_path):
+    """finalize() writes the same YAML list as before and removes the journal."""
+    result_path = str(tmp_path / "results.yaml")
+    sink = result_writer.ResultSink(result_path)
+    for result in RESULTS:
+        sink.write(result)
+    sink.finalize()
+
+    with open(result_path) as f:
+        assert yaml.safe_load(f) == RESULTS
+    assert not os.path.exists(sink.partial_path)
+    assert result_writer.load_results(result_path) == RESULTS
+
+
+def test_finalize_empty(tmp_path):
+    """A run without results still produces an empty result list."""
+    result_path = str(tmp_path / "results.yaml")
+    result_writer.ResultSink(result_path).finalize()
+    with open(result_path) as f:
+        assert yaml.safe_load(f) == []
+
+
+def test_torn_last_line_skipped(tmp_path):
+    """A record cut short by a crash is skipped when reading the journal."""
+    result_path = str(tmp_path / "results.yaml")
+    with open(result_writer.partial_path(result_path), "w") as f:
+        f.write('{"device": "sw1", "status": "SUCCESS"}\n{"device": "sw2", "sta')
+    assert result_writer.load_results(result_path) == [{"device": "sw1", "status": "SUCCESS"}]
+
+
+def test_concurrent_sinks(tmp_path):
+    """Two runs of the same task write and finalize their own journals."""
+    result_path = str(tmp_path / "results.yaml")
+    gui, cron = result_writer.ResultSink(result_path), result_writer.ResultSink(result_path)
+    assert gui.partial_path != cron.partial_path
+    gui.write(RESULTS[0])
+    cron.write(RESULTS[1])
+    gui.finalize()
+    with open(result_path) as f:
+        assert yaml.safe_load(f) == [RESULTS[0]]
+    cron.finalize()
+    with open(result_path) as f:
+        assert yaml.safe_load(f) == [RESULTS[1]]
+
+
+def test_crashed_run_journal_ignored(tmp_path, monkeypatch):
+    """A journal whose process is gone is not shown as a run in progress."""
+    result_path = str(tmp_path / "results.yaml")
+    with open(result_path, "w") as f:
+        yaml.dump(RESULTS, f)
+    with open(result_writer.partial_path(result_path, "999999-dead"), "w") as f:
+        f.write('{"device": "sw9", "status": "SUCCESS"}\n')
+    monkeypatch.setattr(result_writer, "pid_alive", lambda pid: pid != 999999)
+    assert result_writer.load_results(result_path) == RESULTS
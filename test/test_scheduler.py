@@ -0,0 +1,51 @@
+"""
+Unit tests for scheduler.py
+
+These tests cover:
+- Jobs handed out in submission order up to the overall limit
+- Per-group and per-site caps, with other groups/sites going ahead
+- Slots released by finished jobs
+"""
+
+from scripts.scheduler import JobScheduler
+
+
+def job(name, group="arista", site=None):
+    device = {"name": name, "group": group}
+    if site:
+        device["site"] = site
+    return (None, device, ())
+
+
+def names(scheduler):
+    started = []
+    next_job = scheduler.next_job()
+    while next_job is not None:
+        started.append(next_job[1]["name"])
+        next_job = scheduler.next_job()
+    return started
+
+
+def test_overall_limit_keeps_order():
+    jobs = [job(f"sw{i}") for i in range(5)]
+    scheduler = JobScheduler(jobs, lambda: 3)
+    assert names(scheduler) == ["sw0", "sw1", "sw2"]
+    scheduler.done(jobs[0])
+    assert names(scheduler) == ["sw3"]
+    assert len(scheduler) == 1
+
+
+def test_site_limit_lets_other_sites_run():
+    jobs = [job("a1", site="dc1"), job("a2", site="dc1"), job("a3", site="dc1"), job("b1", site="dc2")]
+    scheduler = JobScheduler(jobs, lambda: 10, site_limit=2)
+    assert names(scheduler) == ["a1", "a2", "b1"]
+    scheduler.done(jobs[0])
+    assert names(scheduler) == ["a3"]
+
+
+def test_site_override_and_group_limit():
+    jobs = [job("a1", site="dc1"), job("a2", site="dc1"), job("c1", "cisco"), job("c2", "cisco")]
+    scheduler = JobScheduler(jobs, lambda: 10, group_limits={"cisco": 1}, site_limit=1, site_limits={"dc1": 5})
+    assert names(scheduler) == ["a1", "a2", "c1"]
+    scheduler.done(jobs[2])
+    assert names(scheduler) == ["c2"]
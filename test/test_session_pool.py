@@ -0,0 +1,181 @@
+"""
+Unit tests for session_pool.py
+
+These tests cover:
+- Reuse of idle, alive sessions
+- Dropping stale, expired and failed sessions
+- Closing expired sessions of other hosts, on use and by the reaper
+- Idle sessions holding their device lease until closed
+- LRU eviction and clean shutdown
+- TCP connect and SSH login timed as separate connect and auth phases
+"""
+
+import threading
+import time
+import pytest
+from scripts import concurrency, leases, phases, session_pool
+
+
+class FakeConnection:
+    """Minimal stand-in for a Netmiko connection."""
+    def __init__(self, **params):
+        self.host = params["host"]
+        self.alive = True
+        self.enabled = False
+        self.closed = False
+
+    def enable(self):
+        self.enabled = True
+
+    def is_alive(self):
+        return self.alive
+
+    def disconnect(self):
+        self.closed = True
+
+
+class FakeSocket:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def params(host, device_type="arista_eos"):
+    return {"host": host, "device_type": device_type, "username": "admin", "password": "admin"}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(session_pool, "ConnectHandler", FakeConnection)
+    monkeypatch.setattr(session_pool, "open_tcp", lambda host, port=22: FakeSocket())
+    # The login rate limit is host-wide state in output/leases
+    monkeypatch.setattr(concurrency, "get_login_bucket", lambda: None)
+    return session_pool.SessionPool(max_sessions=2, max_idle=300)
+
+
+def test_session_is_reused(pool):
+    """Second session for the same host/device_type should reuse the first."""
+    with pool.session(params("10.0.0.1")) as first:
+        assert first.enabled is True
+    with pool.session(params("10.0.0.1")) as second:
+        assert second is first
+
+
+def test_different_device_type_not_shared(pool):
+    """Sessions are keyed by host and device_type."""
+    with pool.session(params("10.0.0.1", "arista_eos")) as first:
+        pass
+    with pool.session(params("10.0.0.1", "cisco_ios")) as second:
+        assert second is not first
+
+
+def test_dead_session_replaced(pool):
+    """A session that fails is_alive() should be closed and replaced."""
+    with pool.session(params("10.0.0.1")) as first:
+        pass
+    first.alive = False
+    with pool.session(params("10.0.0.1")) as second:
+        assert second is not first
+    assert first.closed is True
+
+
+def test_expired_session_replaced(pool):
+    """Sessions idle longer than max_idle should not be reused."""
+    pool.max_idle = -1
+    with pool.session(params("10.0.0.1")) as first:
+        pass
+    with pool.session(params("10.0.0.1")) as second:
+        assert second is not first
+    assert first.closed is True
+
+
+def test_failed_session_not_returned(pool):
+    """An exception inside the block should close the session."""
+    with pytest.raises(RuntimeError):
+        with pool.session(params("10.0.0.1")) as conn:
+            raise RuntimeError("command failed")
+    assert conn.closed is True
+    assert len(pool) == 0
+
+
+def test_lru_eviction_and_close_all(pool):
+    """Oldest idle session is evicted past max_sessions; close_all closes the rest."""
+    conns = []
+    for host in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+        with pool.session(params(host)) as conn:
+            conns.append(conn)
+    assert conns[0].closed is True
+    assert len(pool) == 2
+
+    pool.close_all()
+    assert all(conn.closed for conn in conns)
+    assert len(pool) == 0
+
+
+def test_expired_sessions_of_other_hosts_closed(pool):
+    """Using the pool closes every expired idle session, not just the one asked for."""
+    with pool.session(params("10.0.0.1")) as old:
+        pass
+    pool.max_idle = 0.05
+    time.sleep(0.1)
+    with pool.session(params("10.0.0.2")):
+        assert old.closed is True
+    assert len(pool) == 1
+
+
+def test_reaper_closes_expired_sessions(pool):
+    """The reaper closes expired sessions while the pool is not used."""
+    pool.max_idle = 0.05
+    with pool.session(params("10.0.0.1")) as conn:
+        pass
+    pool.start_reaper(0.02)
+    for _ in range(100):
+        if conn.closed:
+            break
+        time.sleep(0.02)
+    assert conn.closed is True
+    assert len(pool) == 0
+    pool.close_all()
+
+
+def test_idle_session_holds_device_lease(tmp_path, pool):
+    """No other process can lease a device while its session idles in the pool."""
+    manager = leases.LeaseManager(str(tmp_path / "leases"), max_sessions=2, poll_interval=0.01)
+    other = leases.LeaseManager(str(tmp_path / "leases"), max_sessions=2, poll_interval=0.01)
+    with manager.lease("sw1"):
+        with pool.session(params("10.0.0.1")) as conn:
+            pass
+    run = phases.RunDeadline()
+    threading.Timer(0.1, run.cancel).start()
+    with phases.bind(run, "sw1"), pytest.raises(phases.TaskTimeout):
+        with other.lease("sw1"):
+            pass
+    # Taken back by the next job of this process without logging in again
+    with manager.lease("sw1"):
+        with pool.session(params("10.0.0.1")) as again:
+            assert again is conn
+    pool.close_all()
+    assert conn.closed is True
+    with other.lease("sw1"):
+        pass
+
+
+def test_connect_and_auth_phases_split(pool, monkeypatch):
+    """The TCP connect and the SSH login are timed as two phases; a failed login closes the socket."""
+    with phases.record_phases() as entered:
+        session_pool.open_session(params("10.0.0.1")).disconnect()
+    assert entered == ["connect", "auth", "enable"]
+
+    sock = FakeSocket()
+    monkeypatch.setattr(session_pool, "open_tcp", lambda host, port=22: sock)
+
+    def login_timeout(**params):
+        raise session_pool.NetmikoTimeoutException("banner timeout")
+
+    monkeypatch.setattr(session_pool, "ConnectHandler", login_timeout)
+    with pytest.raises(phases.TaskTimeout) as exc_info:
+        session_pool.open_session(params("10.0.0.1"))
+    assert exc_info.value.phase == "auth"
+    assert sock.closed
@@ -0,0 +1,65 @@
+"""
+Unit tests for tracing.py
+
+These tests cover:
+- Device and phase spans on the worker thread tracks of a threaded run
+- Result instants and the task span on the coordinator track
+- Writing the trace as Chrome trace-event JSON
+- Profiling the coordinator with cProfile
+"""
+
+import json
+import pstats
+import pytest
+from scripts import engine, worker
+from scripts.phases import phase
+from scripts.tracing import TraceRecorder, profiled
+from test.conftest import make_jobs
+
+
+pytestmark = pytest.mark.usefixtures("isolated_run")
+
+
+def task(device, device_type):
+    with phase("connect"):
+        pass
+    with phase("command"):
+        return {"device": device["name"], "status": "SUCCESS", "output": device_type}
+
+
+def record_run():
+    tracer = TraceRecorder().start()
+    engine.run_device_tasks(make_jobs(task, count=6), 3, engine="thread", worker=worker.device_worker, task="backup")
+    tracer.stop()
+    return tracer
+
+
+def test_spans_on_worker_tracks(tmp_path):
+    tracer = record_run()
+    path = tmp_path / "trace.json"
+    tracer.write(str(path))
+    trace = json.loads(path.read_text())["traceEvents"]
+    devices = [e for e in trace if e.get("cat") == "device"]
+    assert sorted(e["name"] for e in devices) == [f"sw{i}" for i in range(1, 7)]
+    assert all(e["args"]["status"] == "SUCCESS" for e in devices)
+    phases = [e for e in trace if e.get("cat") == "phase"]
+    assert sorted(e["name"] for e in phases if e["args"]["device"] == "sw1") == ["command", "connect"]
+    # Device spans of one worker never overlap
+    by_track = {}
+    for e in devices:
+        by_track.setdefault(e["tid"], []).append((e["ts"], e["ts"] + e["dur"]))
+    for spans in by_track.values():
+        spans.sort()
+        assert all(end <= start for (_, end), (start, _) in zip(spans, spans[1:]))
+    # Results and the task span sit on the coordinator track, not on a worker
+    coordinator = {e["tid"] for e in trace if e.get("cat") in ("result", "task")}
+    assert len(coordinator) == 1 and not coordinator & set(by_track)
+    names = {e["args"]["name"] for e in trace if e["name"] == "thread_name"}
+    assert "MainThread" in names
+
+
+def test_profile_coordinator(tmp_path):
+    path = tmp_path / "run.prof"
+    with profiled(str(path)):
+        engine.run_device_tasks(make_jobs(task, count=2), 1, engine="thread", task="backup")
+    assert pstats.Stats(str(path)).total_calls > 0
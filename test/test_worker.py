@@ -0,0 +1,102 @@
+"""
+Unit tests for worker.py
+
+These tests cover:
+- Retrying failures by error class with backoff
+- No retry for errors without a retry rule
+- No retry once a command was sent, or when the failing phase is unknown
+- Circuit breaker opening after consecutive failed runs and closing on success
+"""
+
+import pytest
+from netmiko import NetmikoTimeoutException
+from scripts import worker
+from scripts.phases import phase
+from utils.circuit_breaker import CircuitBreaker
+
+
+DEVICE = {"name": "sw1", "host": "10.0.0.1"}
+
+
+@pytest.fixture(autouse=True)
+def setup(monkeypatch):
+    monkeypatch.setattr(worker.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(worker, "get_circuit_breaker", lambda: None)
+    policy = worker.RetryPolicy({"NetmikoTimeoutException": 3}, backoff=1, max_backoff=4)
+    monkeypatch.setattr(worker.RetryPolicy, "from_config", classmethod(lambda cls: policy))
+
+
+def flaky(failures, exc=NetmikoTimeoutException, phase_name="connect"):
+    calls = []
+
+    def task(device):
+        calls.append(1)
+        with phase(phase_name):
+            if len(calls) <= failures:
+                raise exc("banner timeout")
+        return {"device": device["name"], "status": "SUCCESS", "output": ""}
+
+    return task, calls
+
+
+def test_retry_until_success():
+    task, calls = flaky(2)
+    assert worker.device_worker(task, DEVICE)["status"] == "SUCCESS"
+    assert len(calls) == 3
+
+
+def test_retry_gives_up_after_max_attempts():
+    task, calls = flaky(5)
+    result = worker.device_worker(task, DEVICE)
+    assert result["status"] == "TIMEOUT" and result["error"] == "NetmikoTimeoutException"
+    assert len(calls) == 3
+
+
+def test_no_retry_for_other_errors():
+    task, calls = flaky(1, ValueError)
+    assert worker.device_worker(task, DEVICE)["status"] == "FAILED"
+    assert len(calls) == 1
+
+
+def test_no_retry_after_command_sent():
+    """A read timeout while pushing config must not send the config again."""
+    task, calls = flaky(1, NetmikoTimeoutException, "command")
+    result = worker.device_worker(task, DEVICE)
+    assert result["status"] == "TIMEOUT" and result["phase"] == "command"
+    assert len(calls) == 1
+
+
+def test_no_retry_outside_phases():
+    calls = []
+
+    def task(device):
+        calls.append(1)
+        raise NetmikoTimeoutException("timeout")
+
+    assert worker.device_worker(task, DEVICE)["status"] == "FAILED"
+    assert len(calls) == 1
+
+
+def test_backoff_grows_and_is_capped():
+    policy = worker.RetryPolicy(backoff=1, max_backoff=4)
+    assert all(0 <= policy.delay(1) <= 1 for _ in range(20))
+    assert all(0 <= policy.delay(5) <= 4 for _ in range(20))
+
+
+def test_circuit_breaker(monkeypatch, tmp_path):
+    breaker = CircuitBreaker(str(tmp_path / "breaker.db"), threshold=2, cooldown=3600)
+    monkeypatch.setattr(worker, "get_circuit_breaker", lambda: breaker)
+    task, calls = flaky(100, ValueError)
+
+    worker.device_worker(task, DEVICE)
+    worker.device_worker(task, DEVICE)
+    result = worker.device_worker(task, DEVICE)
+    assert result["status"] == "SKIPPED"
+    assert len(calls) == 2
+
+    # Cooldown over: one more try, a success closes the breaker
+    breaker.cooldown = 0
+    ok, _ = flaky(0)
+    ok.__name__ = task.__name__
+    assert worker.device_worker(ok, DEVICE)["status"] == "SUCCESS"
+    assert breaker.entries() == {}
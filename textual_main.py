@@ -1,10 +1,24 @@
 # textual_main.py
 
+import time
+
+from textual import work
 from textual.app import App, ComposeResult
-from textual.widgets import Header, Footer, Button, Static, RichLog
+from textual.widgets import Header, Footer, Button, Static, RichLog, DataTable
 from textual.containers import Vertical, Horizontal
 
-from scripts import config_manager, backup_manager, inventory_manager
+from scripts.checkpoint import result_device, result_status
+from scripts.config_parser import load_yaml
+from scripts.constants import DEVICES_FILE_PATH, PROGRESS_REFRESH_SECONDS
+from scripts.daemon import follow_job, open_job_queue
+
+# Button id -> label used in the log panel
+TASK_LABELS = {
+    "config": "Config deployment",
+    "backup": "Backup",
+    "inventory": "Inventory collection",
+    "firmware": "Firmware upgrade",
+}
 
 class MainMenu(Static):
     """Main menu with task buttons."""
@@ -13,6 +27,7 @@ class MainMenu(Static):
         yield Button("Backup", id="backup")
         yield Button("Inventory", id="inventory")
         yield Button("Firmware", id="firmware")
+        yield Button("Cancel", id="cancel", variant="error", disabled=True)
         yield Button("Exit", id="exit")
 
 class NetpilotApp(App):
@@ -28,6 +43,14 @@ class NetpilotApp(App):
         min-width: 25;
         background: $panel;
     }
+    #throughput {
+        padding: 0 2;
+        height: 1;
+    }
+    DataTable {
+        height: 1fr;
+        width: 80;
+    }
     RichLog {
         padding: 2;
         border: tall $accent;
@@ -40,40 +63,110 @@ class NetpilotApp(App):
         yield Header()
         with Horizontal():
             yield MainMenu()
-            self.log_panel = RichLog(highlight=True, markup=True)
-            yield self.log_panel
+            with Vertical():
+                self.throughput = Static("Idle", id="throughput")
+                yield self.throughput
+                self.progress_table = DataTable()
+                yield self.progress_table
+                self.log_panel = RichLog(highlight=True, markup=True)
+                yield self.log_panel
         yield Footer()
 
+    def on_mount(self) -> None:
+        _, _, self.status_column = self.progress_table.add_columns("Device", "IP", "Status")
+        # The daemon's jobs when one runs, else a queue in this process
+        self.jobs = open_job_queue(max_jobs=1)
+        # ID of the running job, None when idle
+        self.job_id = None
+        self.in_flight = {}
+        self.set_interval(1, self.refresh_progress)
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         task = event.button.id
         if task == "exit":
+            if self.job_id is not None:
+                self.jobs.cancel(self.job_id)
+            self.jobs.shutdown()
             self.exit()
-        elif task == "config":
-            self.log_panel.write("[b]Running configuration deployment...[/b]")
-            try:
-                config_manager.main()
-                self.log_panel.write("[green]Config deployment finished.[/green]")
-                self.log_panel.write("[green]OK![/green]")  
-            except Exception as e:
-                self.log_panel.write(f"[red]Config error: {e}[/red]")
-        elif task == "backup":
-            self.log_panel.write("[b]Running backup...[/b]")
-            try:
-                backup_manager.main()
-                self.log_panel.write("[green]Backup finished.[/green]")
-                self.log_panel.write("[green]OK![/green]")  
-            except Exception as e:
-                self.log_panel.write(f"[red]Backup error: {e}[/red]")
-        elif task == "inventory":
-            self.log_panel.write("[b]Running inventory collection...[/b]")
-            try:
-                inventory_manager.main()
-                self.log_panel.write("[green]Inventory collection finished.[/green]")
-                self.log_panel.write("[green]OK![/green]") 
-            except Exception as e:
-                self.log_panel.write(f"[red]Inventory error: {e}[/red]")
-        elif task == "firmware":
-            self.log_panel.write("[yellow]Firmware upgrade not implemented yet.[/yellow]")
+        elif task == "cancel":
+            if self.job_id is not None:
+                self.jobs.cancel(self.job_id)
+                self.log_panel.write("[yellow]Cancelling: running devices stop at their next step...[/yellow]")
+        elif self.job_id is not None:
+            self.log_panel.write("[yellow]A task is already running.[/yellow]")
+        else:
+            self.start_task(task)
+
+    def start_task(self, task):
+        devices = load_yaml(DEVICES_FILE_PATH).get("devices", [])
+        self.progress_table.clear()
+        self.rows = set()
+        for device in devices:
+            if device.get("name") not in self.rows:
+                self.progress_table.add_row(device.get("name"), device.get("host"), "PENDING", key=device.get("name"))
+                self.rows.add(device.get("name"))
+        self.finished_devices = set()
+        self.failed = 0
+        self.started = time.monotonic()
+        self.in_flight = {}
+        self.job_id = self.jobs.submit([task]).id
+        self.query_one("#cancel", Button).disabled = False
+        self.log_panel.write(f"[b]Running {TASK_LABELS[task].lower()}...[/b]")
+        self.follow_task(task, self.job_id)
+
+    @work(thread=True, exclusive=True)
+    def follow_task(self, task, job_id):
+        """Follow a job in a worker thread, pushing each device result and the running devices to the UI."""
+        job = self.jobs.get(job_id)
+        for job, results in follow_job(self.jobs, job, PROGRESS_REFRESH_SECONDS):
+            for result in results:
+                self.call_from_thread(self.on_device_result, result)
+            self.call_from_thread(self.set_in_flight, job.summary()["in_flight"])
+        self.call_from_thread(self.on_task_finished, task, job)
+
+    def set_in_flight(self, in_flight):
+        self.in_flight = in_flight
+        self.refresh_progress()
+
+    def on_device_result(self, result):
+        name = result_device(result)
+        status = result_status(result)
+        self.finished_devices.add(name)
+        color = "green" if status == "SUCCESS" else "red"
+        if status != "SUCCESS":
+            self.failed += 1
+        self.log_panel.write(f"[{color}]{name}: {status}[/{color}] {str(result.get('output', ''))[:80]}")
+        if name in self.rows:
+            self.progress_table.update_cell(name, self.status_column, status)
+        self.refresh_progress()
+
+    def refresh_progress(self):
+        """Show running devices with their phase and the throughput of the task."""
+        if self.job_id is None:
+            return
+        for name, phase in self.in_flight.items():
+            if name in self.rows and name not in self.finished_devices:
+                self.progress_table.update_cell(name, self.status_column, f"RUNNING ({phase or 'starting'})")
+        done = len(self.finished_devices)
+        elapsed = time.monotonic() - self.started
+        rate = done / elapsed * 60 if elapsed else 0
+        self.throughput.update(
+            f"{done}/{len(self.rows)} done, {self.failed} failed, {rate:.1f} devices/min, {elapsed:.0f}s"
+        )
+
+    def on_task_finished(self, task, job):
+        self.in_flight = {}
+        self.refresh_progress()
+        label = TASK_LABELS[task]
+        if job.state == "failed":
+            self.log_panel.write(f"[red]{label} error: {job.error}[/red]")
+        elif job.state == "cancelled":
+            self.log_panel.write(f"[yellow]{label} cancelled.[/yellow]")
+        else:
+            self.log_panel.write(f"[green]{label} finished.[/green]")
+            self.log_panel.write("[green]OK![/green]")
+        self.job_id = None
+        self.query_one("#cancel", Button).disabled = True
 
 if __name__ == "__main__":
     NetpilotApp().run()
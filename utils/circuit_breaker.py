@@ -0,0 +1,82 @@
+# utils/circuit_breaker.py
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from scripts.constants import CIRCUIT_BREAKER_PATH
+
+
+class CircuitBreaker:
+    """
+    Persistent per-device circuit breaker, kept per task.
+
+    Each run records whether a device task succeeded. After threshold
+    consecutive failed runs the breaker opens and the device is skipped
+    until cooldown seconds have passed since its last failure; the next run
+    then tries it once more (half-open) and a success closes the breaker.
+    """
+
+    def __init__(self, path=CIRCUIT_BREAKER_PATH, threshold=3, cooldown=3600):
+        self.path = path
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS breakers ("
+                "task TEXT, device TEXT, failures INTEGER, last_failure REAL, last_error TEXT, "
+                "PRIMARY KEY (task, device))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def is_open(self, task, device):
+        """
+        Return a reason string when the device must be skipped for task,
+        otherwise None.
+        """
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT failures, last_failure, last_error FROM breakers WHERE task = ? AND device = ?",
+                (task, device),
+            ).fetchone()
+        if row is None:
+            return None
+        failures, last_failure, last_error = row
+        retry_in = last_failure + self.cooldown - time.time()
+        if failures < self.threshold or retry_in <= 0:
+            return None
+        return (
+            f"Circuit open: failed {failures} consecutive runs (last error: {last_error}), "
+            f"skipped for another {retry_in:.0f}s"
+        )
+
+    def record(self, task, device, success, error=None):
+        """Record the outcome of one run of task on device."""
+        with self._lock, self._connect() as db:
+            if success:
+                db.execute("DELETE FROM breakers WHERE task = ? AND device = ?", (task, device))
+                return
+            db.execute(
+                "INSERT INTO breakers VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT (task, device) DO UPDATE SET "
+                "failures = failures + 1, last_failure = excluded.last_failure, last_error = excluded.last_error",
+                (task, device, time.time(), error),
+            )
+
+    def entries(self):
+        """Return {(task, device): (failures, last_failure, last_error)}."""
+        with self._lock, self._connect() as db:
+            rows = db.execute("SELECT task, device, failures, last_failure, last_error FROM breakers")
+            return {(task, device): (failures, last, error) for task, device, failures, last, error in rows}
@@ -1,19 +1,68 @@
 # utils/credentials_utils.py
 
+import os
+import threading
 import yaml
 
-def load_credentials(credentials_file, device_name):
-    with open(credentials_file, "r") as f:
-        creds = yaml.safe_load(f)
-    
-    # First check if the device has specific overrides
-    if "overrides" in creds and device_name in creds["overrides"]:
-        c = creds["overrides"][device_name]
-        return c.get("username"), c.get("password"), c.get("enable_secret")
-    # Otherwise, check for a default set of credentials
-    elif "default" in creds:
-        c = creds["default"]
+
+class CredentialResolver:
+    """
+    Resolves device credentials from a credentials file.
+    The file is parsed once into an index of device name -> credentials and
+    re-parsed only when its mtime or size changes. Safe to share between
+    worker threads.
+    """
+
+    def __init__(self, credentials_file):
+        self.credentials_file = credentials_file
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._overrides = {}
+        self._default = None
+
+    @staticmethod
+    def _as_tuple(c):
         return c.get("username"), c.get("password"), c.get("enable_secret")
-    else:
+
+    def _refresh(self):
+        stat = os.stat(self.credentials_file)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+
+        with open(self.credentials_file, "r") as f:
+            creds = yaml.safe_load(f) or {}
+        self._overrides = {
+            name: self._as_tuple(c) for name, c in (creds.get("overrides") or {}).items()
+        }
+        self._default = self._as_tuple(creds["default"]) if "default" in creds else None
+        self._stamp = stamp
+
+    def resolve(self, device_name):
+        """Return (username, password, enable_secret) for a device."""
+        with self._lock:
+            self._refresh()
+            # First check if the device has specific overrides
+            if device_name in self._overrides:
+                return self._overrides[device_name]
+            # Otherwise, fall back to the default set of credentials
+            if self._default is not None:
+                return self._default
         raise ValueError(f"No credentials found for device {device_name}")
 
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_credential_resolver(credentials_file):
+    """Return the shared resolver for a credentials file."""
+    with _resolvers_lock:
+        resolver = _resolvers.get(credentials_file)
+        if resolver is None:
+            resolver = _resolvers[credentials_file] = CredentialResolver(credentials_file)
+        return resolver
+
+
+def load_credentials(credentials_file, device_name):
+    return get_credential_resolver(credentials_file).resolve(device_name)
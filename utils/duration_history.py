@@ -0,0 +1,97 @@
+# utils/duration_history.py
+
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+from scripts.constants import DURATION_HISTORY_PATH
+
+
+class DurationHistory:
+    """
+    Local store of how long each device took per task, kept as an
+    exponentially weighted moving average over runs (weight alpha for the
+    newest run) so one slow run does not dominate the estimate.
+    """
+
+    def __init__(self, path=DURATION_HISTORY_PATH, alpha=0.5):
+        self.path = path
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS durations ("
+                "task TEXT, device TEXT, seconds REAL, runs INTEGER, updated REAL, "
+                "PRIMARY KEY (task, device))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def expected(self, task):
+        """Return {device: expected seconds} for every device seen running task."""
+        with self._lock, self._connect() as db:
+            rows = db.execute("SELECT device, seconds FROM durations WHERE task = ?", (task,))
+            return dict(rows.fetchall())
+
+    def record(self, task, durations):
+        """Fold {device: seconds} measured in one run into the averages."""
+        if not durations:
+            return
+        now = time.time()
+        with self._lock, self._connect() as db:
+            previous = self._previous(db, task, list(durations))
+            rows = []
+            for device, seconds in durations.items():
+                old = previous.get(device)
+                if old is not None:
+                    seconds = self.alpha * seconds + (1 - self.alpha) * old[0]
+                rows.append((task, device, seconds, (old[1] if old else 0) + 1, now))
+            db.executemany("INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _previous(db, task, devices):
+        previous = {}
+        # Stay below SQLite's bound parameter limit on large inventories
+        for i in range(0, len(devices), 500):
+            chunk = devices[i:i + 500]
+            rows = db.execute(
+                f"SELECT device, seconds, runs FROM durations "
+                f"WHERE task = ? AND device IN ({','.join('?' * len(chunk))})",
+                [task, *chunk],
+            )
+            for device, seconds, runs in rows:
+                previous[device] = (seconds, runs)
+        return previous
+
+
+def estimate_durations(devices, expected, default=None):
+    """
+    Return {device: seconds} for devices, filling devices never seen before
+    with default, or the median of the known durations (0 when none is known).
+    """
+    if default is None:
+        default = statistics.median(expected.values()) if expected else 0.0
+    return {device: expected.get(device, default) for device in devices}
+
+
+def predict_makespan(durations, width):
+    """Makespan of running durations longest-first on width parallel workers."""
+    if width < 1 or not durations:
+        return 0.0
+    finish = [0.0] * min(width, len(durations))
+    for seconds in sorted(durations, reverse=True):
+        # Greedy list scheduling: next job goes to the worker free first
+        i = finish.index(min(finish))
+        finish[i] += seconds
+    return max(finish)
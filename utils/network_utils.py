@@ -1,13 +1,28 @@
 # utils/network_utils.py
 
+import asyncio
 import ipaddress
 import socket
 import os
+import threading
+import time
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from filelock import FileLock
 from scripts.constants import (
+    CONFIG_FILE_PATH,
+    GROUP_TO_DEVICE_TYPE,
     STATUS_FILE_PATH,
+    PROBE_RESULT_MAX_AGE,
 )
+from scripts.config_parser import load_yaml
+from utils.reachability_cache import ReachabilityCache
+
+# Latest probe result per host: ip -> (reachable, monotonic timestamp)
+_probe_results = {}
+_probe_lock = threading.Lock()
+_cache = None
 
 def validate_ip(ip_str):
     """Check if the IP address is valid."""
@@ -17,13 +32,114 @@ def validate_ip(ip_str):
     except ValueError:
         return False
 
+def get_reachability_cache():
+    """
+    Return the shared on-disk reachability cache, or None when
+    reachability.cache_ttl in config.yaml is 0.
+    """
+    global _cache
+    with _probe_lock:
+        if _cache is None:
+            config = load_yaml(CONFIG_FILE_PATH) or {}
+            ttl = config.get("reachability", {}).get("cache_ttl", 300)
+            _cache = ReachabilityCache(ttl=ttl) if ttl > 0 else False
+        return _cache or None
+
+
+def _remember(results):
+    """Keep {ip: (reachable, latency)} results in memory and in the on-disk cache."""
+    now = time.monotonic()
+    with _probe_lock:
+        for ip, (reachable, _) in results.items():
+            _probe_results[ip] = (reachable, now)
+    cache = get_reachability_cache()
+    if cache is not None and results:
+        cache.update(results)
+
+
 def is_reachable(ip, timeout=2):
-    """Check if the device is reachable on TCP 22 (SSH)."""
+    """
+    Check if the device is reachable on TCP 22 (SSH).
+    A bulk probe result younger than PROBE_RESULT_MAX_AGE, or a cached
+    result within reachability.cache_ttl, is reused.
+    """
+    with _probe_lock:
+        cached = _probe_results.get(ip)
+    if cached and time.monotonic() - cached[1] < PROBE_RESULT_MAX_AGE:
+        return cached[0]
+
+    if not validate_ip(ip):
+        return False
+    cache = get_reachability_cache()
+    if cache is not None:
+        fresh = cache.get_fresh([ip])
+        if ip in fresh:
+            return fresh[ip][0]
+
+    start = time.monotonic()
     try:
         with socket.create_connection((ip, 22), timeout=timeout):
-            return True
+            reachable = True
     except Exception:
-        return False
+        reachable = False
+    _remember({ip: (reachable, time.monotonic() - start if reachable else None)})
+    return reachable
+
+
+def run_coroutine(coro):
+    """Run a coroutine to completion, also when called from a running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from inside a running loop (e.g. the Textual TUI): use a private loop
+    with ThreadPoolExecutor(max_workers=1) as runner:
+        return runner.submit(asyncio.run, coro).result()
+
+
+async def _probe_host(ip, port, timeout, semaphore):
+    async with semaphore:
+        start = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+        except Exception:
+            return ip, (False, None)
+        latency = time.monotonic() - start
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+        return ip, (True, latency)
+
+
+async def _probe_all(hosts, port, timeout, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(_probe_host(ip, port, timeout, semaphore) for ip in hosts))
+
+
+def probe_reachability(hosts, port=22, timeout=2, concurrency=500, use_cache=True):
+    """
+    Probe many hosts on TCP port 22 at once with non-blocking connects.
+    At most `concurrency` connects are in flight. Hosts with a fresh entry in
+    the reachability cache are not probed again. Returns {ip: reachable} and
+    remembers the results for is_reachable().
+    """
+    hosts = list(dict.fromkeys(hosts))
+    if not hosts:
+        return {}
+
+    cache = get_reachability_cache() if use_cache and port == 22 else None
+    fresh = cache.get_fresh(hosts) if cache is not None else {}
+    to_probe = [ip for ip in hosts if ip not in fresh]
+
+    probed = dict(run_coroutine(_probe_all(to_probe, port, timeout, concurrency))) if to_probe else {}
+    if port == 22:
+        _remember(probed)
+
+    reachability = {ip: entry[0] for ip, entry in fresh.items()}
+    reachability.update({ip: reachable for ip, (reachable, _) in probed.items()})
+    return reachability
 
 
 def validate_devices(devices, logger):
@@ -52,20 +168,77 @@ def validate_devices(devices, logger):
     return valid_devices
 
 
-def write_device_status_yaml(devices):
+def select_devices(devices, names, logger):
+    """
+    Keep the devices whose name is in names (all devices when names is None),
+    logging the names not found in devices.yaml.
+    """
+    if names is None:
+        return devices
+    names = set(names)
+    selected = [dev for dev in devices if dev.get("name") in names]
+    unknown = names - {dev.get("name") for dev in selected}
+    if unknown:
+        logger.error(f"Device(s) not in devices.yaml: {', '.join(sorted(unknown))}")
+    return selected
+
+
+def build_device_status(devices):
+    """
+    Build Device List entries (name, ip, vendor, status, latency_ms, last_seen)
+    from the reachability cache.
+    """
+    cache = get_reachability_cache()
+    entries = cache.entries() if cache is not None else {}
+
+    status = []
+    for dev in devices:
+        ip = dev.get("host")
+        entry = entries.get(ip)
+        item = {
+            "name": dev.get("name"),
+            "ip": ip,
+            "vendor": dev.get("group"),
+            "device_type": GROUP_TO_DEVICE_TYPE.get(dev.get("group"), "unknown"),
+            "status": "UNKNOWN",
+        }
+        if entry:
+            reachable, latency, checked_at = entry
+            item["status"] = "UP" if reachable else "DOWN"
+            item["latency_ms"] = round(latency * 1000, 1) if latency is not None else None
+            item["last_seen"] = datetime.fromtimestamp(checked_at).strftime("%Y-%m-%d %H:%M:%S")
+        status.append(item)
+    return status
+
+
+def write_device_status_yaml(devices, merge=False):
     """
     Writes device status information to a YAML file.
 
     Args:
         devices (list): List of dicts, each containing name, ip, vendor, status.
-        status_file_path (str): Path to YAML output file.
+        merge (bool): Only replace the entries of these devices (by name) and
+            keep the other devices already in the file, e.g. after a run on
+            a subset of the inventory.
     """
-    # Add/update 'last_seen' field
+    # Fill in 'last_seen' where the caller did not provide one; never-probed
+    # (UNKNOWN) devices have not been seen
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     for d in devices:
-        d["last_seen"] = now
+        d.setdefault("last_seen", None if d.get("status") == "UNKNOWN" else now)
 
     status_file_path = STATUS_FILE_PATH
     os.makedirs(os.path.dirname(status_file_path), exist_ok=True)
-    with open(status_file_path, "w") as f:
-        yaml.dump(devices, f, default_flow_style=False, allow_unicode=True)
+    # Runs, daemon jobs and the GUI update the file concurrently
+    with FileLock(f"{status_file_path}.lock"):
+        if merge and os.path.exists(status_file_path):
+            with open(status_file_path, "r") as f:
+                existing = yaml.safe_load(f) or []
+            updated = {d.get("name"): d for d in devices}
+            merged = [updated.pop(d.get("name"), d) for d in existing]
+            devices = merged + list(updated.values())
+
+        # Written to a temporary file first: the GUI may read it at any time
+        with open(f"{status_file_path}.tmp", "w") as f:
+            yaml.dump(devices, f, default_flow_style=False, allow_unicode=True)
+        os.replace(f"{status_file_path}.tmp", status_file_path)
@@ -0,0 +1,70 @@
+# utils/reachability_cache.py
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from scripts.constants import REACHABILITY_CACHE_PATH
+
+
+class ReachabilityCache:
+    """
+    On-disk cache of the last TCP 22 probe per host (result, latency, time),
+    shared by every run on this machine. Entries older than ttl seconds are
+    treated as missing.
+    """
+
+    def __init__(self, path=REACHABILITY_CACHE_PATH, ttl=300):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                "host TEXT PRIMARY KEY, reachable INTEGER, latency REAL, checked_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get_fresh(self, hosts):
+        """Return {host: (reachable, latency, checked_at)} for entries within the TTL."""
+        hosts = list(hosts)
+        if self.ttl <= 0 or not hosts:
+            return {}
+        oldest = time.time() - self.ttl
+        fresh = {}
+        with self._lock, self._connect() as db:
+            # Stay below SQLite's bound parameter limit on large inventories
+            for i in range(0, len(hosts), 500):
+                chunk = hosts[i:i + 500]
+                rows = db.execute(
+                    f"SELECT host, reachable, latency, checked_at FROM probes "
+                    f"WHERE checked_at >= ? AND host IN ({','.join('?' * len(chunk))})",
+                    [oldest, *chunk],
+                )
+                for host, reachable, latency, checked_at in rows:
+                    fresh[host] = (bool(reachable), latency, checked_at)
+        return fresh
+
+    def update(self, results):
+        """Store {host: (reachable, latency)} probe results."""
+        now = time.time()
+        rows = [(host, int(reachable), latency, now) for host, (reachable, latency) in results.items()]
+        with self._lock, self._connect() as db:
+            db.executemany("INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)", rows)
+
+    def entries(self):
+        """Return {host: (reachable, latency, checked_at)} for every cached host."""
+        with self._lock, self._connect() as db:
+            rows = db.execute("SELECT host, reachable, latency, checked_at FROM probes")
+            return {host: (bool(reachable), latency, checked_at) for host, reachable, latency, checked_at in rows}